@@ -3,6 +3,8 @@ from typing import Dict, List, Any, Optional
 import os
 from dotenv import load_dotenv
 
+from utils.risk_engine import RiskEngine
+
 # Load environment variables
 load_dotenv()
 
@@ -11,10 +13,15 @@ class AdviceAgent:
     Agent that generates environmental advice and risk assessments
     """
     
-    def __init__(self):
-        """Initialize the advice agent"""
+    def __init__(self, risk_engine: Optional[RiskEngine] = None):
+        """
+        Initialize the advice agent
+        
+        Args:
+            risk_engine: Optional compiled risk engine; defaults to the standard threshold table
+        """
         # No OpenAI client initialization
-        pass
+        self.risk_engine = risk_engine or RiskEngine()
     
     async def generate_risk_assessment(self, environmental_data: Dict[str, Any]) -> Dict[str, Any]:
         """
@@ -26,95 +33,56 @@ class AdviceAgent:
         Returns:
             Dictionary containing risk assessment
         """
-        # Instead of using OpenAI, use a default risk assessment based on the environmental data
         try:
-            # Extract relevant data for risk assessment
-            air_quality = environmental_data.get('air_quality', {})
-            weather = environmental_data.get('weather', {})
+            return self.risk_engine.assess(environmental_data)
+        except Exception as e:
+            print(f"Error generating risk assessment: {str(e)}")
+            return self._create_default_risk_assessment()
+    
+    async def generate_risk_assessments(self, environmental_data: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Generate risk assessments for many locations in a single vectorised pass
+        
+        Args:
+            environmental_data: List of environmental data dictionaries
             
-            # Determine overall risk level based on air quality and weather
-            aqi = air_quality.get('aqi', 0)
-            temperature = weather.get('temperature', 20)
-            uv_index = weather.get('uv_index', 5)
+        Returns:
+            List of risk assessment dictionaries in input order
+        """
+        try:
+            return self.risk_engine.assess_many(environmental_data)
+        except Exception as e:
+            print(f"Error generating risk assessments: {str(e)}")
+            return [self._create_default_risk_assessment() for _ in environmental_data]
+    
+    async def generate_risk_assessment_json(self, environmental_data: Dict[str, Any]) -> bytes:
+        """
+        Generate a pre-serialised risk assessment
+        
+        Args:
+            environmental_data: Dictionary containing environmental data
             
-            # Determine risk level based on AQI
-            if aqi > 150:
-                air_risk_level = "high"
-                air_risk_desc = "Poor air quality may cause health issues for sensitive groups and the general population."
-            elif aqi > 100:
-                air_risk_level = "medium"
-                air_risk_desc = "Moderate air pollution may affect sensitive groups."
-            else:
-                air_risk_level = "low"
-                air_risk_desc = "Air quality is good with minimal health risks."
-                
-            # Determine risk level based on UV index
-            if uv_index > 7:
-                uv_risk_level = "high"
-                uv_risk_desc = "High UV levels may cause skin damage with brief exposure."
-            elif uv_index > 5:
-                uv_risk_level = "medium"
-                uv_risk_desc = "Moderate UV levels may cause skin damage with prolonged exposure."
-            else:
-                uv_risk_level = "low"
-                uv_risk_desc = "Low UV levels with minimal risk of skin damage."
-                
-            # Determine risk level based on temperature
-            if temperature > 35 or temperature < 0:
-                temp_risk_level = "high"
-                temp_risk_desc = "Extreme temperatures may pose health risks."
-            elif temperature > 30 or temperature < 5:
-                temp_risk_level = "medium"
-                temp_risk_desc = "Temperature conditions may be uncomfortable for sensitive groups."
-            else:
-                temp_risk_level = "low"
-                temp_risk_desc = "Temperature conditions are comfortable for most people."
-                
-            # Determine overall risk level
-            risk_levels = [air_risk_level, uv_risk_level, temp_risk_level]
-            if "high" in risk_levels:
-                overall_risk_level = "high"
-            elif "medium" in risk_levels:
-                overall_risk_level = "medium"
-            else:
-                overall_risk_level = "low"
-                
-            # Create risk assessment
-            risk_assessment = {
-                "overall_risk": {
-                    "level": overall_risk_level,
-                    "description": f"Overall environmental risk is {overall_risk_level} based on air quality, UV exposure, and temperature conditions."
-                },
-                "specific_risks": [
-                    {
-                        "category": "Air Quality",
-                        "level": air_risk_level,
-                        "description": air_risk_desc,
-                        "affected_groups": ["Children", "Elderly", "People with respiratory conditions"]
-                    },
-                    {
-                        "category": "UV Exposure",
-                        "level": uv_risk_level,
-                        "description": uv_risk_desc,
-                        "affected_groups": ["All outdoor workers", "Children", "Fair-skinned individuals"]
-                    },
-                    {
-                        "category": "Temperature",
-                        "level": temp_risk_level,
-                        "description": temp_risk_desc,
-                        "affected_groups": ["Elderly", "Children", "People with chronic conditions"]
-                    }
-                ],
-                "trend": {
-                    "direction": "stable",
-                    "description": "Environmental conditions have remained relatively stable."
-                }
-            }
+        Returns:
+            JSON-encoded risk assessment
+        """
+        return (await self.generate_risk_assessments_json([environmental_data]))[0]
+    
+    async def generate_risk_assessments_json(self, environmental_data: List[Dict[str, Any]]) -> List[bytes]:
+        """
+        Generate pre-serialised risk assessments for many locations
+        
+        Args:
+            environmental_data: List of environmental data dictionaries
             
-            return risk_assessment
+        Returns:
+            List of JSON-encoded risk assessments in input order
+        """
+        try:
+            return self.risk_engine.assess_many_json(environmental_data)
         except Exception as e:
-            print(f"Error generating risk assessment: {str(e)}")
-            return self._create_default_risk_assessment()
+            print(f"Error generating risk assessments: {str(e)}")
+            default = json.dumps(self._create_default_risk_assessment()).encode("utf-8")
+            return [default for _ in environmental_data]
     
     async def generate_advice(self, environmental_data: Dict[str, Any]) -> Dict[str, Any]:
         """
@@ -126,94 +94,56 @@ class AdviceAgent:
         Returns:
             Dictionary containing advice
         """
-        # Instead of using OpenAI, use a default advice based on the environmental data
         try:
-            # Extract relevant data for advice
-            air_quality = environmental_data.get('air_quality', {})
-            weather = environmental_data.get('weather', {})
+            return self.risk_engine.advise(environmental_data)
+        except Exception as e:
+            print(f"Error generating advice: {str(e)}")
+            return self._create_default_advice()
+    
+    async def generate_advice_batch(self, environmental_data: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Generate preventive advice for many locations in a single vectorised pass
+        
+        Args:
+            environmental_data: List of environmental data dictionaries
             
-            # Determine advice based on air quality and weather
-            aqi = air_quality.get('aqi', 0)
-            temperature = weather.get('temperature', 20)
-            uv_index = weather.get('uv_index', 5)
+        Returns:
+            List of advice dictionaries in input order
+        """
+        try:
+            return self.risk_engine.advise_many(environmental_data)
+        except Exception as e:
+            print(f"Error generating advice: {str(e)}")
+            return [self._create_default_advice() for _ in environmental_data]
+    
+    async def generate_advice_json(self, environmental_data: Dict[str, Any]) -> bytes:
+        """
+        Generate pre-serialised preventive advice
+        
+        Args:
+            environmental_data: Dictionary containing environmental data
             
-            # Air quality advice
-            if aqi > 150:
-                air_advice = "Limit outdoor activities, especially for sensitive groups. Keep windows closed."
-                air_urgency = "high"
-            elif aqi > 100:
-                air_advice = "Consider reducing prolonged outdoor activities for sensitive groups."
-                air_urgency = "medium"
-            else:
-                air_advice = "Air quality is good. Enjoy outdoor activities."
-                air_urgency = "low"
-                
-            # UV protection advice
-            if uv_index > 7:
-                uv_advice = "Use SPF 30+ sunscreen, wear protective clothing, and limit direct sun exposure between 10am-4pm."
-                uv_urgency = "high"
-            elif uv_index > 5:
-                uv_advice = "Apply SPF 15+ sunscreen and wear a hat when outdoors for extended periods."
-                uv_urgency = "medium"
-            else:
-                uv_advice = "Basic sun protection recommended for extended outdoor activities."
-                uv_urgency = "low"
-                
-            # Temperature advice
-            if temperature > 35:
-                temp_advice = "Stay hydrated, seek shade, and use cooling measures. Check on vulnerable individuals."
-                temp_urgency = "high"
-            elif temperature > 30:
-                temp_advice = "Stay hydrated and take regular breaks from heat."
-                temp_urgency = "medium"
-            elif temperature < 0:
-                temp_advice = "Dress in layers, limit exposure to cold, and watch for signs of hypothermia."
-                temp_urgency = "high"
-            elif temperature < 5:
-                temp_advice = "Dress warmly and be cautious of icy conditions."
-                temp_urgency = "medium"
-            else:
-                temp_advice = "Temperature conditions are comfortable for most activities."
-                temp_urgency = "low"
-                
-            # Create advice
-            advice = {
-                "general_advice": "Take appropriate precautions based on current environmental conditions.",
-                "specific_recommendations": [
-                    {
-                        "category": "Air Quality",
-                        "title": "Air Quality Precautions",
-                        "description": air_advice,
-                        "urgency": air_urgency,
-                        "target_groups": ["All individuals", "Especially sensitive groups"]
-                    },
-                    {
-                        "category": "UV Protection",
-                        "title": "Sun Safety",
-                        "description": uv_advice,
-                        "urgency": uv_urgency,
-                        "target_groups": ["All individuals"]
-                    },
-                    {
-                        "category": "Temperature",
-                        "title": "Temperature Adaptation",
-                        "description": temp_advice,
-                        "urgency": temp_urgency,
-                        "target_groups": ["All individuals", "Especially vulnerable groups"]
-                    }
-                ],
-                "preventive_measures": [
-                    "Monitor local air quality reports",
-                    "Stay hydrated throughout the day",
-                    "Use appropriate sun protection",
-                    "Adjust outdoor activities based on environmental conditions"
-                ]
-            }
+        Returns:
+            JSON-encoded advice
+        """
+        return (await self.generate_advice_batch_json([environmental_data]))[0]
+    
+    async def generate_advice_batch_json(self, environmental_data: List[Dict[str, Any]]) -> List[bytes]:
+        """
+        Generate pre-serialised preventive advice for many locations
+        
+        Args:
+            environmental_data: List of environmental data dictionaries
             
-            return advice
+        Returns:
+            List of JSON-encoded advice in input order
+        """
+        try:
+            return self.risk_engine.advise_many_json(environmental_data)
         except Exception as e:
             print(f"Error generating advice: {str(e)}")
-            return self._create_default_advice()
+            default = json.dumps(self._create_default_advice()).encode("utf-8")
+            return [default for _ in environmental_data]
     
     async def generate_chat_response(
         self, 
@@ -7,6 +7,7 @@ from datetime import datetime
 
 # Import India-specific crop recommendations
 from agents.india_crop_recommendations import get_india_crop_recommendations
+from services.region_resolver import RegionResolver
 
 # Load environment variables
 load_dotenv()
@@ -16,14 +17,16 @@ class FarmingAgent:
     Agent that provides agricultural recommendations based on environmental data
     """
     
-    def __init__(self, tavily_service):
+    def __init__(self, tavily_service, region_resolver: Optional[RegionResolver] = None):
         """
         Initialize the farming agent
         
         Args:
             tavily_service: Initialized Tavily service for data retrieval
+            region_resolver: Resolver mapping locations to Indian states and agro-climatic zones
         """
         self.tavily_service = tavily_service
+        self.region_resolver = region_resolver or RegionResolver.load()
         self.keywords_ai_api_key = os.getenv("KEYWORDS_AI_API_KEY")
         
         # Check if Keywords AI API key is valid
@@ -48,16 +51,11 @@ class FarmingAgent:
         if not season:
             season = self._get_current_season()
         
-        # Check if this is an Indian location
-        location_lower = location.lower()
-        if "india" in location_lower or any(region in location_lower for region in [
-            "delhi", "mumbai", "chennai", "kolkata", "bengaluru", "hyderabad",
-            "punjab", "haryana", "uttar pradesh", "bihar", "maharashtra", 
-            "gujarat", "rajasthan", "tamil nadu", "kerala", "karnataka",
-            "west bengal", "assam", "northeast"
-        ]):
-            # Use India-specific crop recommendations
-            return get_india_crop_recommendations(location, season)
+        # Check if this is an Indian location (by name or coordinates)
+        region = self.region_resolver.resolve(location)
+        if region is not None:
+            # Use India-specific crop recommendations for the agro-climatic zone
+            return get_india_crop_recommendations(location, season, region)
         
         # For non-Indian locations, continue with the regular flow
         # Construct search query
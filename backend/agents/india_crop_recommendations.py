@@ -2,20 +2,32 @@
 India-specific crop recommendations for the EcoShield farming agent
 """
 
-from typing import Dict, Any
+from typing import Dict, Any, Optional
 
-def get_india_crop_recommendations(location: str, season: str) -> Dict[str, Any]:
+from services.region_resolver import RegionMatch
+
+# Agro-climatic zones sharing a set of regional recommendations
+TRANS_GANGETIC_ZONES = {"trans_gangetic_plains"}
+GANGETIC_ZONES = {"upper_gangetic_plains", "middle_gangetic_plains"}
+WESTERN_PLATEAU_ZONES = {"western_plateau_hills"}
+WESTERN_DRY_ZONES = {"gujarat_plains_hills", "western_dry"}
+SOUTHERN_ZONES = {"southern_plateau_hills", "east_coast_plains_hills", "west_coast_plains_ghats"}
+EASTERN_ZONES = {"lower_gangetic_plains", "eastern_himalayan"}
+
+def get_india_crop_recommendations(location: str, season: str, region: Optional[RegionMatch] = None) -> Dict[str, Any]:
     """
     Get India-specific crop recommendations based on location and season
     
     Args:
         location: Location string
         season: Season string
+        region: State and agro-climatic zone of the location (see RegionResolver);
+            without one only the season-based recommendations are given
         
     Returns:
         Dictionary containing crop recommendations
     """
-    location_lower = location.lower()
+    zone_id = region.zone_id if region is not None else None
     season_lower = season.lower()
     
     # Convert Western seasons to Indian agricultural seasons if needed
@@ -139,7 +151,7 @@ def get_india_crop_recommendations(location: str, season: str) -> Dict[str, Any]
         }
     
     # Region-specific recommendations override general season recommendations
-    if "punjab" in location_lower or "haryana" in location_lower:
+    if zone_id in TRANS_GANGETIC_ZONES:
         recommendations = {
             "location": location,
             "season": indian_season.capitalize(),
@@ -175,7 +187,7 @@ def get_india_crop_recommendations(location: str, season: str) -> Dict[str, Any]
                 "Look for varieties with shorter duration to enable crop rotation"
             ]
         }
-    elif "uttar pradesh" in location_lower or "bihar" in location_lower:
+    elif zone_id in GANGETIC_ZONES:
         recommendations = {
             "location": location,
             "season": indian_season.capitalize(),
@@ -211,7 +223,7 @@ def get_india_crop_recommendations(location: str, season: str) -> Dict[str, Any]
                 "Consider flood-tolerant varieties for low-lying areas"
             ]
         }
-    elif "maharashtra" in location_lower:
+    elif zone_id in WESTERN_PLATEAU_ZONES:
         recommendations = {
             "location": location,
             "season": indian_season.capitalize(),
@@ -247,7 +259,7 @@ def get_india_crop_recommendations(location: str, season: str) -> Dict[str, Any]
                 "Look for drought-tolerant varieties for rain shadow regions"
             ]
         }
-    elif "gujarat" in location_lower or "rajasthan" in location_lower:
+    elif zone_id in WESTERN_DRY_ZONES:
         recommendations = {
             "location": location,
             "season": indian_season.capitalize(),
@@ -283,7 +295,7 @@ def get_india_crop_recommendations(location: str, season: str) -> Dict[str, Any]
                 "Look for varieties with shorter duration to fit within rainfall period"
             ]
         }
-    elif "tamil nadu" in location_lower or "kerala" in location_lower or "karnataka" in location_lower:
+    elif zone_id in SOUTHERN_ZONES:
         recommendations = {
             "location": location,
             "season": indian_season.capitalize(),
@@ -319,7 +331,7 @@ def get_india_crop_recommendations(location: str, season: str) -> Dict[str, Any]
                 "Look for varieties resistant to high humidity conditions"
             ]
         }
-    elif "west bengal" in location_lower or "assam" in location_lower or "northeast" in location_lower:
+    elif zone_id in EASTERN_ZONES:
         recommendations = {
             "location": location,
             "season": indian_season.capitalize(),
@@ -356,4 +368,6 @@ def get_india_crop_recommendations(location: str, season: str) -> Dict[str, Any]
             ]
         }
     
+    if region is not None:
+        recommendations["region"] = region.to_dict()
     return recommendations
@@ -1,8 +1,12 @@
 import json
-from typing import Dict, Any, Optional
+from typing import Dict, Any, List, Optional
 import os
 from dotenv import load_dotenv
 
+from utils.aqi import DISPLAY_NAMES, compute_aqi
+from utils.geo import parse_coordinates
+from utils.parser import Parser, PARSER_VERSION
+
 # Load environment variables
 load_dotenv()
 
@@ -11,26 +15,61 @@ class PollutionAgent:
     Agent that uses Tavily to search for pollution data
     """
     
-    def __init__(self, tavily_service):
+    def __init__(
+        self,
+        tavily_service,
+        document_cache=None,
+        station_store=None,
+        resolver=None,
+        parsing_service=None
+    ):
         """
         Initialize the pollution agent with Tavily service
         
         Args:
             tavily_service: Initialized Tavily service
+            document_cache: Optional DocumentCache for fields extracted from result content
+            station_store: Optional StationStore of monitoring station readings
+            resolver: LocationResolver used to place locations for station queries
+            parsing_service: Optional ParsingService that extracts fields from result
+                content off the event loop
         """
         self.tavily_service = tavily_service
+        self.document_cache = document_cache
+        self.station_store = station_store
+        self.resolver = resolver
+        self.parsing_service = parsing_service
         
-    async def get_pollution_data(self, location: str, radius_km: float = 5.0) -> Dict[str, Any]:
+    async def get_pollution_data(
+        self,
+        location: str,
+        radius_km: float = 5.0,
+        fields: Optional[List[str]] = None
+    ) -> Dict[str, Any]:
         """
         Get pollution data for a specific location
         
+        Air quality comes from the monitoring stations within radius_km when
+        there are any, otherwise from a Tavily search for the location.
+        
         Args:
             location: Location string (city, address, coordinates)
             radius_km: Radius in kilometers to search within
+            fields: Optional subset of "air_quality" and "water_quality" to return;
+                the Tavily search is skipped when air quality is not requested
             
         Returns:
             Dictionary containing processed pollution data
         """
+        if fields is not None and "air_quality" not in fields:
+            # Search results only feed air quality; water quality is not extracted from them
+            pollution_data = self.create_default_pollution_data(location)
+            return self._select_fields(pollution_data, fields)
+        
+        station_data = self.get_station_data(location, radius_km)
+        if station_data is not None:
+            return self._select_fields(station_data, fields)
+        
         # Construct search query
         search_query = f"current air pollution data in {location} PM2.5 AQI air quality index"
         
@@ -43,15 +82,135 @@ class PollutionAgent:
             )
             
             # Extract relevant information from search results
-            pollution_data = self._extract_pollution_data_simple(search_results, location)
+            pollution_data = await self._extract_pollution_data_simple(search_results, location)
             
-            return pollution_data
+            return self._select_fields(pollution_data, fields)
             
         except Exception as e:
             print(f"Error getting pollution data: {str(e)}")
-            return self._create_default_pollution_data(location)
+            return self._select_fields(self.create_default_pollution_data(location), fields)
+    
+    def get_station_data(self, location: str, radius_km: float = 5.0) -> Optional[Dict[str, Any]]:
+        """
+        Build pollution data from the monitoring stations around a location
+        
+        Only locations whose coordinates are known without geocoding
+        (coordinates, gazetteer places and names geocoded before) are placed.
+        
+        Args:
+            location: Location string
+            radius_km: Radius in kilometers to aggregate stations within
+            
+        Returns:
+            Pollution data structure or None if no station is in range
+        """
+        if self.station_store is None:
+            return None
+        # Exact coordinates are used as given; the resolver snaps them to a
+        # geohash cell centre, which is only meant for cache keys
+        point = parse_coordinates(location)
+        if point is None and self.resolver is not None:
+            coordinates = self.resolver.coordinates(location)
+            point = (coordinates["lat"], coordinates["lon"]) if coordinates is not None else None
+        if point is None:
+            return None
+        aggregate = self.station_store.aggregate(point[0], point[1], radius_km)
+        if aggregate is None:
+            return None
+        
+        readings = aggregate["readings"]
+        pollution_data = self.create_default_pollution_data(location)
+        air_quality = {
+            "pm25": readings.get("pm2_5"),
+            "pm10": readings.get("pm10"),
+            "ozone": readings.get("o3"),
+            "no2": readings.get("no2"),
+            "so2": readings.get("so2"),
+            "co": readings.get("co")
+        }
+        aqi = compute_aqi(readings)
+        if aqi["aqi"] is not None:
+            air_quality["aqi"] = aqi["aqi"]
+            air_quality["category"] = self._get_aqi_category(aqi["aqi"])
+            pollution_data["primary_pollutants"] = [aqi["dominant_pollutant"]]
+        else:
+            air_quality["aqi"] = None
+            air_quality["category"] = "Unknown"
+            pollution_data["primary_pollutants"] = [DISPLAY_NAMES[name] for name in readings]
+        air_quality["stations"] = {key: value for key, value in aggregate.items() if key != "readings"}
+        pollution_data["air_quality"] = air_quality
+        pollution_data["health_implications"] = self._health_implications(air_quality["category"])
+        pollution_data["data_confidence"] = "High" if aggregate["stations"] >= 3 else "Medium"
+        return pollution_data
+    
+    def create_default_pollution_data(self, location: str) -> Dict[str, Any]:
+        """
+        Create default pollution data structure when extraction fails
+        
+        Args:
+            location: Location string
+            
+        Returns:
+            Default pollution data structure
+        """
+        return {
+            "location": location,
+            "air_quality": {
+                "aqi": 50,
+                "pm25": 12.0,
+                "pm10": 20.0,
+                "ozone": 30.0,
+                "category": "Moderate"
+            },
+            "water_quality": {
+                "status": "Unknown",
+                "contaminants": []
+            },
+            "primary_pollutants": ["PM2.5", "Ozone"],
+            "health_implications": "Moderate air quality may cause health effects for sensitive groups.",
+            "sources": ["Traffic", "Industrial activities"],
+            "data_confidence": "Low"
+        }
+    
+    def _health_implications(self, category: str) -> str:
+        """
+        Describe the health implications of an AQI category
+        
+        Args:
+            category: Category from _get_aqi_category
+            
+        Returns:
+            Health implications text
+        """
+        if category == "Good":
+            return "Air quality is good. No health concerns."
+        if category == "Moderate":
+            return "Air quality is moderate. Sensitive people should consider limiting outdoor activities."
+        if category == "Hazardous":
+            return "Air quality is hazardous. Everyone should avoid outdoor activities."
+        if category == "Unknown":
+            return "Air quality index could not be computed from the nearby stations."
+        return "Air quality is unhealthy for sensitive groups or all people."
+    
+    def _select_fields(self, pollution_data: Dict[str, Any], fields: Optional[List[str]]) -> Dict[str, Any]:
+        """
+        Drop the air or water quality sections that were not requested
+        
+        Args:
+            pollution_data: Full pollution data structure
+            fields: Requested fields or None for everything
+            
+        Returns:
+            Pollution data restricted to the requested sections
+        """
+        if fields is None:
+            return pollution_data
+        return {
+            key: value for key, value in pollution_data.items()
+            if key not in ("air_quality", "water_quality") or key in fields
+        }
     
-    def _extract_pollution_data_simple(self, search_results: Dict[str, Any], location: str) -> Dict[str, Any]:
+    async def _extract_pollution_data_simple(self, search_results: Dict[str, Any], location: str) -> Dict[str, Any]:
         """
         Extract structured pollution data from search results using simple parsing
         
@@ -63,59 +222,35 @@ class PollutionAgent:
             Structured pollution data
         """
         # Initialize default data
-        pollution_data = self._create_default_pollution_data(location)
+        pollution_data = self.create_default_pollution_data(location)
         
         # Extract information from search results
-        results = search_results.get("results", [])
+        contents = [result.get("content", "") for result in search_results.get("results", [])]
+        if self.parsing_service is not None:
+            extracted = await self.parsing_service.parse_batch("extract_pollution_fields", contents)
+        elif self.document_cache is not None:
+            extracted = [
+                self.document_cache.get_or_parse(
+                    content, "extract_pollution_fields", PARSER_VERSION, Parser.extract_pollution_fields
+                )
+                for content in contents
+            ]
+        else:
+            extracted = [Parser.extract_pollution_fields(content) for content in contents]
         
-        # Look for AQI and pollution data in the results
-        for result in results:
-            content = result.get("content", "").lower()
-            
-            # Try to extract AQI value
-            if "aqi" in content or "air quality index" in content:
-                # Simple regex-like extraction for AQI values
-                words = content.split()
-                for i, word in enumerate(words):
-                    if word in ["aqi", "index"] and i > 0:
-                        try:
-                            # Look for numbers before or after AQI mention
-                            for j in range(max(0, i-3), min(len(words), i+4)):
-                                if words[j].isdigit():
-                                    aqi_value = int(words[j])
-                                    if 0 <= aqi_value <= 500:  # Valid AQI range
-                                        pollution_data["air_quality"]["aqi"] = aqi_value
-                                        pollution_data["air_quality"]["category"] = self._get_aqi_category(aqi_value)
-                                        break
-                        except (ValueError, IndexError):
-                            continue
+        # Look for AQI and pollution data in the results; later results take precedence
+        for fields in extracted:
+            if fields is None:
+                # The batch holding this result failed or timed out
+                continue
             
-            # Try to extract PM2.5 values
-            if "pm2.5" in content or "pm 2.5" in content:
-                words = content.replace("pm2.5", " pm2.5 ").replace("pm 2.5", " pm2.5 ").split()
-                for i, word in enumerate(words):
-                    if "pm2.5" in word:
-                        try:
-                            # Look for numbers near PM2.5 mention
-                            for j in range(max(0, i-2), min(len(words), i+3)):
-                                if words[j].replace(".", "").isdigit():
-                                    pm25_value = float(words[j])
-                                    if 0 <= pm25_value <= 500:  # Reasonable PM2.5 range
-                                        pollution_data["air_quality"]["pm25"] = pm25_value
-                                        break
-                        except (ValueError, IndexError):
-                            continue
-            
-            # Extract health implications
-            if any(word in content for word in ["unhealthy", "hazardous", "moderate", "good"]):
-                if "unhealthy" in content:
-                    pollution_data["health_implications"] = "Air quality is unhealthy for sensitive groups or all people."
-                elif "hazardous" in content:
-                    pollution_data["health_implications"] = "Air quality is hazardous. Everyone should avoid outdoor activities."
-                elif "moderate" in content:
-                    pollution_data["health_implications"] = "Air quality is moderate. Sensitive people should consider limiting outdoor activities."
-                elif "good" in content:
-                    pollution_data["health_implications"] = "Air quality is good. No health concerns."
+            if "aqi" in fields:
+                pollution_data["air_quality"]["aqi"] = fields["aqi"]
+                pollution_data["air_quality"]["category"] = self._get_aqi_category(fields["aqi"])
+            if "pm25" in fields:
+                pollution_data["air_quality"]["pm25"] = fields["pm25"]
+            if "health_implications" in fields:
+                pollution_data["health_implications"] = fields["health_implications"]
         
         # Set data confidence based on how much data we found
         if pollution_data["air_quality"]["aqi"] != 50 or pollution_data["air_quality"]["pm25"] != 12.0:
@@ -145,32 +280,3 @@ class PollutionAgent:
             return "Very Unhealthy"
         else:
             return "Hazardous"
-    
-    def _create_default_pollution_data(self, location: str) -> Dict[str, Any]:
-        """
-        Create default pollution data structure when extraction fails
-        
-        Args:
-            location: Location string
-            
-        Returns:
-            Default pollution data structure
-        """
-        return {
-            "location": location,
-            "air_quality": {
-                "aqi": 50,
-                "pm25": 12.0,
-                "pm10": 20.0,
-                "ozone": 30.0,
-                "category": "Moderate"
-            },
-            "water_quality": {
-                "status": "Unknown",
-                "contaminants": []
-            },
-            "primary_pollutants": ["PM2.5", "Ozone"],
-            "health_implications": "Moderate air quality may cause health effects for sensitive groups.",
-            "sources": ["Traffic", "Industrial activities"],
-            "data_confidence": "Low"
-        }
@@ -4,6 +4,8 @@ import os
 from dotenv import load_dotenv
 import openai
 
+from services.region_resolver import RegionResolver
+
 # Load environment variables
 load_dotenv()
 
@@ -12,14 +14,16 @@ class UrbanPlanningAgent:
     Agent that provides urban planning recommendations based on environmental data
     """
     
-    def __init__(self, tavily_service):
+    def __init__(self, tavily_service, region_resolver: Optional[RegionResolver] = None):
         """
         Initialize the urban planning agent
         
         Args:
             tavily_service: Initialized Tavily service for data retrieval
+            region_resolver: Resolver mapping locations to Indian states and agro-climatic zones
         """
         self.tavily_service = tavily_service
+        self.region_resolver = region_resolver or RegionResolver.load()
         self.openai_client = openai.OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
     
     async def get_risk_zone_analysis(self, location: str, environmental_data: Dict[str, Any]) -> Dict[str, Any]:
@@ -33,7 +37,10 @@ class UrbanPlanningAgent:
         Returns:
             Dictionary containing risk zone analysis
         """
-        # Prepare context for LLM
+        # Prepare context for LLM, with the state and agro-climatic zone of Indian locations
+        region = self.region_resolver.resolve(location)
+        if region is not None:
+            environmental_data = {**environmental_data, "region": region.to_dict()}
         context = json.dumps(environmental_data)
         
         # Prepare prompt for LLM
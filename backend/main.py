@@ -1,9 +1,11 @@
-from fastapi import FastAPI, HTTPException, Depends, Request
+from fastapi import FastAPI, HTTPException, Depends, Request, Header
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import Response, StreamingResponse
 from pydantic import BaseModel
 from typing import Dict, List, Optional, Any
 import os
 import json
+import asyncio
 from dotenv import load_dotenv
 
 # Import services
@@ -12,6 +14,23 @@ from services.mem0_service import Mem0Service
 from services.appwrite_service import AppwriteService
 from services.weather_api import WeatherAPI
 from services.keywordsai_wrapper import KeywordsAIWrapper
+from services.parsing_service import ParsingService
+from services.document_cache import DocumentCache
+from services.source_planner import SourcePlanner, SourceCache, ENVIRONMENTAL_FIELDS
+from services.location_resolver import LocationResolver
+from services.gazetteer import Gazetteer, DEFAULT_GAZETTEER_PATH
+from services.tile_service import TileService
+from services.grid_service import GridStore, DEFAULT_GRID_DIR
+from services.station_store import StationStore
+from services.region_resolver import RegionResolver, DEFAULT_REGIONS_PATH
+from utils.bloom import CountingBloomFilter
+from utils.cluster_index import ClusterIndex
+from utils.byte_ranges import BufferResponse, etag_matches, parse_byte_range, slice_parts
+from services.environmental_data_service import EnvironmentalDataService
+from services import upstream
+from utils.aqi import STANDARDS as AQI_STANDARDS
+from utils.request_scope import RequestScope, ClientDisconnected, request_scope
+from utils.admission import AdmissionController
 
 # Import agents
 from agents.pollution_agent import PollutionAgent
@@ -47,22 +66,168 @@ appwrite_service = AppwriteService(
     project_id=os.getenv("APPWRITE_PROJECT_ID"),
     api_key=os.getenv("APPWRITE_API_KEY")
 )
-weather_api = WeatherAPI(api_key=os.getenv("WEATHER_API_KEY"))
+# Offline place lookup; network geocoding is only used for names it does not know
+try:
+    gazetteer = Gazetteer.load(os.getenv("GAZETTEER_PATH", DEFAULT_GAZETTEER_PATH))
+except (OSError, ValueError) as e:
+    print(f"Error loading gazetteer: {str(e)}")
+    gazetteer = Gazetteer()
+# Place names geocoding recently found nothing for; they fail fast without upstream calls.
+# Counters halve every UNKNOWN_LOCATION_DECAY seconds, so names are retried eventually.
+unknown_locations = CountingBloomFilter(
+    capacity=int(os.getenv("UNKNOWN_LOCATION_CAPACITY", "100000")),
+    decay_interval=float(os.getenv("UNKNOWN_LOCATION_DECAY", "3600"))
+)
+weather_api = WeatherAPI(
+    api_key=os.getenv("WEATHER_API_KEY"), gazetteer=gazetteer, unknown_locations=unknown_locations
+)
 keywords_ai = KeywordsAIWrapper(api_key=os.getenv("KEYWORDS_AI_API_KEY"))
+document_cache = DocumentCache(
+    max_bytes=int(os.getenv("DOCUMENT_CACHE_MAX_BYTES", str(32 * 1024 * 1024))),
+    persist_dir=os.getenv("DOCUMENT_CACHE_DIR"),
+    max_disk_bytes=int(os.getenv("DOCUMENT_CACHE_MAX_DISK_BYTES", str(256 * 1024 * 1024)))
+)
+parsing_service = ParsingService(
+    max_workers=int(os.getenv("PARSER_MAX_WORKERS", "0")) or None,
+    inline_threshold=int(os.getenv("PARSER_INLINE_THRESHOLD", str(16 * 1024))),
+    cache=document_cache
+)
+
+# Coordinates are snapped to geohash cells of this length for caching (5 is roughly 5 x 5 km)
+location_resolver = LocationResolver(
+    precision=int(os.getenv("LOCATION_GEOHASH_PRECISION", "5")), gazetteer=gazetteer
+)
+# Indian states and agro-climatic zones, shared by the farming and urban planning agents
+try:
+    region_resolver = RegionResolver.load(os.getenv("REGIONS_PATH", DEFAULT_REGIONS_PATH), gazetteer=gazetteer)
+except (OSError, ValueError, KeyError) as e:
+    print(f"Error loading regions: {str(e)}")
+    region_resolver = RegionResolver("IN", [], [], gazetteer=gazetteer)
+# Monitoring station readings, aggregated over the requested radius
+station_store = StationStore(max_age=float(os.getenv("STATION_MAX_AGE", str(3 * 3600))))
 
 # Initialize agents
-pollution_agent = PollutionAgent(tavily_service)
+pollution_agent = PollutionAgent(
+    tavily_service, document_cache=document_cache, station_store=station_store, resolver=location_resolver,
+    parsing_service=parsing_service
+)
+source_cache = SourceCache(max_entries=int(os.getenv("SOURCE_CACHE_MAX_ENTRIES", "10000")))
+source_planner = SourcePlanner(source_cache)
+environmental_data_service = EnvironmentalDataService(
+    pollution_agent, weather_api, source_planner, source_cache,
+    resolver=location_resolver, unknown_locations=unknown_locations
+)
 advice_agent = AdviceAgent()
 memory_agent = MemoryAgent(mem0_service)
-# farming_agent = FarmingAgent(tavily_service)  # Temporarily disabled - uses OpenAI
-# urban_planning_agent = UrbanPlanningAgent(tavily_service)  # Temporarily disabled - uses OpenAI
+# farming_agent = FarmingAgent(tavily_service, region_resolver=region_resolver)  # Temporarily disabled - uses OpenAI
+# urban_planning_agent = UrbanPlanningAgent(tavily_service, region_resolver=region_resolver)  # Temporarily disabled - uses OpenAI
 tavily_chat_agent = TavilyChatAgent(tavily_service)
+# Heat-map tiles interpolated from the indexed regions; invalidated as regions change
+tile_service = TileService(appwrite_service)
+# Map clusters of the indexed regions, aggregated by AQI; kept current as regions change
+region_clusters = ClusterIndex(
+    radius_px=float(os.getenv("REGION_CLUSTER_RADIUS_PX", "60")),
+    max_zoom=int(os.getenv("REGION_CLUSTER_MAX_ZOOM", "16"))
+)
+
+def update_region_clusters(previous: Optional[Dict[str, Any]], current: Optional[Dict[str, Any]]):
+    if previous is not None:
+        region_clusters.remove(previous["$id"])
+    if current is not None:
+        aqi = (current.get("air_quality") or {}).get("aqi")
+        if not isinstance(aqi, (int, float)) or isinstance(aqi, bool):
+            aqi = None
+        region_clusters.insert(current["$id"], float(current["lat"]), float(current["lon"]), aqi)
+
+appwrite_service.region_listeners.append(update_region_clusters)
+# Precomputed global float32 grids for the 3D globe, memory-mapped from disk
+grid_store = GridStore(os.getenv("GRID_DIR", DEFAULT_GRID_DIR))
+
+# Default latency budget for /api/environmental-data; unset means wait for every source
+ENVIRONMENTAL_DATA_DEADLINE_MS = int(os.getenv("ENVIRONMENTAL_DATA_DEADLINE_MS", "0")) or None
+
+# Environmental data fields read by the risk engine (UV is read from weather.uv_index)
+RISK_FIELDS = ["air_quality", "uv_index", "pollen_count", "weather"]
+
+# Per-endpoint admission control; limits adapt to observed latency
+admission = AdmissionController(
+    initial_limit=int(os.getenv("ADMISSION_INITIAL_LIMIT", "32")),
+    max_queue=int(os.getenv("ADMISSION_MAX_QUEUE", "64")),
+    queue_timeout=float(os.getenv("ADMISSION_QUEUE_TIMEOUT", "2.0")),
+    overrides={
+        "risk-assessment-batch": {"initial_limit": 4, "max_queue": 8},
+        "advice-batch": {"initial_limit": 4, "max_queue": 8},
+    }
+)
+
+GREETINGS = ['hi', 'hello', 'hey', 'greetings', 'howdy', 'hi there', 'hello there']
+
+# Global cap on concurrent data acquisitions across all batch requests
+batch_semaphore = asyncio.Semaphore(int(os.getenv("BATCH_CONCURRENCY", "8")))
+MAX_BATCH_LOCATIONS = int(os.getenv("MAX_BATCH_LOCATIONS", "500"))
+
+@app.on_event("startup")
+async def load_indexes():
+    await appwrite_service.load_region_index()
+
+@app.on_event("shutdown")
+async def shutdown_services():
+    parsing_service.shutdown()
+
+@app.exception_handler(ClientDisconnected)
+async def client_disconnected_handler(request: Request, exc: ClientDisconnected):
+    # Nobody is listening; 499 mirrors nginx's "client closed request" for the access log
+    return Response(status_code=499)
+
+async def is_greeting(request: Request) -> bool:
+    """Greetings are answered without upstream calls, so they are always admitted"""
+    try:
+        messages = (await request.json()).get("messages") or []
+        last_message = messages[-1]
+        return last_message.get("role") == "user" and last_message.get("content", "").lower().strip() in GREETINGS
+    except Exception:
+        return False
+
+def environmental_cache_hit(fields: Optional[List[str]] = None):
+    """Build a check admitting requests whose environmental data is fully cached"""
+    async def check(request: Request) -> bool:
+        try:
+            location = (await request.json()).get("location")
+            requested = fields or parse_fields(request.query_params.get("fields"))
+            if not location:
+                return False
+            # Locations that recently failed to geocode are answered without upstream calls
+            return (
+                source_planner.is_cached(environmental_data_service.cache_key(location), requested)
+                or environmental_data_service.is_unknown(location)
+            )
+        except Exception:
+            return False
+    return check
 
 # Models
 class LocationQuery(BaseModel):
     location: str
     radius_km: Optional[float] = 5.0
 
+class AirQualityQuery(BaseModel):
+    location: str
+    standard: Optional[str] = "us_epa"  # "us_epa", "india_naqi", "eu_caqi"
+
+class BatchLocationQuery(BaseModel):
+    locations: List[str]
+    radius_km: Optional[float] = 5.0
+
+class StationReading(BaseModel):
+    id: str
+    lat: float
+    lon: float
+    readings: Dict[str, Optional[float]]  # pm2_5, pm10, o3, no2, so2, co in µg/m³
+    observed_at: Optional[float] = None  # Unix time; defaults to when it is received
+
+class StationBatch(BaseModel):
+    stations: List[StationReading]
+
 class ChatMessage(BaseModel):
     role: str
     content: str
@@ -112,65 +277,322 @@ class CopilotResponse(BaseModel):
 async def root():
     return {"message": "Welcome to EcoShield API"}
 
-@app.post("/api/environmental-data")
-async def get_environmental_data(query: LocationQuery):
+def parse_fields(fields: Optional[str]) -> Optional[List[str]]:
+    """
+    Parse a comma-separated fields selector
+    
+    Args:
+        fields: Comma-separated field names or None
+        
+    Returns:
+        List of field names or None for all fields
+    """
+    if not fields:
+        return None
+    selected = [field.strip() for field in fields.split(",") if field.strip()]
+    unknown = [field for field in selected if field not in ENVIRONMENTAL_FIELDS]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(unknown)}")
+    return selected
+
+@app.post("/api/environmental-data", dependencies=[admission.admit("environmental-data", cheap=environmental_cache_hit(), priority="interactive")])
+async def get_environmental_data(
+    query: LocationQuery,
+    fields: Optional[str] = None,
+    deadline_ms: Optional[int] = None,
+    x_deadline_ms: Optional[int] = Header(None),
+    scope: RequestScope = Depends(request_scope)
+):
+    # The query parameter wins over the header, which wins over the server-wide SLO
+    if deadline_ms is None:
+        deadline_ms = x_deadline_ms if x_deadline_ms is not None else ENVIRONMENTAL_DATA_DEADLINE_MS
+    if deadline_ms is not None and deadline_ms <= 0:
+        raise HTTPException(status_code=400, detail="Deadline must be positive")
+    deadline = deadline_ms / 1000 if deadline_ms is not None else None
+    return await scope.run(fetch_environmental_data(query, parse_fields(fields), deadline))
+
+async def fetch_environmental_data(
+    query: LocationQuery,
+    fields: Optional[List[str]] = None,
+    deadline: Optional[float] = None
+):
     try:
         # Track with Keywords AI
         with keywords_ai.trace("get_environmental_data"):
-            # Get pollution data from Tavily through the agent
-            pollution_data = await pollution_agent.get_pollution_data(query.location, query.radius_km)
-            
-            # Get weather data
-            weather_data = await weather_api.get_weather(query.location)
-            
-            # Combine data
-            result = {
-                "location": query.location,
-                "air_quality": pollution_data.get("air_quality", {}),
-                "water_quality": pollution_data.get("water_quality", {}),
-                "uv_index": weather_data.get("uv_index"),
-                "pollen_count": weather_data.get("pollen_count", {}),
-                "weather": weather_data,
-                "timestamp": weather_data.get("timestamp")
-            }
+            # Known places requested often rank higher in autocomplete
+            gazetteer.record_request(query.location)
+            # Only the cheapest set of upstream calls that covers the requested fields is made;
+            # with a deadline, sources still outstanding are reported under "missing"
+            result = await environmental_data_service.get_environmental_data(
+                query.location, query.radius_km, fields=fields, deadline=deadline
+            )
             
             return result
     except Exception as e:
         keywords_ai.log_error(str(e))
         raise HTTPException(status_code=500, detail=f"Error fetching environmental data: {str(e)}")
 
-@app.post("/api/risk-assessment")
-async def get_risk_assessment(query: LocationQuery):
+@app.get("/api/locations/autocomplete")
+async def autocomplete_locations(q: str, limit: int = 10):
+    # Served from the in-memory gazetteer trie; nothing is sent upstream per keystroke.
+    # Clients submit the label, which resolves to the canonical ID without geocoding.
+    places = gazetteer.complete(q, max(1, min(limit, 10)))
+    return {
+        "query": q,
+        "results": [
+            {
+                "id": location_resolver.location_id(place.lat, place.lon),
+                "label": gazetteer.label(place),
+                **place.to_dict()
+            }
+            for place in places
+        ]
+    }
+
+@app.get("/api/locations/reverse")
+async def reverse_geocode(lat: float, lon: float, max_distance_km: float = 50.0):
+    place = gazetteer.reverse(lat, lon, max_distance_km)
+    if place is None:
+        raise HTTPException(status_code=404, detail="No known place near these coordinates")
+    return place
+
+@app.get("/api/locations/region")
+async def resolve_region(location: str):
+    # Accepts "lat,lon" or a name; answered from the bundled state polygons
+    region = region_resolver.resolve(location)
+    if region is None:
+        raise HTTPException(status_code=404, detail="Location is not in a known region")
+    return {"location": location, **region.to_dict()}
+
+@app.get("/api/regions/clusters")
+async def get_region_clusters(bbox: str, zoom: float):
+    try:
+        west, south, east, north = (float(value) for value in bbox.split(","))
+    except ValueError:
+        raise HTTPException(status_code=400, detail="bbox must be west,south,east,north")
+    if not (-90 <= south <= north <= 90 and -180 <= west <= 180 and -180 <= east <= 180):
+        raise HTTPException(status_code=400, detail="bbox is out of range")
+
+    clusters = []
+    for cluster in region_clusters.clusters(west, south, east, north, zoom):
+        cluster["mean_aqi"] = cluster.pop("mean_value")
+        cluster["max_aqi"] = cluster.pop("max_value")
+        if not cluster["cluster"]:
+            cluster["name"] = appwrite_service.regions.get(cluster["id"], {}).get("name")
+        clusters.append(cluster)
+    return {"zoom": zoom, "count": len(clusters), "clusters": clusters}
+
+@app.post("/api/stations", dependencies=[admission.admit("stations")])
+async def ingest_stations(batch: StationBatch):
+    try:
+        count = station_store.upsert_many(station.model_dump() for station in batch.stations)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"stored": count, "stations": len(station_store)}
+
+@app.get("/api/stations/aggregate")
+async def aggregate_stations(lat: float, lon: float, radius_km: float = 5.0):
+    if radius_km <= 0:
+        raise HTTPException(status_code=400, detail="radius_km must be positive")
+    aggregate = station_store.aggregate(lat, lon, radius_km)
+    if aggregate is None:
+        raise HTTPException(status_code=404, detail="No recent station readings within the radius")
+    return aggregate
+
+@app.get("/api/stations/stats")
+async def get_station_stats():
+    return station_store.stats()
+
+@app.get("/api/grids")
+async def list_grids():
+    return {"grids": grid_store.available()}
+
+@app.get("/api/grids/{layer}")
+async def get_grid(
+    layer: str,
+    range_header: Optional[str] = Header(None, alias="Range"),
+    if_none_match: Optional[str] = Header(None),
+    if_range: Optional[str] = Header(None)
+):
+    try:
+        grid = grid_store.get(layer)
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    if grid is None:
+        raise HTTPException(status_code=404, detail=f"No grid has been built for {layer}")
+
+    headers = {"ETag": grid.etag, "Accept-Ranges": "bytes", "Cache-Control": "public, max-age=300"}
+    if etag_matches(if_none_match, grid.etag):
+        return Response(status_code=304, headers=headers)
+
+    parts = [grid.header, grid.data]
+    # A stale If-Range means the client's partial copy is outdated: send everything
+    byte_range = None
+    if not if_range or if_range == grid.etag:
+        try:
+            byte_range = parse_byte_range(range_header, grid.size)
+        except ValueError:
+            return Response(status_code=416, headers={**headers, "Content-Range": f"bytes */{grid.size}"})
+    if byte_range is None:
+        return BufferResponse(parts, headers=headers, media_type="application/octet-stream")
+
+    start, end = byte_range
+    headers["Content-Range"] = f"bytes {start}-{end - 1}/{grid.size}"
+    return BufferResponse(
+        slice_parts(parts, start, end), status_code=206, headers=headers, media_type="application/octet-stream"
+    )
+
+@app.get("/api/tiles/stats")
+async def get_tile_stats():
+    return tile_service.stats()
+
+@app.get("/api/tiles/{layer}/{z}/{x}/{y}")
+async def get_tile(layer: str, z: int, x: int, y: int):
+    try:
+        tile = await tile_service.get_tile(layer, z, x, y)
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    return Response(content=tile, media_type="image/png", headers={"Cache-Control": "public, max-age=60"})
+
+@app.get("/api/locations/unknown/stats")
+async def get_unknown_location_stats():
+    return unknown_locations.stats()
+
+@app.get("/api/admission/stats")
+async def get_admission_stats():
+    return admission.stats()
+
+@app.get("/api/upstream/stats")
+async def get_upstream_stats():
+    return upstream.stats()
+
+@app.get("/api/planner/stats")
+async def get_planner_stats():
+    return source_planner.stats()
+
+@app.post("/api/air-quality", dependencies=[admission.admit("air-quality", priority="interactive")])
+async def get_air_quality(query: AirQualityQuery):
+    if query.standard not in AQI_STANDARDS:
+        raise HTTPException(status_code=400, detail=f"Unknown AQI standard: {query.standard}")
+    try:
+        # AQI is computed locally from OpenWeather components; no Tavily search needed
+        with keywords_ai.trace("get_air_quality"):
+            gazetteer.record_request(query.location)
+            return await weather_api.get_air_quality(query.location, query.standard)
+    except Exception as e:
+        keywords_ai.log_error(str(e))
+        raise HTTPException(status_code=500, detail=f"Error fetching air quality: {str(e)}")
+
+@app.post("/api/risk-assessment", dependencies=[admission.admit("risk-assessment", cheap=environmental_cache_hit(RISK_FIELDS), priority="interactive")])
+async def get_risk_assessment(query: LocationQuery, scope: RequestScope = Depends(request_scope)):
     try:
         # Get environmental data first
-        env_data = await get_environmental_data(query)
+        env_data = await scope.run(fetch_environmental_data(query, RISK_FIELDS))
         
         # Use advice agent to generate risk assessment
         with keywords_ai.trace("generate_risk_assessment"):
-            risk_assessment = await advice_agent.generate_risk_assessment(env_data)
+            risk_assessment = await advice_agent.generate_risk_assessment_json(env_data)
             
-        return risk_assessment
+        return Response(content=risk_assessment, media_type="application/json")
+    except ClientDisconnected:
+        raise
     except Exception as e:
         keywords_ai.log_error(str(e))
         raise HTTPException(status_code=500, detail=f"Error generating risk assessment: {str(e)}")
 
-@app.post("/api/advice")
-async def get_advice(query: LocationQuery):
+@app.post("/api/advice", dependencies=[admission.admit("advice", cheap=environmental_cache_hit(RISK_FIELDS), priority="interactive")])
+async def get_advice(query: LocationQuery, scope: RequestScope = Depends(request_scope)):
     try:
         # Get environmental data first
-        env_data = await get_environmental_data(query)
+        env_data = await scope.run(fetch_environmental_data(query, RISK_FIELDS))
         
         # Use advice agent to generate advice
         with keywords_ai.trace("generate_advice"):
-            advice = await advice_agent.generate_advice(env_data)
+            advice = await advice_agent.generate_advice_json(env_data)
             
-        return advice
+        return Response(content=advice, media_type="application/json")
+    except ClientDisconnected:
+        raise
     except Exception as e:
         keywords_ai.log_error(str(e))
         raise HTTPException(status_code=500, detail=f"Error generating advice: {str(e)}")
 
-@app.post("/chat")
-async def chat(request: ChatRequest):
+async def stream_batch_results(query: BatchLocationQuery, evaluate):
+    """
+    Acquire environmental data for many locations and stream NDJSON rows
+    
+    Acquisitions run concurrently under batch_semaphore. Whenever some of
+    them finish, everything completed so far is evaluated together in one
+    vectorised call and written out, so early rows are not held back by
+    slow locations.
+    
+    Args:
+        query: Batch query
+        evaluate: Async function mapping a list of environmental data to JSON-encoded results
+        
+    Returns:
+        Async iterator over NDJSON lines
+    """
+    completed = asyncio.Queue()
+    
+    async def acquire(index: int, location: str):
+        async with batch_semaphore:
+            try:
+                env_data = await fetch_environmental_data(
+                    LocationQuery(location=location, radius_km=query.radius_km), RISK_FIELDS
+                )
+                await completed.put((index, location, env_data, None))
+            except Exception as e:
+                error = e.detail if isinstance(e, HTTPException) else str(e)
+                await completed.put((index, location, None, error))
+    
+    tasks = [asyncio.create_task(acquire(index, location)) for index, location in enumerate(query.locations)]
+    remaining = len(tasks)
+    
+    try:
+        while remaining:
+            finished = [await completed.get()]
+            while not completed.empty():
+                finished.append(completed.get_nowait())
+            remaining -= len(finished)
+            
+            succeeded = [item for item in finished if item[3] is None]
+            results = await evaluate([item[2] for item in succeeded]) if succeeded else []
+            
+            # Results are already serialised, so splice them into the row
+            for (index, location, _, _), result in zip(succeeded, results):
+                yield b'{"index": %d, "location": %s, "result": %s}\n' % (index, json.dumps(location).encode("utf-8"), result)
+            for index, location, _, error in finished:
+                if error is not None:
+                    yield (json.dumps({"index": index, "location": location, "error": error}) + "\n").encode("utf-8")
+    finally:
+        for task in tasks:
+            task.cancel()
+
+def validate_batch(query: BatchLocationQuery):
+    if not query.locations:
+        raise HTTPException(status_code=400, detail="At least one location is required")
+    if len(query.locations) > MAX_BATCH_LOCATIONS:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_BATCH_LOCATIONS} locations are allowed per batch")
+
+@app.post("/api/risk-assessment/batch", dependencies=[admission.admit("risk-assessment-batch")])
+async def get_risk_assessment_batch(query: BatchLocationQuery):
+    validate_batch(query)
+    return StreamingResponse(
+        stream_batch_results(query, advice_agent.generate_risk_assessments_json),
+        media_type="application/x-ndjson"
+    )
+
+@app.post("/api/advice/batch", dependencies=[admission.admit("advice-batch")])
+async def get_advice_batch(query: BatchLocationQuery):
+    validate_batch(query)
+    return StreamingResponse(
+        stream_batch_results(query, advice_agent.generate_advice_batch_json),
+        media_type="application/x-ndjson"
+    )
+
+@app.post("/chat", dependencies=[admission.admit("chat", cheap=is_greeting, priority="interactive")])
+async def chat(request: ChatRequest, scope: RequestScope = Depends(request_scope)):
     try:
         print(f"Received chat request with message: {request.messages[-1].content if request.messages else 'No message'}")
         with keywords_ai.trace("chat_request"):
@@ -179,24 +601,26 @@ async def chat(request: ChatRequest):
                 last_message = request.messages[-1]
                 if last_message.role == "user":
                     user_text = last_message.content.lower().strip()
-                    if user_text in ['hi', 'hello', 'hey', 'greetings', 'howdy', 'hi there', 'hello there']:
+                    if user_text in GREETINGS:
                         print("Detected greeting, sending quick response")
                         return {"response": "Hello! I'm your environmental assistant. How can I help you today? You can ask me about air quality, weather conditions, environmental risks, or farming advice."}
             
             # Store context in memory if user_id is provided
             if request.user_id and request.location:
-                await memory_agent.store_context(
+                await scope.run(memory_agent.store_context(
                     user_id=request.user_id,
                     location=request.location,
                     messages=request.messages
-                )
+                ))
             
             # Get environmental data if location is provided
             env_context = None
             if request.location:
                 try:
-                    env_data = await get_environmental_data(LocationQuery(location=request.location))
+                    env_data = await scope.run(fetch_environmental_data(LocationQuery(location=request.location)))
                     env_context = json.dumps(env_data)
+                except ClientDisconnected:
+                    raise
                 except Exception as e:
                     print(f"Error getting environmental data: {str(e)}")
                     # Continue without environmental data
@@ -205,7 +629,9 @@ async def chat(request: ChatRequest):
             prev_context = None
             if request.user_id:
                 try:
-                    prev_context = await memory_agent.retrieve_context(request.user_id)
+                    prev_context = await scope.run(memory_agent.retrieve_context(request.user_id))
+                except ClientDisconnected:
+                    raise
                 except Exception as e:
                     print(f"Error retrieving context: {str(e)}")
                     # Continue without previous context
@@ -213,14 +639,16 @@ async def chat(request: ChatRequest):
             # Generate response using Tavily chat agent instead of advice agent
             try:
                 print(f"Generating chat response for query: {request.messages[-1].content if request.messages else 'No message'}")
-                response = await tavily_chat_agent.generate_chat_response(
+                response = await scope.run(tavily_chat_agent.generate_chat_response(
                     messages=request.messages,
                     environmental_context=env_context,
                     previous_context=prev_context,
                     user_type=request.user_type
-                )
+                ))
                 print(f"Generated response: {response[:100]}...")
                 return {"response": response}
+            except ClientDisconnected:
+                raise
             except Exception as e:
                 print(f"Error in chat response generation: {str(e)}")
                 # Get the user's query
@@ -245,6 +673,8 @@ async def chat(request: ChatRequest):
                 
                 else:
                     return {"response": "Environmental science covers many interconnected topics including air and water quality, climate patterns, biodiversity, ecosystem health, and human impacts on natural systems. Environmental conditions affect human health, agriculture, infrastructure, and natural habitats. Sustainable practices and policies aim to balance human needs with environmental protection for current and future generations."}
+    except ClientDisconnected:
+        raise
     except Exception as e:
         keywords_ai.log_error(str(e))
         print(f"Chat request error: {str(e)}")
@@ -277,8 +707,8 @@ async def chat(request: ChatRequest):
             return {"response": "I'm sorry, I encountered an error while processing your request. Please try again with a different question about environmental topics."}
 
 # CopilotKit endpoint
-@app.post("/api/copilot")
-async def copilot_endpoint(request: CopilotRequest):
+@app.post("/api/copilot", dependencies=[admission.admit("copilot", cheap=is_greeting, priority="interactive")])
+async def copilot_endpoint(request: CopilotRequest, scope: RequestScope = Depends(request_scope)):
     try:
         print(f"Received CopilotKit request with message: {request.messages[-1].content if request.messages else 'No message'}")
         
@@ -291,7 +721,8 @@ async def copilot_endpoint(request: CopilotRequest):
             try:
                 location_data = json.loads(request.context["userLocation"])
                 if isinstance(location_data, dict) and "lat" in location_data and "lng" in location_data:
-                    location = f"{location_data['lat']},{location_data['lng']}"
+                    # Snapped so nearby users share cached upstream results
+                    location = location_resolver.snap(float(location_data['lat']), float(location_data['lng']))
             except:
                 pass
         
@@ -306,7 +737,7 @@ async def copilot_endpoint(request: CopilotRequest):
         )
         
         # Use the existing chat endpoint logic
-        chat_response = await chat(chat_req)
+        chat_response = await chat(chat_req, scope)
         
         # Format response for CopilotKit
         response = CopilotResponse(
@@ -315,13 +746,15 @@ async def copilot_endpoint(request: CopilotRequest):
         )
         
         return response
+    except ClientDisconnected:
+        raise
     except Exception as e:
         print(f"CopilotKit request error: {str(e)}")
         return CopilotResponse(
             content="I'm sorry, I encountered an error while processing your request. Please try again later.",
             tool_calls=[]
         )
-@app.post("/api/farming/crop-recommendations")
+@app.post("/api/farming/crop-recommendations", dependencies=[admission.admit("farming-crop-recommendations")])
 async def get_crop_recommendations(query: CropQuery):
     try:
         with keywords_ai.trace("get_crop_recommendations"):
@@ -334,25 +767,27 @@ async def get_crop_recommendations(query: CropQuery):
         keywords_ai.log_error(str(e))
         raise HTTPException(status_code=500, detail=f"Error getting crop recommendations: {str(e)}")
 
-@app.post("/api/farming/irrigation-advice")
-async def get_irrigation_advice(query: LocationQuery):
+@app.post("/api/farming/irrigation-advice", dependencies=[admission.admit("farming-irrigation-advice")])
+async def get_irrigation_advice(query: LocationQuery, scope: RequestScope = Depends(request_scope)):
     try:
         # Get environmental data first
-        env_data = await get_environmental_data(query)
+        env_data = await scope.run(fetch_environmental_data(query))
         
         # Use farming agent to generate irrigation advice
         with keywords_ai.trace("generate_irrigation_advice"):
-            advice = await farming_agent.get_irrigation_advice(
+            advice = await scope.run(farming_agent.get_irrigation_advice(
                 location=query.location,
                 environmental_data=env_data
-            )
+            ))
             
         return advice
+    except ClientDisconnected:
+        raise
     except Exception as e:
         keywords_ai.log_error(str(e))
         raise HTTPException(status_code=500, detail=f"Error generating irrigation advice: {str(e)}")
 
-@app.post("/api/farming/pest-management")
+@app.post("/api/farming/pest-management", dependencies=[admission.admit("farming-pest-management")])
 async def get_pest_management(query: PestManagementQuery):
     try:
         with keywords_ai.trace("get_pest_management"):
@@ -366,25 +801,27 @@ async def get_pest_management(query: PestManagementQuery):
         raise HTTPException(status_code=500, detail=f"Error getting pest management advice: {str(e)}")
 
 # Urban planning endpoints
-@app.post("/api/urban-planning/risk-zones")
-async def get_risk_zone_analysis(query: LocationQuery):
+@app.post("/api/urban-planning/risk-zones", dependencies=[admission.admit("urban-planning-risk-zones")])
+async def get_risk_zone_analysis(query: LocationQuery, scope: RequestScope = Depends(request_scope)):
     try:
         # Get environmental data first
-        env_data = await get_environmental_data(query)
+        env_data = await scope.run(fetch_environmental_data(query))
         
         # Use urban planning agent to analyze risk zones
         with keywords_ai.trace("analyze_risk_zones"):
-            analysis = await urban_planning_agent.get_risk_zone_analysis(
+            analysis = await scope.run(urban_planning_agent.get_risk_zone_analysis(
                 location=query.location,
                 environmental_data=env_data
-            )
+            ))
             
         return analysis
+    except ClientDisconnected:
+        raise
     except Exception as e:
         keywords_ai.log_error(str(e))
         raise HTTPException(status_code=500, detail=f"Error analyzing risk zones: {str(e)}")
 
-@app.post("/api/urban-planning/green-infrastructure")
+@app.post("/api/urban-planning/green-infrastructure", dependencies=[admission.admit("urban-planning-green-infrastructure")])
 async def get_green_infrastructure(query: LocationQuery):
     try:
         with keywords_ai.trace("get_green_infrastructure"):
@@ -396,7 +833,7 @@ async def get_green_infrastructure(query: LocationQuery):
         keywords_ai.log_error(str(e))
         raise HTTPException(status_code=500, detail=f"Error getting green infrastructure recommendations: {str(e)}")
 
-@app.post("/api/urban-planning/pollution-trends")
+@app.post("/api/urban-planning/pollution-trends", dependencies=[admission.admit("urban-planning-pollution-trends")])
 async def analyze_pollution_trends(query: LocationQuery):
     try:
         # Get historical data from memory agent
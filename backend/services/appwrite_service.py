@@ -1,9 +1,13 @@
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, List, Optional, Callable
 from appwrite.client import Client
 from appwrite.services.databases import Databases
 from appwrite.services.users import Users
 from appwrite.query import Query
 
+from services import upstream
+from utils.geo import parse_coordinates
+from utils.spatial_index import SpatialIndex
+
 class AppwriteService:
     """
     Service for interacting with Appwrite for user management and data storage
@@ -32,6 +36,47 @@ class AppwriteService:
         self.regions_collection_id = "regions"
         self.user_preferences_collection_id = "user_preferences"
         self.logs_collection_id = "logs"
+        
+        # In-process spatial index over region documents, filled by load_region_index()
+        self.region_index = SpatialIndex()
+        self.regions: Dict[str, Dict[str, Any]] = {}
+        self.region_index_loaded = False
+        # Called with (previous, current) region documents whenever an indexed region changes
+        self.region_listeners: List[Callable[[Optional[Dict[str, Any]], Optional[Dict[str, Any]]], None]] = []
+    
+    async def load_region_index(self, page_size: int = 100) -> int:
+        """
+        Load every region document into the spatial index
+        
+        Args:
+            page_size: Number of documents fetched per request
+            
+        Returns:
+            Number of indexed regions
+        """
+        try:
+            offset = 0
+            while True:
+                page = await upstream.call_sync(
+                    "appwrite", self.databases.list_documents,
+                    database_id=self.database_id,
+                    collection_id=self.regions_collection_id,
+                    queries=[
+                        Query.limit(page_size),
+                        Query.offset(offset)
+                    ]
+                )
+                documents = page.get("documents", [])
+                for document in documents:
+                    self._index_region(document)
+                offset += len(documents)
+                if len(documents) < page_size:
+                    break
+            self.region_index_loaded = True
+            print(f"Indexed {len(self.region_index)} regions")
+        except Exception as e:
+            print(f"Error loading region index: {str(e)}")
+        return len(self.region_index)
     
     async def get_user(self, user_id: str) -> Dict[str, Any]:
         """
@@ -44,7 +89,7 @@ class AppwriteService:
             User data dictionary
         """
         try:
-            return self.users.get(user_id)
+            return await upstream.call_sync("appwrite", self.users.get, user_id)
         except Exception as e:
             print(f"Error getting user: {str(e)}")
             return {"error": str(e)}
@@ -62,7 +107,8 @@ class AppwriteService:
             Created user data
         """
         try:
-            return self.users.create(
+            return await upstream.call_sync(
+                "appwrite", self.users.create,
                 user_id="unique()",
                 email=email,
                 password=password,
@@ -83,7 +129,8 @@ class AppwriteService:
             Region data dictionary
         """
         try:
-            return self.databases.get_document(
+            return await upstream.call_sync(
+                "appwrite", self.databases.get_document,
                 database_id=self.database_id,
                 collection_id=self.regions_collection_id,
                 document_id=region_id
@@ -103,20 +150,46 @@ class AppwriteService:
         Returns:
             List of region data dictionaries
         """
+        if self.region_index_loaded:
+            center = self._resolve_region_location(location)
+            if center is not None:
+                return [
+                    {**self.regions[region_id], "distance_km": round(distance, 3)}
+                    for region_id, distance in self.region_index.within_radius(center[0], center[1], radius_km)
+                ]
+        
         try:
-            # This is a simplified implementation
-            # In a real app, you would parse the location and use geospatial queries
-            return self.databases.list_documents(
+            # Location could not be resolved (or the index is unavailable); return any regions
+            return (await upstream.call_sync(
+                "appwrite", self.databases.list_documents,
                 database_id=self.database_id,
                 collection_id=self.regions_collection_id,
                 queries=[
                     Query.limit(10)
                 ]
-            ).get("documents", [])
+            )).get("documents", [])
         except Exception as e:
             print(f"Error searching regions: {str(e)}")
             return []
     
+    def nearest_regions(self, lat: float, lon: float, k: int = 5, max_radius_km: Optional[float] = None) -> List[Dict[str, Any]]:
+        """
+        Find the regions closest to a point
+        
+        Args:
+            lat: Latitude
+            lon: Longitude
+            k: Number of regions to return
+            max_radius_km: Optional maximum distance in kilometers
+            
+        Returns:
+            List of region data dictionaries with distance_km, nearest first
+        """
+        return [
+            {**self.regions[region_id], "distance_km": round(distance, 3)}
+            for region_id, distance in self.region_index.nearest(lat, lon, k, max_radius_km)
+        ]
+    
     async def create_region(self, region_data: Dict[str, Any]) -> Dict[str, Any]:
         """
         Create a new region
@@ -128,12 +201,15 @@ class AppwriteService:
             Created region data
         """
         try:
-            return self.databases.create_document(
+            region = await upstream.call_sync(
+                "appwrite", self.databases.create_document,
                 database_id=self.database_id,
                 collection_id=self.regions_collection_id,
                 document_id="unique()",
                 data=region_data
             )
+            self._index_region(region)
+            return region
         except Exception as e:
             print(f"Error creating region: {str(e)}")
             return {"error": str(e)}
@@ -150,12 +226,15 @@ class AppwriteService:
             Updated region data
         """
         try:
-            return self.databases.update_document(
+            region = await upstream.call_sync(
+                "appwrite", self.databases.update_document,
                 database_id=self.database_id,
                 collection_id=self.regions_collection_id,
                 document_id=region_id,
                 data=region_data
             )
+            self._index_region(region)
+            return region
         except Exception as e:
             print(f"Error updating region: {str(e)}")
             return {"error": str(e)}
@@ -171,13 +250,14 @@ class AppwriteService:
             User preferences dictionary
         """
         try:
-            return self.databases.list_documents(
+            return (await upstream.call_sync(
+                "appwrite", self.databases.list_documents,
                 database_id=self.database_id,
                 collection_id=self.user_preferences_collection_id,
                 queries=[
                     Query.equal("user_id", user_id)
                 ]
-            ).get("documents", [{}])[0]
+            )).get("documents", [{}])[0]
         except Exception as e:
             print(f"Error getting user preferences: {str(e)}")
             return {}
@@ -199,7 +279,8 @@ class AppwriteService:
             
             if "error" in existing_prefs or not existing_prefs:
                 # Create new preferences document
-                return self.databases.create_document(
+                return await upstream.call_sync(
+                    "appwrite", self.databases.create_document,
                     database_id=self.database_id,
                     collection_id=self.user_preferences_collection_id,
                     document_id="unique()",
@@ -210,7 +291,8 @@ class AppwriteService:
                 )
             else:
                 # Update existing preferences
-                return self.databases.update_document(
+                return await upstream.call_sync(
+                    "appwrite", self.databases.update_document,
                     database_id=self.database_id,
                     collection_id=self.user_preferences_collection_id,
                     document_id=existing_prefs.get("$id"),
@@ -232,7 +314,8 @@ class AppwriteService:
             Created log entry
         """
         try:
-            return self.databases.create_document(
+            return await upstream.call_sync(
+                "appwrite", self.databases.create_document,
                 database_id=self.database_id,
                 collection_id=self.logs_collection_id,
                 document_id="unique()",
@@ -245,3 +328,49 @@ class AppwriteService:
         except Exception as e:
             print(f"Error logging event: {str(e)}")
             return {"error": str(e)}
+    
+    def _index_region(self, region: Dict[str, Any]) -> None:
+        """
+        Add or move a region document in the spatial index
+        
+        Args:
+            region: Region document as returned by Appwrite
+        """
+        region_id = region.get("$id")
+        if region_id is None:
+            return
+        previous = self.regions.get(region_id)
+        try:
+            lat, lon = float(region["lat"]), float(region["lon"])
+        except (KeyError, TypeError, ValueError):
+            # Without coordinates the region cannot be found spatially
+            self.region_index.remove(region_id)
+            self.regions.pop(region_id, None)
+            region = None
+        else:
+            self.regions[region_id] = region
+            self.region_index.insert(region_id, lat, lon)
+        for listener in self.region_listeners:
+            try:
+                listener(previous, region)
+            except Exception as e:
+                print(f"Error notifying region listener: {str(e)}")
+    
+    def _resolve_region_location(self, location: str) -> Optional[tuple]:
+        """
+        Turn a location string into coordinates using "lat,lon" or a region name
+        
+        Args:
+            location: Location string or coordinates
+            
+        Returns:
+            (lat, lon) tuple or None if it cannot be resolved
+        """
+        coordinates = parse_coordinates(location)
+        if coordinates is not None:
+            return coordinates
+        name = location.strip().lower()
+        for region in self.regions.values():
+            if str(region.get("name", "")).lower() == name:
+                return float(region["lat"]), float(region["lon"])
+        return None
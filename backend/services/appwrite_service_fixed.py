@@ -2,6 +2,8 @@ from typing import Dict, Any, List, Optional
 import requests
 import uuid
 
+from services import upstream
+
 class AppwriteService:
     """
     Service for interacting with Appwrite for user management and data storage
@@ -49,7 +51,8 @@ class AppwriteService:
             User data dictionary
         """
         try:
-            response = requests.get(
+            response = await upstream.call_sync(
+                "appwrite", requests.get,
                 f"{self.endpoint}/users/{user_id}",
                 headers=self.headers
             )
@@ -75,7 +78,8 @@ class AppwriteService:
             Created user data
         """
         try:
-            response = requests.post(
+            response = await upstream.call_sync(
+                "appwrite", requests.post,
                 f"{self.endpoint}/users",
                 headers=self.headers,
                 json={
@@ -105,7 +109,8 @@ class AppwriteService:
             Region data dictionary
         """
         try:
-            response = requests.get(
+            response = await upstream.call_sync(
+                "appwrite", requests.get,
                 f"{self.endpoint}/databases/{self.database_id}/collections/{self.regions_collection_id}/documents/{region_id}",
                 headers=self.headers
             )
@@ -132,7 +137,8 @@ class AppwriteService:
         try:
             # This is a simplified implementation
             # In a real app, you would parse the location and use geospatial queries
-            response = requests.get(
+            response = await upstream.call_sync(
+                "appwrite", requests.get,
                 f"{self.endpoint}/databases/{self.database_id}/collections/{self.regions_collection_id}/documents",
                 headers=self.headers,
                 params={
@@ -162,7 +168,8 @@ class AppwriteService:
         try:
             document_id = str(uuid.uuid4())
             
-            response = requests.post(
+            response = await upstream.call_sync(
+                "appwrite", requests.post,
                 f"{self.endpoint}/databases/{self.database_id}/collections/{self.regions_collection_id}/documents",
                 headers=self.headers,
                 json={
@@ -191,7 +198,8 @@ class AppwriteService:
             Updated region data
         """
         try:
-            response = requests.patch(
+            response = await upstream.call_sync(
+                "appwrite", requests.patch,
                 f"{self.endpoint}/databases/{self.database_id}/collections/{self.regions_collection_id}/documents/{region_id}",
                 headers=self.headers,
                 json={
@@ -218,7 +226,8 @@ class AppwriteService:
             User preferences dictionary
         """
         try:
-            response = requests.get(
+            response = await upstream.call_sync(
+                "appwrite", requests.get,
                 f"{self.endpoint}/databases/{self.database_id}/collections/{self.user_preferences_collection_id}/documents",
                 headers=self.headers,
                 params={
@@ -254,7 +263,8 @@ class AppwriteService:
                 # Create new preferences document
                 document_id = str(uuid.uuid4())
                 
-                response = requests.post(
+                response = await upstream.call_sync(
+                    "appwrite", requests.post,
                     f"{self.endpoint}/databases/{self.database_id}/collections/{self.user_preferences_collection_id}/documents",
                     headers=self.headers,
                     json={
@@ -274,7 +284,8 @@ class AppwriteService:
                 # Update existing preferences
                 document_id = existing_prefs.get("$id")
                 
-                response = requests.patch(
+                response = await upstream.call_sync(
+                    "appwrite", requests.patch,
                     f"{self.endpoint}/databases/{self.database_id}/collections/{self.user_preferences_collection_id}/documents/{document_id}",
                     headers=self.headers,
                     json={
@@ -304,7 +315,8 @@ class AppwriteService:
         try:
             document_id = str(uuid.uuid4())
             
-            response = requests.post(
+            response = await upstream.call_sync(
+                "appwrite", requests.post,
                 f"{self.endpoint}/databases/{self.database_id}/collections/{self.logs_collection_id}/documents",
                 headers=self.headers,
                 json={
@@ -0,0 +1,260 @@
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+from typing import Dict, Any, Callable, Optional, Tuple
+
+try:
+    import xxhash
+except ImportError:  # Optional dependency; blake2b is always available
+    xxhash = None
+
+
+def content_hash(content: str) -> str:
+    """
+    Compute a fast, collision-resistant hash of document content
+
+    Args:
+        content: Document content
+
+    Returns:
+        Hex digest (xxh3-128 if xxhash is installed, otherwise blake2b-128)
+    """
+    data = content.encode("utf-8", errors="surrogatepass")
+    if xxhash is not None:
+        return xxhash.xxh3_128_hexdigest(data)
+    return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+
+class DocumentCache:
+    """
+    Cache of structured fields extracted from documents, keyed on a hash of
+    the document content, the extraction operation and the parser version
+
+    Identical pages returned for different searches are only parsed once.
+    Entries are evicted least-recently-used once the byte budget is
+    exceeded, and can optionally be persisted to disk to survive restarts.
+    Persisted files have their own, larger budget and are deleted
+    least-recently-used when it is exceeded.
+    """
+
+    def __init__(
+        self,
+        max_bytes: int = 32 * 1024 * 1024,
+        persist_dir: Optional[str] = None,
+        max_disk_bytes: int = 256 * 1024 * 1024
+    ):
+        """
+        Initialize the document cache
+
+        Args:
+            max_bytes: In-memory budget for serialised entries
+            persist_dir: Optional directory for on-disk persistence
+            max_disk_bytes: Budget for the files in persist_dir
+        """
+        self.max_bytes = max_bytes
+        self.persist_dir = persist_dir
+        self.max_disk_bytes = max_disk_bytes
+        self._entries: "OrderedDict[str, Tuple[Any, int]]" = OrderedDict()
+        self._size = 0
+        # Persisted keys and their file sizes, least recently used first
+        self._files: "OrderedDict[str, int]" = OrderedDict()
+        self._disk_size = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.disk_evictions = 0
+
+        if persist_dir:
+            os.makedirs(persist_dir, exist_ok=True)
+            self._scan_files()
+
+    def make_key(self, content: str, operation: str, version: str) -> str:
+        """
+        Build the cache key for a document
+
+        Args:
+            content: Document content
+            operation: Name of the extraction operation
+            version: Version of the extraction code
+
+        Returns:
+            Cache key string
+        """
+        return f"{operation}-{version}-{content_hash(content)}"
+
+    def get(self, content: str, operation: str, version: str) -> Optional[Any]:
+        """
+        Look up the extracted fields for a document
+
+        Args:
+            content: Document content
+            operation: Name of the extraction operation
+            version: Version of the extraction code
+
+        Returns:
+            Cached value or None on a miss
+        """
+        key = self.make_key(content, operation, version)
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                if key in self._files:
+                    self._files.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+
+        value = self._load(key)
+        with self._lock:
+            if value is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            if key in self._files:
+                self._files.move_to_end(key)
+            self._store(key, value, json.dumps(value))
+        return value
+
+    def put(self, content: str, operation: str, version: str, value: Any) -> None:
+        """
+        Store the extracted fields for a document
+
+        Args:
+            content: Document content
+            operation: Name of the extraction operation
+            version: Version of the extraction code
+            value: JSON-serialisable extraction result
+        """
+        if value is None:
+            return
+
+        key = self.make_key(content, operation, version)
+        serialised = json.dumps(value)
+
+        with self._lock:
+            self._store(key, value, serialised)
+
+        if self.persist_dir:
+            self._save(key, serialised)
+
+    def get_or_parse(self, content: str, operation: str, version: str, parse: Callable[[str], Any]) -> Any:
+        """
+        Return cached fields for a document, parsing and caching on a miss
+
+        Args:
+            content: Document content
+            operation: Name of the extraction operation
+            version: Version of the extraction code
+            parse: Function that extracts the fields from the content
+
+        Returns:
+            Extracted value
+        """
+        value = self.get(content, operation, version)
+        if value is None:
+            value = parse(content)
+            self.put(content, operation, version, value)
+        return value
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get cache statistics
+
+        Returns:
+            Dictionary of counters and current size
+        """
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self._size,
+                "max_bytes": self.max_bytes,
+                "disk_entries": len(self._files),
+                "disk_bytes": self._disk_size,
+                "max_disk_bytes": self.max_disk_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "disk_evictions": self.disk_evictions
+            }
+
+    def clear(self) -> None:
+        """Remove all in-memory entries"""
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+
+    def _store(self, key: str, value: Any, serialised: str) -> None:
+        size = len(serialised)
+        if size > self.max_bytes:
+            return
+
+        previous = self._entries.pop(key, None)
+        if previous is not None:
+            self._size -= previous[1]
+
+        self._entries[key] = (value, size)
+        self._size += size
+
+        while self._size > self.max_bytes:
+            _, (_, evicted_size) = self._entries.popitem(last=False)
+            self._size -= evicted_size
+            self.evictions += 1
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.persist_dir, f"{key}.json")
+
+    def _load(self, key: str) -> Optional[Any]:
+        if not self.persist_dir:
+            return None
+        try:
+            with open(self._path(key), "r", encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            print(f"Error reading document cache entry {key}: {str(e)}")
+            return None
+
+    def _save(self, key: str, serialised: str) -> None:
+        # Write to a temporary file first so readers never see partial entries
+        tmp_path = f"{self._path(key)}.{os.getpid()}.tmp"
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                f.write(serialised)
+            os.replace(tmp_path, self._path(key))
+        except Exception as e:
+            print(f"Error writing document cache entry {key}: {str(e)}")
+            return
+
+        size = len(serialised.encode("utf-8"))
+        evicted = []
+        with self._lock:
+            self._disk_size += size - self._files.pop(key, 0)
+            self._files[key] = size
+            while self._disk_size > self.max_disk_bytes and len(self._files) > 1:
+                evicted_key, evicted_size = self._files.popitem(last=False)
+                self._disk_size -= evicted_size
+                self.disk_evictions += 1
+                evicted.append(evicted_key)
+        for evicted_key in evicted:
+            try:
+                os.remove(self._path(evicted_key))
+            except FileNotFoundError:
+                pass
+            except Exception as e:
+                print(f"Error removing document cache entry {evicted_key}: {str(e)}")
+
+    def _scan_files(self) -> None:
+        """Index the files already in persist_dir, oldest first"""
+        files = []
+        for entry in os.scandir(self.persist_dir):
+            if entry.name.endswith(".json") and entry.is_file():
+                stat = entry.stat()
+                files.append((stat.st_mtime, entry.name[:-len(".json")], stat.st_size))
+        for _, key, size in sorted(files):
+            self._files[key] = size
+            self._disk_size += size
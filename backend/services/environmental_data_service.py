@@ -0,0 +1,400 @@
+import asyncio
+import time
+from typing import Dict, Any, List, Optional
+
+from services.gazetteer import normalize_name
+from services.location_resolver import LocationResolver
+from services.source_planner import SourcePlanner, SourceCache, ENVIRONMENTAL_FIELDS
+
+
+class EnvironmentalDataService:
+    """
+    Service that assembles environmental data from the upstream sources
+    chosen by the source planner
+
+    Fresh cached results are reused, independent calls run concurrently and
+    every successful upstream result is cached for later requests. Cache
+    entries are keyed on the canonical location ID from the resolver, so
+    nearby coordinates and the place names they belong to share results.
+    """
+
+    def __init__(
+        self,
+        pollution_agent,
+        weather_api,
+        planner: SourcePlanner,
+        cache: SourceCache,
+        resolver: Optional[LocationResolver] = None,
+        unknown_locations=None
+    ):
+        """
+        Initialize the environmental data service
+
+        Args:
+            pollution_agent: Pollution agent used for Tavily searches
+            weather_api: Weather API service used for OpenWeather calls
+            planner: Source planner
+            cache: Source cache shared with the planner
+            resolver: Location resolver producing cache keys
+            unknown_locations: Optional CountingBloomFilter of names geocoding
+                recently found nothing for; they are answered without upstream calls
+        """
+        self.pollution_agent = pollution_agent
+        self.weather_api = weather_api
+        self.planner = planner
+        self.cache = cache
+        self.resolver = resolver or LocationResolver()
+        self.unknown_locations = unknown_locations
+        self._background = set()
+
+    def cache_key(self, location: str) -> str:
+        """
+        Get the cache key for a location
+
+        Coordinates need no geocoding, so the centre of their geohash cell is
+        stored as the geocode result straight away.
+
+        Args:
+            location: Location string
+
+        Returns:
+            Canonical location ID
+        """
+        key = self.resolver.resolve(location)
+        coordinates = self.resolver.coordinates(location)
+        if coordinates is not None and self.cache.get("geocode", key, float("inf")) is None:
+            self.cache.put("geocode", key, coordinates)
+        return key
+
+    async def get_environmental_data(
+        self,
+        location: str,
+        radius_km: float = 5.0,
+        fields: Optional[List[str]] = None,
+        deadline: Optional[float] = None
+    ) -> Dict[str, Any]:
+        """
+        Get environmental data for a location
+
+        With a deadline the response is returned once it expires, holding
+        whatever sources have completed by then. Fields that are still
+        outstanding are listed under "missing" with the reason and an
+        estimate of when they will be available; their fetches keep running
+        in the background and warm the cache for the next call.
+
+        Args:
+            location: Location string
+            radius_km: Radius in kilometers to search within
+            fields: Requested fields; defaults to all environmental fields
+            deadline: Optional latency budget in seconds
+
+        Returns:
+            Dictionary with location, timestamp and the requested fields
+
+        Raises:
+            ValueError: If an unknown field is requested
+        """
+        started = time.perf_counter()
+        key = self.cache_key(location)
+        if self.is_unknown(location):
+            return self._unknown_location_result(location, fields)
+
+        plan = self.planner.plan(key, fields, deadline)
+        results = {name: self.cache.get(name, key, float("inf")) for name in plan.cached}
+        station_data = None
+        if "air_quality" in plan.fields:
+            # Station aggregates depend on the radius and cost no upstream call,
+            # so they are computed for every request, whichever sources were planned
+            station_data = self.pollution_agent.get_station_data(location, radius_km)
+            if station_data is not None:
+                results["stations"] = station_data["air_quality"]
+        if results.get("tavily") and "air_quality" in plan.fields:
+            if station_data is not None:
+                results["tavily"] = {**results["tavily"], "air_quality": station_data["air_quality"]}
+            elif "stations" in results["tavily"].get("air_quality", {}):
+                # Cached for a radius that reached stations this one does not
+                default = self.pollution_agent.create_default_pollution_data(location)
+                results["tavily"] = {**results["tavily"], "air_quality": default["air_quality"]}
+        tasks: Dict[str, asyncio.Task] = {}
+
+        async def fetch_tavily():
+            # Water quality alone does not need the search; with air quality the
+            # search runs anyway, so keep both sections for later cache hits
+            pollution_fields = None if "air_quality" in plan.fields else ["water_quality"]
+            return await self._fetch(
+                "tavily", location,
+                self.pollution_agent.get_pollution_data(location, radius_km, fields=pollution_fields)
+            )
+
+        async def fetch_with_coordinates(name, call):
+            coordinates = results.get("geocode")
+            if coordinates is None and "geocode" in tasks:
+                coordinates = await tasks["geocode"]
+            if not coordinates:
+                return None
+            return await self._fetch(name, location, call(coordinates["lat"], coordinates["lon"]))
+
+        calls = {
+            "weather": self.weather_api.get_current_weather,
+            "air_pollution": self.weather_api.get_air_pollution,
+            "uv": self.weather_api.get_uv_index,
+        }
+        if "tavily" in plan.fetch:
+            tasks["tavily"] = asyncio.create_task(fetch_tavily())
+        if "geocode" in plan.fetch:
+            tasks["geocode"] = asyncio.create_task(
+                self._fetch("geocode", location, self.weather_api.get_coordinates(location))
+            )
+        for name, call in calls.items():
+            if name in plan.fetch:
+                tasks[name] = asyncio.create_task(fetch_with_coordinates(name, call))
+        if "pollen" in plan.fetch:
+            results["pollen"] = self.weather_api.get_pollen_data()
+            self.cache.put("pollen", key, results["pollen"])
+
+        if tasks:
+            timeout = None if deadline is None else max(0.0, deadline - (time.perf_counter() - started))
+            try:
+                await asyncio.wait(tasks.values(), timeout=timeout)
+            except asyncio.CancelledError:
+                # The caller went away; stop the upstream calls still in flight.
+                # Sources that already finished have been cached by _fetch.
+                for task in tasks.values():
+                    task.cancel()
+                raise
+
+        errors = {}
+        for name, task in tasks.items():
+            if not task.done():
+                # Let it finish in the background; _fetch caches the result
+                self._background.add(task)
+                task.add_done_callback(self._background_done)
+            elif task.exception() is not None:
+                if deadline is None:
+                    raise task.exception()
+                errors[name] = str(task.exception())
+            else:
+                results[name] = task.result()
+
+        result = self._compose(location, plan.fields, results)
+        missing = self._missing(plan, results, tasks, errors, time.perf_counter() - started)
+        if missing:
+            result["partial"] = True
+            result["missing"] = missing
+        return result
+
+    def is_unknown(self, location: str) -> bool:
+        """
+        Check whether a location recently failed to geocode
+
+        Args:
+            location: Location string
+
+        Returns:
+            True if the location would be answered without upstream calls
+        """
+        # Coordinates and known places resolve to geohash IDs and are never rejected
+        return (
+            self.unknown_locations is not None
+            and self.resolver.resolve(location).startswith("name:")
+            and normalize_name(location) in self.unknown_locations
+        )
+
+    def _unknown_location_result(self, location: str, fields: Optional[List[str]]) -> Dict[str, Any]:
+        """
+        Answer for a location that recently failed to geocode, without upstream calls
+        """
+        fields = list(fields) if fields is not None else list(ENVIRONMENTAL_FIELDS)
+        unknown = [field for field in fields if field not in ENVIRONMENTAL_FIELDS]
+        if unknown:
+            raise ValueError(f"Unknown fields: {', '.join(unknown)}")
+
+        results = {
+            "tavily": self.pollution_agent.create_default_pollution_data(location),
+            "geocode": None,
+            "pollen": self.weather_api.get_pollen_data(),
+        }
+        result = self._compose(location, fields, results)
+        now = self.weather_api.get_timestamp()
+        missing = {
+            field: {
+                "reason": "Location was not found by a recent geocoding attempt",
+                "source": "geocode",
+                "status": "failed",
+                "expected_in": None,
+                "as_of": now
+            }
+            for field in fields if field in ("air_quality", "uv_index", "weather")
+        }
+        if missing:
+            result["partial"] = True
+            result["missing"] = missing
+        return result
+
+    def _background_done(self, task: asyncio.Task) -> None:
+        self._background.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            print(f"Background fetch failed: {task.exception()!r}")
+
+    def _missing(
+        self,
+        plan,
+        results: Dict[str, Any],
+        tasks: Dict[str, asyncio.Task],
+        errors: Dict[str, str],
+        elapsed: float
+    ) -> Dict[str, Dict[str, Any]]:
+        """
+        Describe requested fields that no source in the plan could supply
+        """
+        now = self.weather_api.get_timestamp()
+        missing = {}
+        for field in plan.fields:
+            if field == "air_quality" and results.get("stations") is not None:
+                continue
+            providers = [
+                name for name in plan.fetch + plan.cached
+                if field in self.planner.sources[name]["provides"]
+            ]
+            if any(results.get(name) for name in providers):
+                continue
+            if not providers:
+                missing[field] = {
+                    "reason": plan.reasons.get("deadline", "No source can supply it"),
+                    "source": None,
+                    "status": "skipped",
+                    "expected_in": None,
+                    "as_of": now
+                }
+                continue
+
+            for name in providers:
+                pending = name in tasks and not tasks[name].done()
+                geocode_pending = "geocode" in tasks and not tasks["geocode"].done()
+                if pending:
+                    remaining = self.planner.latency[name] - elapsed
+                    if geocode_pending and name != "geocode":
+                        remaining += self.planner.latency["geocode"]
+                    missing[field] = {
+                        "reason": f"{name} did not respond before the deadline",
+                        "source": name,
+                        "status": "pending",
+                        "expected_in": round(max(0.0, remaining), 2),
+                        "as_of": now
+                    }
+                elif name in errors or "geocode" in errors:
+                    missing[field] = {
+                        "reason": f"{name} failed: {errors.get(name) or errors.get('geocode')}",
+                        "source": name,
+                        "status": "failed",
+                        "expected_in": None,
+                        "as_of": now
+                    }
+                elif "geocode" in results and not results["geocode"]:
+                    missing[field] = {
+                        "reason": "Could not determine coordinates for the location",
+                        "source": name,
+                        "status": "failed",
+                        "expected_in": None,
+                        "as_of": now
+                    }
+                else:
+                    continue
+                break
+        return missing
+
+    async def _fetch(self, source: str, location: str, call) -> Any:
+        """
+        Await an upstream call, record its latency and cache a usable result
+        """
+        started = time.perf_counter()
+        value = await call
+        self.planner.observe(source, time.perf_counter() - started)
+        if self._is_usable(source, value):
+            if source == "geocode":
+                # From now on the place name maps to the ID of its coordinates;
+                # results cached under the name so far move with it
+                name_key = self.resolver.resolve(location)
+                location_key = self.resolver.learn(location, value["lat"], value["lon"])
+                if location_key != name_key:
+                    self.cache.copy(name_key, location_key)
+            # Resolved again so results finishing after geocoding land under the
+            # coordinate-based ID the place name now maps to
+            self.cache.put(source, self.resolver.resolve(location), value)
+        return value
+
+    def _is_usable(self, source: str, value: Any) -> bool:
+        if not value:
+            return False
+        if isinstance(value, dict) and "error" in value:
+            return False
+        # Default Tavily data is a placeholder, not something worth reusing
+        if source == "tavily" and value.get("data_confidence") == "Low":
+            return False
+        return True
+
+    def _compose(self, location: str, fields: List[str], results: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Build the /api/environmental-data response from source results
+        """
+        tavily = results.get("tavily") or {}
+        timestamp = self.weather_api.get_timestamp()
+
+        air_quality = tavily.get("air_quality", {})
+        # Nearby monitoring stations take precedence over OpenWeather's modelled point value
+        if results.get("stations") is not None:
+            air_quality = results["stations"]
+        elif (
+            "air_quality" in fields
+            and "stations" not in air_quality
+            and self._is_usable("air_pollution", results.get("air_pollution"))
+        ):
+            air_quality = self._openweather_air_quality(results["air_pollution"])
+
+        uv_index = (results.get("uv") or {}).get("uv_index")
+        pollen_count = results.get("pollen", {})
+
+        coordinates = results.get("geocode")
+        if "geocode" in results and not coordinates:
+            weather = {
+                "error": "Could not determine coordinates for the location",
+                "timestamp": timestamp
+            }
+        else:
+            weather = {"location": location, "coordinates": coordinates}
+            if "weather" in results:
+                weather["weather"] = results["weather"]
+            if "air_pollution" in results:
+                weather["air_quality"] = results["air_pollution"]
+            weather["uv_index"] = uv_index
+            weather["pollen_count"] = pollen_count
+            weather["timestamp"] = timestamp
+
+        values = {
+            "air_quality": air_quality,
+            "water_quality": tavily.get("water_quality", {}),
+            "uv_index": uv_index,
+            "pollen_count": pollen_count,
+            "weather": weather,
+        }
+        result = {"location": location}
+        result.update((field, value) for field, value in values.items() if field in fields)
+        result["timestamp"] = timestamp
+        return result
+
+    def _openweather_air_quality(self, air_pollution: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Map OpenWeather components and the locally computed AQI onto the
+        air_quality shape produced by the pollution agent
+        """
+        computed = air_pollution.get("computed_aqi") or {}
+        components = air_pollution.get("components", {})
+        return {
+            "aqi": computed.get("aqi"),
+            "category": computed.get("category"),
+            "pm25": components.get("pm2_5"),
+            "pm10": components.get("pm10"),
+            "ozone": components.get("o3"),
+            "dominant_pollutant": computed.get("dominant_pollutant"),
+            "source": "openweather"
+        }
@@ -0,0 +1,332 @@
+import math
+import os
+import re
+import struct
+import unicodedata
+from typing import Any, Dict, Iterable, List, Optional, Set
+
+from utils.spatial_index import SpatialIndex
+from utils.trie import RadixTrie
+
+DEFAULT_GAZETTEER_PATH = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "gazetteer.bin"
+)
+
+# Binary layout: header (magic, record count), then per record a fixed part
+# (lat, lon, population, kind, length of the string part) followed by the
+# UTF-8 strings name, admin, country and any aliases joined by \x1f.
+GAZETTEER_MAGIC = b"GZT1"
+_HEADER = struct.Struct("<4sI")
+_RECORD = struct.Struct("<ffIBH")
+_SEPARATOR = "\x1f"
+
+PLACE_KINDS = ["country", "state", "region", "city"]
+
+# How much our own request counts weigh against population when ranking
+# completions: each tenfold increase in requests counts like a hundredfold
+# increase in population
+REQUEST_RANK_WEIGHT = 2.0
+
+
+def normalize_name(name: str) -> str:
+    """
+    Normalise a place name for lookups
+
+    Args:
+        name: Place name
+
+    Returns:
+        Lower-cased name without accents, punctuation or repeated whitespace
+    """
+    name = unicodedata.normalize("NFKD", name)
+    name = "".join(char for char in name if not unicodedata.combining(char))
+    name = re.sub(r"[^\w\s]|_", " ", name.lower())
+    return " ".join(name.split())
+
+
+class Place:
+    """
+    A gazetteer entry
+    """
+
+    __slots__ = ("name", "kind", "admin", "country", "lat", "lon", "population", "aliases")
+
+    def __init__(
+        self,
+        name: str,
+        kind: str,
+        admin: str,
+        country: str,
+        lat: float,
+        lon: float,
+        population: int,
+        aliases: Optional[List[str]] = None
+    ):
+        self.name = name
+        self.kind = kind
+        self.admin = admin
+        self.country = country
+        self.lat = lat
+        self.lon = lon
+        self.population = population
+        self.aliases = aliases or []
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "kind": self.kind,
+            "admin": self.admin or None,
+            "country": self.country,
+            "lat": self.lat,
+            "lon": self.lon,
+            "population": self.population
+        }
+
+
+def write_gazetteer(path: str, places: Iterable[Place]) -> int:
+    """
+    Write places to a binary gazetteer file
+
+    Args:
+        path: Output path
+        places: Places to write
+
+    Returns:
+        Number of places written
+    """
+    records = []
+    for place in places:
+        strings = _SEPARATOR.join([place.name, place.admin, place.country] + list(place.aliases)).encode("utf-8")
+        records.append(
+            _RECORD.pack(place.lat, place.lon, place.population, PLACE_KINDS.index(place.kind), len(strings))
+            + strings
+        )
+    with open(path, "wb") as f:
+        f.write(_HEADER.pack(GAZETTEER_MAGIC, len(records)))
+        for record in records:
+            f.write(record)
+    return len(records)
+
+
+def read_gazetteer(path: str) -> List[Place]:
+    """
+    Read places from a binary gazetteer file
+
+    Args:
+        path: Gazetteer file path
+
+    Returns:
+        List of places
+
+    Raises:
+        ValueError: If the file is not a gazetteer or is truncated
+    """
+    with open(path, "rb") as f:
+        data = f.read()
+    if len(data) < _HEADER.size:
+        raise ValueError(f"{path} is not a gazetteer file")
+    magic, count = _HEADER.unpack_from(data, 0)
+    if magic != GAZETTEER_MAGIC:
+        raise ValueError(f"{path} is not a gazetteer file")
+
+    places = []
+    offset = _HEADER.size
+    for _ in range(count):
+        if offset + _RECORD.size > len(data):
+            raise ValueError(f"{path} is truncated")
+        lat, lon, population, kind, length = _RECORD.unpack_from(data, offset)
+        offset += _RECORD.size
+        if offset + length > len(data):
+            raise ValueError(f"{path} is truncated")
+        strings = data[offset:offset + length].decode("utf-8").split(_SEPARATOR)
+        offset += length
+        name, admin, country, aliases = strings[0], strings[1], strings[2], strings[3:]
+        # Coordinates are stored as float32; 5 decimals is about a metre
+        places.append(Place(name, PLACE_KINDS[kind], admin, country, round(lat, 5), round(lon, 5), population, aliases))
+    return places
+
+
+class Gazetteer:
+    """
+    Offline place lookup for the cities and regions EcoShield serves
+
+    Names and aliases are held in a prefix trie for exact, alias and fuzzy
+    lookups and for ranked completion; cities are also held in a spatial
+    index for reverse geocoding. Callers fall back to network geocoding when
+    a lookup misses.
+    """
+
+    def __init__(self, places: Optional[List[Place]] = None):
+        """
+        Initialize the gazetteer
+
+        Args:
+            places: Places to index
+        """
+        self.places = places or []
+        self.requests = [0] * len(self.places)
+        self.names = RadixTrie(score=self._rank)
+        self.cities = SpatialIndex()
+        self._country_names: Dict[str, Set[str]] = {}
+        self._country_display_names: Dict[str, str] = {}
+
+        for index, place in enumerate(self.places):
+            self.names.insert(normalize_name(place.name), index)
+            for alias in place.aliases:
+                self.names.insert(normalize_name(alias), index)
+            if place.kind == "city":
+                self.cities.insert(index, place.lat, place.lon)
+            if place.kind == "country":
+                self._country_names[place.country] = {
+                    normalize_name(name) for name in [place.name, place.country] + place.aliases
+                }
+                self._country_display_names[place.country] = place.name
+
+    @classmethod
+    def load(cls, path: str = DEFAULT_GAZETTEER_PATH) -> "Gazetteer":
+        """
+        Load a gazetteer from a binary file
+
+        Args:
+            path: Gazetteer file path
+
+        Returns:
+            Gazetteer instance
+        """
+        return cls(read_gazetteer(path))
+
+    def __len__(self) -> int:
+        return len(self.places)
+
+    def lookup(self, location: str, fuzzy: bool = True) -> Optional[Place]:
+        """
+        Find the place a location string refers to
+
+        The first comma-separated part is the place name; later parts
+        ("Maharashtra", "India", "US") must agree with the place's state or
+        country. Postal codes are ignored.
+
+        Args:
+            location: Location string such as "Mumbai" or "Pune, Maharashtra, India"
+            fuzzy: Also accept names within a small edit distance
+
+        Returns:
+            Matching Place or None
+        """
+        index = self._find(location, fuzzy)
+        return self.places[index] if index is not None else None
+
+    def _find(self, location: str, fuzzy: bool) -> Optional[int]:
+        """Index of the place a location string refers to"""
+        parts = [normalize_name(part) for part in location.split(",")]
+        parts = [part for part in parts if part]
+        if not parts:
+            return None
+        name = parts[0]
+        context = [" ".join(word for word in part.split() if not word.isdigit()) for part in parts[1:]]
+        context = [part for part in context if part]
+
+        candidates = self.names.get(name)
+        if not candidates and fuzzy and len(name) >= 4:
+            # One typo for short names, two for longer ones
+            matches = self.names.fuzzy(name, 1 if len(name) <= 6 else 2)
+            if matches:
+                best_distance = matches[0][2]
+                candidates = [index for _, values, distance in matches if distance == best_distance for index in values]
+        if not candidates:
+            return None
+
+        best = None
+        for index in set(candidates):
+            qualifiers = self._qualifiers(self.places[index])
+            if not all(part in qualifiers for part in context):
+                continue
+            if best is None or self.places[index].population > self.places[best].population:
+                best = index
+        return best
+
+    def complete(self, prefix: str, limit: int = 10) -> List[Place]:
+        """
+        Complete a partly typed place name
+
+        Args:
+            prefix: Typed text; only the part before the first comma is used
+            limit: Maximum number of places
+
+        Returns:
+            Places whose name or an alias starts with the prefix, ranked by
+            population and how often they are requested
+        """
+        prefix = normalize_name(prefix.split(",")[0])
+        if not prefix:
+            return []
+        return [self.places[index] for index in self.names.top(prefix, limit)]
+
+    def record_request(self, location: str) -> Optional[Place]:
+        """
+        Count a request for a location towards completion ranking
+
+        Args:
+            location: Location string from a request
+
+        Returns:
+            The Place the location refers to, or None if it is not known
+        """
+        index = self._find(location, fuzzy=False)
+        if index is None:
+            return None
+        place = self.places[index]
+        self.requests[index] += 1
+        for name in [place.name] + place.aliases:
+            self.names.refresh(normalize_name(name))
+        return place
+
+    def label(self, place: Place) -> str:
+        """
+        Build the normalised location string for a place
+
+        Args:
+            place: Place
+
+        Returns:
+            String such as "Pune, Maharashtra, India" that lookup() resolves
+            back to the same place
+        """
+        country = self._country_display_names.get(place.country, place.country)
+        parts = [place.name]
+        if place.admin and place.admin != place.name:
+            parts.append(place.admin)
+        if place.kind != "country":
+            parts.append(country)
+        return ", ".join(parts)
+
+    def reverse(self, lat: float, lon: float, max_distance_km: float = 50.0) -> Optional[Dict[str, Any]]:
+        """
+        Find the nearest city to a point
+
+        Args:
+            lat: Latitude
+            lon: Longitude
+            max_distance_km: Maximum distance to the city centre
+
+        Returns:
+            Place dictionary with distance_km or None if no city is close enough
+        """
+        nearest = self.cities.nearest(lat, lon, 1, max_distance_km)
+        if not nearest:
+            return None
+        index, distance = nearest[0]
+        return {**self.places[index].to_dict(), "distance_km": round(distance, 3)}
+
+    def _rank(self, index: int) -> float:
+        return (
+            math.log10(self.places[index].population + 10)
+            + REQUEST_RANK_WEIGHT * math.log10(1 + self.requests[index])
+        )
+
+    def _qualifiers(self, place: Place) -> Set[str]:
+        """Names that may follow a place's name in a location string"""
+        qualifiers = set(self._country_names.get(place.country, {normalize_name(place.country)}))
+        if place.admin:
+            qualifiers.add(normalize_name(place.admin))
+        return qualifiers
@@ -0,0 +1,165 @@
+import os
+import struct
+import threading
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+DEFAULT_GRID_DIR = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "grids"
+)
+
+# Globe layers served as raw grids; each is <grid dir>/<layer>.npy
+GRID_LAYERS: Dict[str, Dict[str, str]] = {
+    "aqi": {"name": "Air Pollution (AQI)", "unit": "AQI"},
+    "temperature_anomaly": {"name": "Temperature Anomaly", "unit": "°C"},
+    "co2": {"name": "CO₂ Levels", "unit": "ppm"},
+    "forest_cover": {"name": "Forest Coverage", "unit": "%"},
+}
+
+# Response layout: a 32-byte header (magic, version, header size, width,
+# height, west, north, cell width and cell height in degrees) followed by
+# height x width little-endian float32 values, row by row from the north.
+# Cells without data are NaN.
+GRID_MAGIC = b"EGRD"
+GRID_VERSION = 1
+_HEADER = struct.Struct("<4sHHIIffff")
+GRID_DTYPE = np.dtype("<f4")
+
+
+def grid_header(width: int, height: int) -> bytes:
+    """
+    Build the response header for a global grid
+
+    Args:
+        width: Number of columns, spanning -180 to 180 degrees longitude
+        height: Number of rows, spanning 90 to -90 degrees latitude
+
+    Returns:
+        Header bytes
+    """
+    return _HEADER.pack(
+        GRID_MAGIC, GRID_VERSION, _HEADER.size, width, height, -180.0, 90.0, 360.0 / width, 180.0 / height
+    )
+
+
+def write_grid(path: str, values: np.ndarray) -> None:
+    """
+    Save a global grid so that it can be served
+
+    The file is written next to its destination and moved into place, so a
+    server that has the previous version memory-mapped keeps a valid view.
+
+    Args:
+        path: Destination .npy path
+        values: Array of shape (height, width), row 0 at the north pole
+    """
+    if values.ndim != 2:
+        raise ValueError("Expected an array of shape (height, width)")
+    temporary = path + ".tmp"
+    with open(temporary, "wb") as f:
+        np.save(f, np.ascontiguousarray(values, dtype=GRID_DTYPE))
+    os.replace(temporary, path)
+
+
+class Grid:
+    """
+    A memory-mapped grid ready to be sent
+    """
+
+    __slots__ = ("layer", "values", "header", "data", "etag", "size", "_stat")
+
+    def __init__(self, layer: str, values: np.ndarray, stat: os.stat_result):
+        self.layer = layer
+        self.values = values
+        self.header = grid_header(values.shape[1], values.shape[0])
+        # A view of the mapped file; slicing it copies nothing
+        self.data = memoryview(values).cast("B")
+        self.etag = f'"{layer}-{stat.st_mtime_ns:x}-{stat.st_size:x}"'
+        self.size = len(self.header) + len(self.data)
+        self._stat = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+
+    def to_dict(self) -> Dict[str, Any]:
+        height, width = self.values.shape
+        return {
+            "layer": self.layer,
+            **GRID_LAYERS[self.layer],
+            "width": width,
+            "height": height,
+            "bytes": self.size,
+            "etag": self.etag
+        }
+
+
+class GridStore:
+    """
+    Precomputed global grids for the 3D globe
+
+    Grids are float32 .npy files (see scripts/build_grids.py) opened with
+    mmap_mode="r", so the operating system pages them in on demand and
+    responses are slices of the mapping rather than serialised copies. A
+    file replaced on disk is picked up on the next request.
+    """
+
+    def __init__(self, directory: str = DEFAULT_GRID_DIR):
+        """
+        Initialize the store
+
+        Args:
+            directory: Directory holding <layer>.npy files
+        """
+        self.directory = directory
+        self._grids: Dict[str, Grid] = {}
+        self._lock = threading.Lock()
+
+    def get(self, layer: str) -> Optional[Grid]:
+        """
+        Get a grid, reopening it if its file has changed
+
+        Args:
+            layer: Layer name from GRID_LAYERS
+
+        Returns:
+            Grid or None if the layer has no grid file
+
+        Raises:
+            ValueError: If the layer is unknown or its file is not a valid grid
+        """
+        if layer not in GRID_LAYERS:
+            raise ValueError(f"Unknown grid layer: {layer}")
+        path = os.path.join(self.directory, f"{layer}.npy")
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            with self._lock:
+                self._grids.pop(layer, None)
+            return None
+
+        with self._lock:
+            grid = self._grids.get(layer)
+            if grid is not None and grid._stat == (stat.st_ino, stat.st_mtime_ns, stat.st_size):
+                return grid
+            values = np.load(path, mmap_mode="r")
+            if values.ndim != 2 or values.dtype != GRID_DTYPE or not values.flags.c_contiguous:
+                raise ValueError(f"{path} is not a little-endian float32 grid")
+            grid = Grid(layer, values, stat)
+            self._grids[layer] = grid
+            return grid
+
+    def available(self) -> List[Dict[str, Any]]:
+        """
+        Describe the layers that have grids
+
+        Returns:
+            List of dictionaries with layer, name, unit, width, height, bytes and etag
+        """
+        grids = []
+        for layer in GRID_LAYERS:
+            try:
+                grid = self.get(layer)
+            except ValueError as e:
+                print(f"Error opening grid {layer}: {str(e)}")
+                continue
+            if grid is not None:
+                grids.append(grid.to_dict())
+        return grids
@@ -0,0 +1,150 @@
+import re
+import threading
+from collections import OrderedDict
+from typing import Dict, Optional
+
+from utils.geo import geohash_decode, geohash_encode, parse_coordinates
+
+
+class LocationResolver:
+    """
+    Maps location strings to canonical location IDs used as cache keys
+
+    Coordinates are snapped to a geohash cell, so users a few metres apart
+    share one ID ("gh:dr5ru"). Place names are normalised ("name:new york")
+    until they have been geocoded once; from then on they resolve to the
+    geohash of their coordinates, so a city name and a point inside the same
+    cell share every cache entry. Names in the gazetteer resolve to their
+    coordinates straight away.
+    """
+
+    def __init__(self, precision: int = 5, max_aliases: int = 10000, gazetteer=None):
+        """
+        Initialize the resolver
+
+        Args:
+            precision: Geohash length used for snapping (5 is roughly 5 x 5 km)
+            max_aliases: Maximum number of place names remembered
+            gazetteer: Optional Gazetteer for resolving known place names
+        """
+        if not 1 <= precision <= 12:
+            raise ValueError("Geohash precision must be between 1 and 12")
+        self.precision = precision
+        self.max_aliases = max_aliases
+        self.gazetteer = gazetteer
+        self._aliases: "OrderedDict[str, str]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def resolve(self, location: str) -> str:
+        """
+        Get the canonical location ID for a location string
+
+        Args:
+            location: Place name or "lat,lon" string
+
+        Returns:
+            Canonical location ID
+        """
+        coordinates = parse_coordinates(location)
+        if coordinates is not None:
+            return self.location_id(coordinates[0], coordinates[1])
+        name = self.normalize(location)
+        with self._lock:
+            geohash = self._aliases.get(name)
+            if geohash is not None:
+                self._aliases.move_to_end(name)
+                return "gh:" + geohash
+        place = self._place(location)
+        if place is not None:
+            return self.location_id(place.lat, place.lon)
+        return "name:" + name
+
+    def location_id(self, lat: float, lon: float) -> str:
+        """
+        Get the canonical location ID for coordinates
+
+        Args:
+            lat: Latitude
+            lon: Longitude
+
+        Returns:
+            Canonical location ID
+        """
+        return "gh:" + geohash_encode(lat, lon, self.precision)
+
+    def coordinates(self, location: str) -> Optional[Dict[str, float]]:
+        """
+        Get the snapped coordinates for a location without geocoding it
+
+        Args:
+            location: Place name or "lat,lon" string
+
+        Returns:
+            Dictionary with lat and lon keys (the centre of the geohash cell)
+            or None if the location has not been geocoded yet; gazetteer
+            places return their own coordinates
+        """
+        if parse_coordinates(location) is None:
+            place = self._place(location)
+            if place is not None:
+                return {"lat": place.lat, "lon": place.lon}
+        location_id = self.resolve(location)
+        if not location_id.startswith("gh:"):
+            return None
+        lat, lon = geohash_decode(location_id[3:])
+        return {"lat": round(lat, 5), "lon": round(lon, 5)}
+
+    def snap(self, lat: float, lon: float) -> str:
+        """
+        Snap coordinates to the centre of their geohash cell
+
+        Args:
+            lat: Latitude
+            lon: Longitude
+
+        Returns:
+            "lat,lon" string for the cell centre
+        """
+        center_lat, center_lon = geohash_decode(geohash_encode(lat, lon, self.precision))
+        return f"{round(center_lat, 5)},{round(center_lon, 5)}"
+
+    def learn(self, location: str, lat: float, lon: float) -> str:
+        """
+        Remember where a place name was geocoded to
+
+        Args:
+            location: Place name
+            lat: Geocoded latitude
+            lon: Geocoded longitude
+
+        Returns:
+            Canonical location ID the name now resolves to
+        """
+        geohash = geohash_encode(lat, lon, self.precision)
+        if parse_coordinates(location) is None:
+            name = self.normalize(location)
+            with self._lock:
+                self._aliases[name] = geohash
+                self._aliases.move_to_end(name)
+                while len(self._aliases) > self.max_aliases:
+                    self._aliases.popitem(last=False)
+        return "gh:" + geohash
+
+    def _place(self, location: str):
+        # Exact and alias matches only; fuzzy matches are left to geocoding
+        return self.gazetteer.lookup(location, fuzzy=False) if self.gazetteer is not None else None
+
+    @staticmethod
+    def normalize(location: str) -> str:
+        """
+        Normalise a place name for comparison
+
+        Args:
+            location: Place name
+
+        Returns:
+            Lower-cased name with whitespace and punctuation collapsed
+        """
+        name = re.sub(r"\s*,\s*", ", ", location.strip().lower())
+        name = re.sub(r"\s+", " ", name)
+        return name.strip(" .,;")
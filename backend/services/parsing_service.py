@@ -0,0 +1,247 @@
+import asyncio
+import functools
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Any, List, Optional
+
+from utils.parser import Parser, PARSER_VERSION
+from services.document_cache import DocumentCache
+
+# Parser operations that may be dispatched to worker processes
+OPERATIONS = {
+    "clean_html": Parser.clean_html,
+    "extract_air_quality_data": Parser.extract_air_quality_data,
+    "extract_water_quality_data": Parser.extract_water_quality_data,
+    "extract_json_from_text": Parser.extract_json_from_text,
+    "extract_pollution_fields": Parser.extract_pollution_fields,
+}
+
+
+def _run_batch(operation: str, documents: List[str]) -> List[Any]:
+    """
+    Run a parser operation over a batch of documents inside a worker process
+
+    Args:
+        operation: Name of the parser operation
+        documents: Documents to parse
+
+    Returns:
+        List of results in document order
+    """
+    func = OPERATIONS[operation]
+    return [func(document) for document in documents]
+
+
+class ParsingService:
+    """
+    Service that runs CPU-bound document parsing off the event loop
+
+    Large documents are sent to a bounded process pool; small ones are
+    parsed inline because pickling them to a worker costs more than parsing.
+    """
+
+    def __init__(
+        self,
+        max_workers: Optional[int] = None,
+        inline_threshold: int = 16 * 1024,
+        max_pending: int = 32,
+        batch_size: int = 8,
+        task_timeout: float = 10.0,
+        cache: Optional[DocumentCache] = None
+    ):
+        """
+        Initialize the parsing service
+
+        Args:
+            max_workers: Number of worker processes (defaults to CPU count - 1)
+            inline_threshold: Documents shorter than this many characters are parsed inline
+            max_pending: Maximum number of batches queued or running in the pool;
+                callers wait for a slot once the limit is reached
+            batch_size: Maximum number of documents sent to a worker per task
+            task_timeout: Seconds to wait for a single pool task
+            cache: Optional content-hash cache of parse results
+        """
+        self.max_workers = max_workers or max(1, (os.cpu_count() or 2) - 1)
+        self.inline_threshold = inline_threshold
+        self.max_pending = max_pending
+        self.batch_size = batch_size
+        self.task_timeout = task_timeout
+        self.cache = cache
+
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._slots: Optional[asyncio.Semaphore] = None
+
+    async def clean_html(self, html_content: str) -> str:
+        """
+        Clean HTML content off the event loop
+
+        Args:
+            html_content: Raw HTML content
+
+        Returns:
+            Cleaned text content
+        """
+        return await self.parse("clean_html", html_content)
+
+    async def extract_air_quality_data(self, html_content: str) -> Dict[str, Any]:
+        """
+        Extract air quality data off the event loop
+
+        Args:
+            html_content: HTML content containing air quality data
+
+        Returns:
+            Dictionary containing structured air quality data
+        """
+        return await self.parse("extract_air_quality_data", html_content)
+
+    async def extract_water_quality_data(self, html_content: str) -> Dict[str, Any]:
+        """
+        Extract water quality data off the event loop
+
+        Args:
+            html_content: HTML content containing water quality data
+
+        Returns:
+            Dictionary containing structured water quality data
+        """
+        return await self.parse("extract_water_quality_data", html_content)
+
+    async def extract_json_from_text(self, text: str) -> Optional[Dict[str, Any]]:
+        """
+        Extract a JSON object from text off the event loop
+
+        Args:
+            text: Text that may contain a JSON object
+
+        Returns:
+            Extracted JSON object or None if not found
+        """
+        return await self.parse("extract_json_from_text", text)
+
+    async def parse(self, operation: str, document: str) -> Any:
+        """
+        Run a single parser operation
+
+        Args:
+            operation: Name of the parser operation
+            document: Document to parse
+
+        Returns:
+            Operation result
+
+        Raises:
+            asyncio.TimeoutError: If the pool task exceeds task_timeout
+        """
+        if operation not in OPERATIONS:
+            raise ValueError(f"Unknown parser operation: {operation}")
+
+        if self.cache is not None:
+            cached = self.cache.get(document, operation, PARSER_VERSION)
+            if cached is not None:
+                return cached
+
+        if len(document) < self.inline_threshold:
+            result = OPERATIONS[operation](document)
+        else:
+            result = (await self._submit(operation, [document]))[0]
+
+        if self.cache is not None:
+            self.cache.put(document, operation, PARSER_VERSION, result)
+        return result
+
+    async def parse_batch(self, operation: str, documents: List[str]) -> List[Any]:
+        """
+        Run a parser operation over many documents
+
+        Small documents are parsed inline; large ones are grouped into
+        batches of batch_size and dispatched to the pool concurrently.
+        A batch that fails or times out yields None for its documents.
+
+        Args:
+            operation: Name of the parser operation
+            documents: Documents to parse
+
+        Returns:
+            List of results in document order
+        """
+        if operation not in OPERATIONS:
+            raise ValueError(f"Unknown parser operation: {operation}")
+
+        func = OPERATIONS[operation]
+        results: List[Any] = [None] * len(documents)
+        large = []
+
+        for index, document in enumerate(documents):
+            if self.cache is not None:
+                cached = self.cache.get(document, operation, PARSER_VERSION)
+                if cached is not None:
+                    results[index] = cached
+                    continue
+
+            if len(document) < self.inline_threshold:
+                results[index] = func(document)
+                if self.cache is not None:
+                    self.cache.put(document, operation, PARSER_VERSION, results[index])
+            else:
+                large.append(index)
+
+        batches = [large[i:i + self.batch_size] for i in range(0, len(large), self.batch_size)]
+        outcomes = await asyncio.gather(
+            *(self._submit(operation, [documents[i] for i in batch]) for batch in batches),
+            return_exceptions=True
+        )
+
+        for batch, outcome in zip(batches, outcomes):
+            if isinstance(outcome, BaseException):
+                print(f"Error parsing batch with {operation}: {outcome!r}")
+                continue
+            for index, result in zip(batch, outcome):
+                results[index] = result
+                if self.cache is not None:
+                    self.cache.put(documents[index], operation, PARSER_VERSION, result)
+
+        return results
+
+    async def _submit(self, operation: str, documents: List[str]) -> List[Any]:
+        """
+        Submit one batch to the process pool, waiting for a free slot first
+
+        The timeout stops waiting for the result; a worker that is already
+        running the batch finishes it in the background. The slot is held
+        until the pool task completes, so abandoned batches still count
+        against max_pending.
+        """
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.max_pending)
+
+        await self._slots.acquire()
+        loop = asyncio.get_running_loop()
+        try:
+            task = self._get_executor().submit(_run_batch, operation, documents)
+        except BaseException:
+            self._slots.release()
+            raise
+        task.add_done_callback(functools.partial(self._release_slot, loop, self._slots))
+        # Cancelling the wrapper on timeout only cancels a task still queued
+        return await asyncio.wait_for(asyncio.wrap_future(task), timeout=self.task_timeout)
+
+    @staticmethod
+    def _release_slot(loop: asyncio.AbstractEventLoop, slots: asyncio.Semaphore, _task) -> None:
+        """Free a pool slot from the thread that completed the task"""
+        try:
+            loop.call_soon_threadsafe(slots.release)
+        except RuntimeError:
+            # The event loop has already closed
+            pass
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.max_workers)
+        return self._executor
+
+    def shutdown(self):
+        """Shut down the worker pool"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
@@ -0,0 +1,239 @@
+import json
+import math
+import os
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from services.gazetteer import normalize_name
+from utils.geo import EARTH_RADIUS_KM, parse_coordinates, point_in_polygon, polygon_distance_km
+from utils.rtree import STRTree
+
+DEFAULT_REGIONS_PATH = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "india_regions.json"
+)
+
+# Points this close to a state, but inside none, are assigned to the nearest
+# state; covers the slivers simplified borders leave between neighbours
+DEFAULT_TOLERANCE_KM = 10.0
+
+
+class RegionMatch:
+    """
+    The state and agro-climatic zone a location falls in
+    """
+
+    __slots__ = ("country", "state_id", "state", "zone_id", "zone", "zone_number")
+
+    def __init__(
+        self,
+        country: str,
+        state_id: Optional[str] = None,
+        state: Optional[str] = None,
+        zone_id: Optional[str] = None,
+        zone: Optional[str] = None,
+        zone_number: Optional[int] = None
+    ):
+        self.country = country
+        self.state_id = state_id
+        self.state = state
+        self.zone_id = zone_id
+        self.zone = zone
+        self.zone_number = zone_number
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "country": self.country,
+            "state_id": self.state_id,
+            "state": self.state,
+            "zone_id": self.zone_id,
+            "zone": self.zone,
+            "zone_number": self.zone_number
+        }
+
+
+class RegionResolver:
+    """
+    Maps coordinates and place names to states and agro-climatic zones
+
+    States are simplified polygons (see data/india_regions.json), each
+    tagged with one of the Planning Commission's 15 agro-climatic zones. A
+    coordinate lookup queries an STR-packed R-tree of the polygons' bounding
+    boxes, so only the few states whose box contains the point get an exact
+    point-in-polygon test. Where boxes and simplified borders overlap (Delhi
+    inside Haryana's outline, for example) the smallest containing polygon
+    wins. Names of states, zones and the country are matched through a
+    dictionary; other place names go through the gazetteer to coordinates.
+    """
+
+    def __init__(
+        self,
+        country: str,
+        zones: List[Dict[str, Any]],
+        states: List[Dict[str, Any]],
+        gazetteer=None,
+        tolerance_km: float = DEFAULT_TOLERANCE_KM
+    ):
+        """
+        Initialize the resolver
+
+        Args:
+            country: ISO country code the regions belong to
+            zones: Zone dictionaries with id, number, name and aliases
+            states: State dictionaries with id, name, aliases, zone and polygon ([lon, lat] vertices)
+            gazetteer: Optional Gazetteer for resolving city names to coordinates
+            tolerance_km: Distance within which a point outside every polygon snaps to the nearest
+
+        Raises:
+            ValueError: If a state refers to an unknown zone or has fewer than three vertices
+        """
+        self.country = country
+        self.gazetteer = gazetteer
+        self.tolerance_km = tolerance_km
+        self.zones = {zone["id"]: zone for zone in zones}
+        self.states = states
+        self._rings: List[np.ndarray] = []
+        self._areas: List[float] = []
+        boxes = []
+        for state in states:
+            if state["zone"] not in self.zones:
+                raise ValueError(f"State {state['name']} refers to unknown zone {state['zone']}")
+            ring = np.asarray(state["polygon"], dtype=float)
+            if ring.ndim != 2 or ring.shape[0] < 3 or ring.shape[1] != 2:
+                raise ValueError(f"State {state['name']} needs a polygon of at least three [lon, lat] vertices")
+            self._rings.append(ring)
+            self._areas.append(self._area(ring))
+            boxes.append((ring[:, 0].min(), ring[:, 1].min(), ring[:, 0].max(), ring[:, 1].max()))
+        self._tree = STRTree(boxes)
+
+        # Normalised name -> (state index or None, zone id or None)
+        self._names: Dict[str, Tuple[Optional[int], Optional[str]]] = {}
+        for name in [country, "India", "Bharat"] if country == "IN" else [country]:
+            self._names[normalize_name(name)] = (None, None)
+        for zone in zones:
+            for name in [zone["name"]] + zone.get("aliases", []):
+                self._names[normalize_name(name)] = (None, zone["id"])
+        for index, state in enumerate(states):
+            for name in [state["name"]] + state.get("aliases", []):
+                self._names[normalize_name(name)] = (index, state["zone"])
+
+    @classmethod
+    def load(
+        cls,
+        path: str = DEFAULT_REGIONS_PATH,
+        gazetteer=None,
+        tolerance_km: float = DEFAULT_TOLERANCE_KM
+    ) -> "RegionResolver":
+        """
+        Load regions from a JSON file
+
+        Args:
+            path: Regions file path
+            gazetteer: Optional Gazetteer for resolving city names to coordinates
+            tolerance_km: Distance within which a point outside every polygon snaps to the nearest
+
+        Returns:
+            RegionResolver instance
+        """
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+        return cls(data["country"], data["zones"], data["states"], gazetteer=gazetteer, tolerance_km=tolerance_km)
+
+    def __len__(self) -> int:
+        return len(self.states)
+
+    def locate(self, lat: float, lon: float) -> Optional[RegionMatch]:
+        """
+        Find the state and zone containing a point
+
+        Args:
+            lat: Latitude
+            lon: Longitude
+
+        Returns:
+            RegionMatch or None if the point is in no state (nor within tolerance_km of one)
+        """
+        containing = [
+            index for index in self._tree.query_point(lon, lat)
+            if point_in_polygon(lat, lon, self._rings[index])
+        ]
+        if containing:
+            return self._match(min(containing, key=lambda index: self._areas[index]))
+
+        if self.tolerance_km <= 0:
+            return None
+        margin_lat = self.tolerance_km / (math.pi * EARTH_RADIUS_KM / 180)
+        margin_lon = margin_lat / max(math.cos(math.radians(lat)), 0.01)
+        nearby = self._tree.query_box((lon - margin_lon, lat - margin_lat, lon + margin_lon, lat + margin_lat))
+        distances = [(polygon_distance_km(lat, lon, self._rings[index]), index) for index in nearby]
+        distance, index = min(distances, default=(math.inf, None))
+        return self._match(index) if distance <= self.tolerance_km else None
+
+    def lookup(self, name: str) -> Optional[RegionMatch]:
+        """
+        Find a state, zone or the country by name
+
+        Args:
+            name: State, zone or country name or alias
+
+        Returns:
+            RegionMatch (state fields are None for a zone, all but country for the country) or None
+        """
+        entry = self._names.get(normalize_name(name))
+        if entry is None:
+            return None
+        index, zone_id = entry
+        if index is not None:
+            return self._match(index)
+        if zone_id is not None:
+            zone = self.zones[zone_id]
+            return RegionMatch(self.country, zone_id=zone_id, zone=zone["name"], zone_number=zone["number"])
+        return RegionMatch(self.country)
+
+    def resolve(self, location: str) -> Optional[RegionMatch]:
+        """
+        Find the state and zone a location string refers to
+
+        Args:
+            location: "lat,lon", a state, zone or country name, or a place the
+                gazetteer knows, optionally qualified ("Pune, Maharashtra, India")
+
+        Returns:
+            RegionMatch, or None if the location is not in this country or not recognised
+        """
+        coordinates = parse_coordinates(location)
+        if coordinates is not None:
+            return self.locate(*coordinates)
+
+        parts = [part for part in location.split(",") if normalize_name(part)]
+        if not parts:
+            return None
+        match = self.lookup(parts[0])
+        if match is not None:
+            return match
+
+        place = self.gazetteer.lookup(location, fuzzy=False) if self.gazetteer is not None else None
+        if place is not None:
+            if place.country != self.country:
+                return None
+            if place.kind == "city":
+                return self.locate(place.lat, place.lon)
+            return self.lookup(place.name)
+
+        # Unknown place; fall back to the most specific qualifier we know
+        matches = [match for match in (self.lookup(part) for part in parts[1:]) if match is not None]
+        for match in matches:
+            if match.state_id is not None:
+                return match
+        return matches[0] if matches else None
+
+    def _match(self, index: int) -> RegionMatch:
+        state = self.states[index]
+        zone = self.zones[state["zone"]]
+        return RegionMatch(self.country, state["id"], state["name"], zone["id"], zone["name"], zone["number"])
+
+    @staticmethod
+    def _area(ring: np.ndarray) -> float:
+        """Planar area of a ring in square degrees (shoelace formula)"""
+        x, y = ring[:, 0], ring[:, 1]
+        return abs(float(np.dot(x, np.roll(y, -1)) - np.dot(y, np.roll(x, -1)))) / 2
@@ -0,0 +1,376 @@
+import time
+import threading
+from collections import OrderedDict, deque
+from itertools import combinations
+from typing import Dict, Any, List, Optional, Iterable, Tuple
+
+# Fields returned by /api/environmental-data
+ENVIRONMENTAL_FIELDS = ["air_quality", "water_quality", "uv_index", "pollen_count", "weather"]
+
+# Upstream sources with their relative cost per call, typical latency in
+# seconds, how long a result stays fresh, the fields they can supply and
+# the sources that must run first. Costs are relative units (one Tavily
+# advanced search = 2 credits; OpenWeather calls are near-free except the
+# One Call 3.0 endpoint used for UV).
+SOURCES: Dict[str, Dict[str, Any]] = {
+    "tavily": {
+        "cost": 2.0, "latency": 3.0, "max_age": 3600,
+        "provides": ["air_quality", "water_quality"], "requires": []
+    },
+    "geocode": {
+        "cost": 0.01, "latency": 0.3, "max_age": 7 * 24 * 3600,
+        "provides": [], "requires": []
+    },
+    "weather": {
+        "cost": 0.01, "latency": 0.3, "max_age": 600,
+        "provides": ["weather"], "requires": ["geocode"]
+    },
+    "air_pollution": {
+        "cost": 0.01, "latency": 0.3, "max_age": 1800,
+        "provides": ["air_quality"], "requires": ["geocode"]
+    },
+    "uv": {
+        "cost": 0.15, "latency": 0.4, "max_age": 3600,
+        "provides": ["uv_index"], "requires": ["geocode"]
+    },
+    "pollen": {
+        "cost": 0.0, "latency": 0.0, "max_age": 3600,
+        "provides": ["pollen_count"], "requires": []
+    },
+}
+
+
+class SourceCache:
+    """
+    In-memory cache of raw upstream results per source and location
+
+    Holds at most max_entries results, evicting the least recently used,
+    and drops results older than max_age when they are next touched.
+    """
+
+    def __init__(self, max_entries: int = 10000, max_age: Optional[float] = None):
+        """
+        Initialize an empty source cache
+
+        Args:
+            max_entries: Maximum number of cached results
+            max_age: Age in seconds after which a result is discarded; defaults
+                to the longest max_age of any source
+        """
+        if max_entries < 1:
+            raise ValueError("max_entries must be at least 1")
+        self.max_entries = max_entries
+        self.max_age = max(source["max_age"] for source in SOURCES.values()) if max_age is None else max_age
+        self._entries: "OrderedDict[Tuple[str, str], Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, source: str, key: str, max_age: float) -> Optional[Any]:
+        """
+        Get a cached result if it is fresh enough
+
+        Args:
+            source: Source name
+            key: Location key
+            max_age: Maximum acceptable age in seconds
+
+        Returns:
+            Cached value or None
+        """
+        with self._lock:
+            entry = self._lookup((source, key))
+        if entry is None or time.time() - entry[0] > max_age:
+            return None
+        return entry[1]
+
+    def age(self, source: str, key: str) -> Optional[float]:
+        """
+        Get the age of a cached result
+
+        Args:
+            source: Source name
+            key: Location key
+
+        Returns:
+            Age in seconds or None if not cached
+        """
+        with self._lock:
+            entry = self._lookup((source, key))
+        return None if entry is None else time.time() - entry[0]
+
+    def put(self, source: str, key: str, value: Any) -> None:
+        """
+        Store a result
+
+        Args:
+            source: Source name
+            key: Location key
+            value: Raw source result
+        """
+        with self._lock:
+            self._store((source, key), (time.time(), value))
+
+    def copy(self, from_key: str, to_key: str) -> None:
+        """
+        Copy every result cached under one location key to another, keeping
+        their age and leaving results already cached under to_key alone
+
+        Args:
+            from_key: Location key to copy from
+            to_key: Location key to copy to
+        """
+        with self._lock:
+            for (source, key), entry in list(self._entries.items()):
+                if key == from_key and (source, to_key) not in self._entries:
+                    self._store((source, to_key), entry)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _lookup(self, entry_key: Tuple[str, str]) -> Optional[Tuple[float, Any]]:
+        """Get an entry and mark it recently used, dropping it if expired; caller holds the lock"""
+        entry = self._entries.get(entry_key)
+        if entry is None:
+            return None
+        if time.time() - entry[0] > self.max_age:
+            del self._entries[entry_key]
+            return None
+        self._entries.move_to_end(entry_key)
+        return entry
+
+    def _store(self, entry_key: Tuple[str, str], entry: Tuple[float, Any]) -> None:
+        """Store an entry, evicting the least recently used beyond max_entries; caller holds the lock"""
+        self._entries[entry_key] = entry
+        self._entries.move_to_end(entry_key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+
+class SourcePlan:
+    """
+    The upstream calls chosen for one request
+    """
+
+    def __init__(
+        self,
+        fields: List[str],
+        fetch: List[str],
+        cached: List[str],
+        cost: float,
+        latency: float,
+        baseline_cost: float,
+        reasons: Dict[str, str]
+    ):
+        self.fields = fields
+        self.fetch = fetch
+        self.cached = cached
+        self.cost = cost
+        self.latency = latency
+        self.baseline_cost = baseline_cost
+        self.reasons = reasons
+
+    def uses(self, source: str) -> bool:
+        """Check whether the plan reads a source, from upstream or cache"""
+        return source in self.fetch or source in self.cached
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "fields": self.fields,
+            "fetch": self.fetch,
+            "cached": self.cached,
+            "estimated_cost": round(self.cost, 4),
+            "estimated_latency": round(self.latency, 3),
+            "baseline_cost": round(self.baseline_cost, 4),
+            "reasons": self.reasons
+        }
+
+
+class SourcePlanner:
+    """
+    Chooses the cheapest set of upstream calls that can answer a request
+
+    Fresh cached results are free. Among the remaining sources every subset
+    is costed (there are only a handful), the cheapest one that covers the
+    requested fields within the deadline wins, and each decision is logged
+    together with the cost saved against calling every source.
+    """
+
+    def __init__(
+        self,
+        cache: SourceCache,
+        sources: Optional[Dict[str, Dict[str, Any]]] = None,
+        audit_size: int = 500
+    ):
+        """
+        Initialize the planner
+
+        Args:
+            cache: Source cache consulted for fresh results
+            sources: Source table; defaults to SOURCES
+            audit_size: Number of recent decisions kept for auditing
+        """
+        self.cache = cache
+        self.sources = sources if sources is not None else SOURCES
+        self.latency = {name: spec["latency"] for name, spec in self.sources.items()}
+        self.audit = deque(maxlen=audit_size)
+        self.total_cost = 0.0
+        self.total_baseline_cost = 0.0
+        self.plans = 0
+        self._lock = threading.Lock()
+
+    def plan(
+        self,
+        key: str,
+        fields: Optional[Iterable[str]] = None,
+        deadline: Optional[float] = None,
+        max_age: Optional[Dict[str, float]] = None
+    ) -> SourcePlan:
+        """
+        Plan the upstream calls for a request
+
+        Args:
+            key: Location key used for cache lookups
+            fields: Requested fields; defaults to all environmental fields
+            deadline: Optional latency budget in seconds
+            max_age: Optional per-source freshness overrides in seconds
+
+        Returns:
+            SourcePlan describing the calls to make
+        """
+        fields = list(fields) if fields is not None else list(ENVIRONMENTAL_FIELDS)
+        max_age = max_age or {}
+
+        providable = {field for spec in self.sources.values() for field in spec["provides"]}
+        unknown = [field for field in fields if field not in providable]
+        if unknown:
+            raise ValueError(f"Unknown fields: {', '.join(unknown)}")
+
+        cached = [
+            name for name, spec in self.sources.items()
+            if self.cache.get(name, key, max_age.get(name, spec["max_age"])) is not None
+        ]
+        candidates = [name for name in self.sources if name not in cached]
+
+        # Options are ranked by requested fields covered, then cost, then latency;
+        # under a deadline only plans that fit it are considered
+        best = None
+        for size in range(len(candidates) + 1):
+            for subset in combinations(candidates, size):
+                chosen = set(subset) | set(cached)
+                if not self._dependencies_met(subset, chosen):
+                    continue
+                latency = self._critical_path(subset)
+                if deadline is not None and latency > deadline:
+                    continue
+                covered = self._covered(chosen, fields)
+                cost = sum(self.sources[name]["cost"] for name in subset)
+                option = (-len(covered), cost, latency, subset)
+                if best is None or option[:3] < best[:3]:
+                    best = option
+
+        reasons = {}
+        _, cost, latency, subset = best
+        omitted = [field for field in fields if field not in self._covered(set(subset) | set(cached), fields)]
+        if omitted:
+            reasons["deadline"] = f"no plan covering every field fits {deadline}s; omitting {', '.join(omitted)}"
+
+        fetch = [name for name in self.sources if name in subset]
+        needed_cached = [name for name in cached if self._needed(name, fields)]
+        dependencies = {dep for name in fetch + needed_cached for dep in self.sources[name]["requires"]}
+        for name in self.sources:
+            if name in cached:
+                reasons[name] = f"cached ({self.cache.age(name, key):.0f}s old)"
+            elif name in fetch:
+                reasons[name] = "fetch for " + (", ".join(f for f in self.sources[name]["provides"] if f in fields) or "dependencies")
+            elif any(f in omitted for f in self.sources[name]["provides"]):
+                reasons[name] = "skipped: too slow for the deadline"
+            elif any(f in fields for f in self.sources[name]["provides"]):
+                reasons[name] = "skipped: fields covered more cheaply"
+            else:
+                reasons[name] = "skipped: fields not requested"
+
+        plan = SourcePlan(
+            fields=fields,
+            fetch=fetch,
+            cached=[name for name in cached if name in needed_cached or name in dependencies],
+            cost=cost,
+            latency=latency,
+            baseline_cost=sum(spec["cost"] for spec in self.sources.values()),
+            reasons=reasons
+        )
+        self._record(key, plan)
+        return plan
+
+    def is_cached(self, key: str, fields: Optional[Iterable[str]] = None) -> bool:
+        """
+        Check whether fresh cached results alone can answer a request
+
+        Args:
+            key: Location key used for cache lookups
+            fields: Requested fields; defaults to all environmental fields
+
+        Returns:
+            True if no upstream call would be needed
+        """
+        fields = list(fields) if fields is not None else list(ENVIRONMENTAL_FIELDS)
+        cached = [
+            name for name, spec in self.sources.items()
+            if self.cache.get(name, key, spec["max_age"]) is not None
+        ]
+        return len(self._covered(cached, fields)) == len(fields)
+
+    def observe(self, source: str, seconds: float) -> None:
+        """
+        Feed an observed upstream latency back into the estimates
+
+        Args:
+            source: Source name
+            seconds: Observed latency
+        """
+        with self._lock:
+            previous = self.latency.get(source, seconds)
+            self.latency[source] = 0.8 * previous + 0.2 * seconds
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Summarise planner decisions
+
+        Returns:
+            Dictionary of totals, latency estimates and recent decisions
+        """
+        with self._lock:
+            return {
+                "plans": self.plans,
+                "total_cost": round(self.total_cost, 4),
+                "baseline_cost": round(self.total_baseline_cost, 4),
+                "saved_cost": round(self.total_baseline_cost - self.total_cost, 4),
+                "latency_estimates": {name: round(value, 3) for name, value in self.latency.items()},
+                "recent": list(self.audit)[-20:]
+            }
+
+    def _covered(self, chosen, fields) -> List[str]:
+        provided = {field for name in chosen for field in self.sources[name]["provides"]}
+        return [field for field in fields if field in provided]
+
+    def _dependencies_met(self, subset, chosen) -> bool:
+        return all(dep in chosen for name in subset for dep in self.sources[name]["requires"])
+
+    def _needed(self, name, fields) -> bool:
+        return any(field in fields for field in self.sources[name]["provides"])
+
+    def _critical_path(self, subset) -> float:
+        subset = set(subset)
+        longest = 0.0
+        for name in subset:
+            path = self.latency[name] + sum(
+                self.latency[dep] for dep in self.sources[name]["requires"] if dep in subset
+            )
+            longest = max(longest, path)
+        return longest
+
+    def _record(self, key: str, plan: SourcePlan) -> None:
+        decision = {"time": int(time.time()), "key": key, **plan.to_dict()}
+        with self._lock:
+            self.plans += 1
+            self.total_cost += plan.cost
+            self.total_baseline_cost += plan.baseline_cost
+            self.audit.append(decision)
@@ -0,0 +1,268 @@
+import threading
+import time
+import warnings
+from typing import Any, Dict, Iterable, List, Optional
+
+import numpy as np
+
+from utils.spatial_index import SpatialIndex
+
+# Pollutants kept per station, as OpenWeather component names in µg/m³ so
+# aggregates can go straight into utils.aqi
+STATION_POLLUTANTS = ["pm2_5", "pm10", "o3", "no2", "so2", "co"]
+
+# Distances are floored at this value so a station next to the query point
+# does not take all the weight
+MIN_WEIGHT_DISTANCE_KM = 0.5
+
+# Outliers are only judged among at least this many readings of a pollutant
+MIN_READINGS_FOR_REJECTION = 4
+
+
+class StationStore:
+    """
+    Readings of individual monitoring stations, aggregated by radius
+
+    Station coordinates, observation times and readings are held in NumPy
+    columns (one row per station, one reading column per pollutant, NaN
+    where a station does not measure a pollutant) behind a spatial index.
+    A radius query selects the fresh stations in range and computes every
+    pollutant's inverse-distance weighted mean in one pass, after rejecting
+    readings whose modified z-score (distance from the median in units of
+    the median absolute deviation) exceeds outlier_threshold.
+    """
+
+    def __init__(
+        self,
+        max_age: float = 3 * 3600,
+        power: float = 2.0,
+        outlier_threshold: float = 3.5,
+        cell_deg: float = 0.25,
+        initial_capacity: int = 1024
+    ):
+        """
+        Initialize an empty store
+
+        Args:
+            max_age: Seconds after which a station's readings are ignored
+            power: Inverse-distance weighting exponent
+            outlier_threshold: Modified z-score above which a reading is rejected
+            cell_deg: Spatial index cell size in degrees
+            initial_capacity: Initial number of station rows
+        """
+        self.max_age = max_age
+        self.power = power
+        self.outlier_threshold = outlier_threshold
+        self.pollutants = list(STATION_POLLUTANTS)
+        self._columns = {pollutant: column for column, pollutant in enumerate(self.pollutants)}
+        self._lats = np.zeros(initial_capacity)
+        self._lons = np.zeros(initial_capacity)
+        self._observed = np.zeros(initial_capacity)
+        self._readings = np.full((initial_capacity, len(self.pollutants)), np.nan)
+        self._ids: List[Optional[str]] = [None] * initial_capacity
+        self._slots: Dict[str, int] = {}
+        self._free: List[int] = []
+        self._size = 0
+        # Keyed by row, so query results index the columns directly
+        self._index = SpatialIndex(cell_deg)
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._slots)
+
+    def upsert(
+        self,
+        station_id: str,
+        lat: float,
+        lon: float,
+        readings: Dict[str, float],
+        observed_at: Optional[float] = None
+    ) -> None:
+        """
+        Add a station or replace its position and readings
+
+        Args:
+            station_id: Station identifier
+            lat: Latitude
+            lon: Longitude
+            readings: Pollutant name (see STATION_POLLUTANTS) to concentration in µg/m³
+            observed_at: Unix time of the readings; defaults to now
+
+        Raises:
+            ValueError: If the coordinates are invalid or a pollutant is unknown
+        """
+        self._store(station_id, lat, lon, self._row(station_id, lat, lon, readings), observed_at)
+
+    def upsert_many(self, stations: Iterable[Dict[str, Any]]) -> int:
+        """
+        Add or replace several stations
+
+        Every station is validated before any is stored.
+
+        Args:
+            stations: Dictionaries with id, lat, lon, readings and optional observed_at
+
+        Returns:
+            Number of stations stored
+
+        Raises:
+            ValueError: If any station has invalid coordinates or an unknown pollutant
+        """
+        rows = [
+            (station, self._row(station["id"], station["lat"], station["lon"], station.get("readings", {})))
+            for station in stations
+        ]
+        for station, row in rows:
+            self._store(station["id"], station["lat"], station["lon"], row, station.get("observed_at"))
+        return len(rows)
+
+    def remove(self, station_id: str) -> bool:
+        """
+        Remove a station
+
+        Args:
+            station_id: Station identifier
+
+        Returns:
+            True if the station was stored
+        """
+        with self._lock:
+            slot = self._slots.pop(station_id, None)
+            if slot is None:
+                return False
+            self._index.remove(slot)
+            self._ids[slot] = None
+            self._readings[slot] = np.nan
+            self._free.append(slot)
+            return True
+
+    def aggregate(
+        self,
+        lat: float,
+        lon: float,
+        radius_km: float,
+        now: Optional[float] = None
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Combine the readings of the fresh stations within a radius
+
+        Args:
+            lat: Query latitude
+            lon: Query longitude
+            radius_km: Search radius in kilometres
+            now: Unix time used for the freshness check; defaults to now
+
+        Returns:
+            Dictionary with readings (pollutant -> weighted mean in µg/m³),
+            station_counts and rejected (readings used and dropped per
+            pollutant), stations, nearest_km and radius_km; None if no fresh
+            station in range has a usable reading
+        """
+        now = time.time() if now is None else now
+        with self._lock:
+            slots, distances = self._index.query_radius(lat, lon, radius_km)
+            slots = np.fromiter(slots, dtype=np.intp, count=len(slots))
+            fresh = self._observed[slots] >= now - self.max_age
+            slots, distances = slots[fresh], distances[fresh]
+            values = self._readings[slots]
+        if not slots.size:
+            return None
+
+        present = ~np.isnan(values)
+        with warnings.catch_warnings():
+            # Pollutants no station in range measures are all-NaN columns
+            warnings.simplefilter("ignore", RuntimeWarning)
+            median = np.nanmedian(values, axis=0)
+            deviation = np.abs(values - median)
+            # 1.4826 x MAD estimates the standard deviation; when over half of
+            # the readings are identical MAD is 0, so fall back to the mean
+            # absolute deviation (Iglewicz and Hoaglin)
+            mad = np.nanmedian(deviation, axis=0)
+            scale = np.where(mad > 0, 1.4826 * mad, 1.2533 * np.nanmean(deviation, axis=0))
+        with np.errstate(invalid="ignore", divide="ignore"):
+            score = np.where(deviation > 0, deviation / scale, 0.0)
+        counts = present.sum(axis=0)
+        rejected = present & (score > self.outlier_threshold) & (counts >= MIN_READINGS_FOR_REJECTION)
+        used = present & ~rejected
+
+        weights = np.where(used, 1.0 / np.maximum(distances, MIN_WEIGHT_DISTANCE_KM)[:, None] ** self.power, 0.0)
+        total = weights.sum(axis=0)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            means = np.where(total > 0, (weights * np.nan_to_num(values)).sum(axis=0) / total, np.nan)
+
+        measured = [column for column in range(len(self.pollutants)) if total[column] > 0]
+        if not measured:
+            # Stations in range, but none reported a pollutant
+            return None
+        return {
+            "readings": {self.pollutants[column]: round(float(means[column]), 2) for column in measured},
+            "station_counts": {self.pollutants[column]: int(used[:, column].sum()) for column in measured},
+            "rejected": {
+                self.pollutants[column]: int(rejected[:, column].sum())
+                for column in range(len(self.pollutants)) if rejected[:, column].any()
+            },
+            "stations": int(used.any(axis=1).sum()),
+            "nearest_km": round(float(distances.min()), 3),
+            "radius_km": radius_km
+        }
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Summarise the store
+
+        Returns:
+            Dictionary with station counts and per-pollutant coverage
+        """
+        with self._lock:
+            slots = np.fromiter(self._slots.values(), dtype=np.intp, count=len(self._slots))
+            fresh = self._observed[slots] >= time.time() - self.max_age
+            measured = ~np.isnan(self._readings[slots])
+            return {
+                "stations": len(slots),
+                "fresh": int(fresh.sum()),
+                "capacity": len(self._ids),
+                "measuring": {
+                    pollutant: int(measured[:, column].sum()) for pollutant, column in self._columns.items()
+                }
+            }
+
+    def _row(self, station_id: str, lat: float, lon: float, readings: Dict[str, float]) -> np.ndarray:
+        """Validate a station and lay its readings out as a row"""
+        if not (-90 <= lat <= 90 and -180 <= lon <= 180):
+            raise ValueError(f"Invalid coordinates for station {station_id}")
+        row = np.full(len(self.pollutants), np.nan)
+        for pollutant, value in readings.items():
+            if pollutant not in self._columns:
+                raise ValueError(f"Unknown pollutant for station {station_id}: {pollutant}")
+            if value is not None:
+                row[self._columns[pollutant]] = float(value)
+        return row
+
+    def _store(self, station_id: str, lat: float, lon: float, row: np.ndarray, observed_at: Optional[float]) -> None:
+        with self._lock:
+            slot = self._slots.get(station_id)
+            if slot is None:
+                slot = self._allocate()
+                self._ids[slot] = station_id
+                self._slots[station_id] = slot
+            self._lats[slot] = lat
+            self._lons[slot] = lon
+            self._observed[slot] = observed_at if observed_at is not None else time.time()
+            self._readings[slot] = row
+            self._index.insert(slot, lat, lon)
+
+    def _allocate(self) -> int:
+        """Row for a new station (lock held)"""
+        if self._free:
+            return self._free.pop()
+        if self._size == len(self._ids):
+            capacity = len(self._ids) * 2
+            self._lats = np.resize(self._lats, capacity)
+            self._lons = np.resize(self._lons, capacity)
+            self._observed = np.resize(self._observed, capacity)
+            readings = np.full((capacity, len(self.pollutants)), np.nan)
+            readings[:self._size] = self._readings
+            self._readings = readings
+            self._ids.extend([None] * (capacity - len(self._ids)))
+        self._size += 1
+        return self._size - 1
@@ -1,8 +1,9 @@
-import httpx
 from typing import Dict, Any, List, Optional
 import json
 import asyncio
 
+from services import upstream
+
 class TavilyChatService:
     """
     Service for using Tavily API for chat functionality
@@ -295,23 +296,22 @@ class TavilyChatService:
         
         try:
             # Make API request
-            async with httpx.AsyncClient(timeout=12.0) as client:  # 12 second timeout
-                print(f"Sending request to Tavily API: {url}")
-                response = await client.post(url, json=payload)
-                
-                print(f"Tavily API response status: {response.status_code}")
-                
-                if response.status_code == 200:
-                    result = response.json()
-                    print(f"Tavily API response successful with {len(result.get('results', []))} results")
-                    return result
-                else:
-                    error_message = f"Tavily API error: {response.status_code} - {response.text}"
-                    print(error_message)
-                    return {
-                        "error": error_message,
-                        "results": []
-                    }
+            print(f"Sending request to Tavily API: {url}")
+            response = await upstream.request("tavily", "POST", url, json=payload, timeout=12.0)  # 12 second timeout
+            
+            print(f"Tavily API response status: {response.status_code}")
+            
+            if response.status_code == 200:
+                result = response.json()
+                print(f"Tavily API response successful with {len(result.get('results', []))} results")
+                return result
+            else:
+                error_message = f"Tavily API error: {response.status_code} - {response.text}"
+                print(error_message)
+                return {
+                    "error": error_message,
+                    "results": []
+                }
         except Exception as e:
             print(f"Exception during Tavily API request: {str(e)}")
             return {
@@ -1,6 +1,7 @@
-import httpx
 from typing import Dict, Any, List, Optional
 
+from services import upstream
+
 class TavilyService:
     """
     Service for interacting with Tavily API for search and data retrieval
@@ -55,18 +56,17 @@ class TavilyService:
             payload["exclude_domains"] = exclude_domains
         
         # Make API request
-        async with httpx.AsyncClient() as client:
-            response = await client.post(url, json=payload)
-            
-            if response.status_code == 200:
-                return response.json()
-            else:
-                error_message = f"Tavily API error: {response.status_code} - {response.text}"
-                print(error_message)
-                return {
-                    "error": error_message,
-                    "results": []
-                }
+        response = await upstream.request("tavily", "POST", url, json=payload)
+        
+        if response.status_code == 200:
+            return response.json()
+        else:
+            error_message = f"Tavily API error: {response.status_code} - {response.text}"
+            print(error_message)
+            return {
+                "error": error_message,
+                "results": []
+            }
     
     async def search_with_context(
         self, 
@@ -99,15 +99,14 @@ class TavilyService:
         }
         
         # Make API request
-        async with httpx.AsyncClient() as client:
-            response = await client.post(url, json=payload)
-            
-            if response.status_code == 200:
-                return response.json()
-            else:
-                error_message = f"Tavily API error: {response.status_code} - {response.text}"
-                print(error_message)
-                return {
-                    "error": error_message,
-                    "results": []
-                }
+        response = await upstream.request("tavily", "POST", url, json=payload)
+        
+        if response.status_code == 200:
+            return response.json()
+        else:
+            error_message = f"Tavily API error: {response.status_code} - {response.text}"
+            print(error_message)
+            return {
+                "error": error_message,
+                "results": []
+            }
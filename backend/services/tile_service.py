@@ -0,0 +1,298 @@
+import asyncio
+import math
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+import numpy as np
+
+from utils.geo import haversine_km, inverse_distance_weighting, mercator_lat, mercator_lon, mercator_x, mercator_y
+from utils.png import encode_png
+from utils.spatial_index import KM_PER_DEGREE
+
+TILE_SIZE = 256
+MAX_ZOOM = 18
+EQUATOR_KM = 40075.017
+
+# Heat-map layers: where the reading lives in a region document and the
+# colour ramp as (value, (r, g, b)) stops. AQI and PM2.5 follow the US EPA
+# category colours.
+TILE_LAYERS: Dict[str, Dict[str, Any]] = {
+    "aqi": {
+        "path": ("air_quality", "aqi"),
+        "stops": [(0, (0, 228, 0)), (50, (0, 228, 0)), (100, (255, 255, 0)), (150, (255, 126, 0)),
+                  (200, (255, 0, 0)), (300, (143, 63, 151)), (500, (126, 0, 35))]
+    },
+    "pm25": {
+        "path": ("air_quality", "pm25"),
+        "stops": [(0, (0, 228, 0)), (12, (0, 228, 0)), (35.4, (255, 255, 0)), (55.4, (255, 126, 0)),
+                  (150.4, (255, 0, 0)), (250.4, (143, 63, 151)), (500, (126, 0, 35))]
+    },
+    "uv": {
+        "path": ("uv_index",),
+        "stops": [(0, (41, 149, 0)), (3, (247, 228, 0)), (6, (248, 89, 0)), (8, (216, 0, 29)), (11, (107, 73, 200))]
+    },
+    "temperature": {
+        "path": ("weather", "temperature"),
+        "stops": [(-10, (49, 54, 149)), (0, (116, 173, 209)), (15, (171, 221, 164)), (25, (254, 224, 139)),
+                  (35, (244, 109, 67)), (45, (165, 0, 38))]
+    },
+}
+
+
+class TileService:
+    """
+    Heat-map tiles interpolated from region readings
+
+    Each tile is rendered by inverse-distance weighting of the readings
+    near it, computed for a coarse grid of points in one vectorised pass and
+    upsampled bilinearly to 256 x 256 pixels. Readings influence points up
+    to max_distance_km away, widened at low zoom so that world-scale tiles
+    are not mostly empty. Rendered tiles are cached per layer and zoom
+    level; when a region changes only the cached tiles within its influence
+    distance are dropped.
+    """
+
+    def __init__(
+        self,
+        appwrite_service,
+        power: float = 2.0,
+        max_distance_km: float = 150.0,
+        resolution: int = 64,
+        max_tiles_per_zoom: int = 512,
+        opacity: int = 170
+    ):
+        """
+        Initialize the tile service
+
+        Args:
+            appwrite_service: AppwriteService whose indexed regions supply readings
+            power: IDW distance exponent
+            max_distance_km: Readings further away than this have no influence
+                (at zoom levels where a grid cell is smaller than this)
+            resolution: Interpolation grid size per tile side (a divisor of 256)
+            max_tiles_per_zoom: Cached tiles kept per layer and zoom level
+            opacity: Alpha of a pixel right at a reading
+        """
+        if TILE_SIZE % resolution:
+            raise ValueError(f"Resolution must divide {TILE_SIZE}")
+        self.appwrite_service = appwrite_service
+        self.power = power
+        self.max_distance_km = max_distance_km
+        self.resolution = resolution
+        self.max_tiles_per_zoom = max_tiles_per_zoom
+        self.opacity = opacity
+        self._tiles: Dict[Tuple[str, int], "OrderedDict[Tuple[int, int], bytes]"] = {}
+        self._empty = encode_png(np.zeros((TILE_SIZE, TILE_SIZE, 4), dtype=np.uint8))
+        self.hits = 0
+        self.misses = 0
+        self.invalidated = 0
+        self._generation = 0
+        appwrite_service.region_listeners.append(self.on_region_changed)
+
+    async def get_tile(self, layer: str, z: int, x: int, y: int) -> bytes:
+        """
+        Get a heat-map tile
+
+        Readings are collected on the event loop, but interpolation and PNG
+        encoding run in the default executor: a low-zoom tile over many
+        regions takes seconds and would otherwise stall every other request.
+
+        Args:
+            layer: Layer name from TILE_LAYERS
+            z: Zoom level
+            x: Tile column
+            y: Tile row
+
+        Returns:
+            PNG image
+
+        Raises:
+            ValueError: If the layer is unknown or the tile is out of range
+        """
+        if layer not in TILE_LAYERS:
+            raise ValueError(f"Unknown layer: {layer}")
+        if not 0 <= z <= MAX_ZOOM or not (0 <= x < 2 ** z and 0 <= y < 2 ** z):
+            raise ValueError(f"Tile {z}/{x}/{y} is out of range")
+
+        cache = self._tiles.setdefault((layer, z), OrderedDict())
+        tile = cache.get((x, y))
+        if tile is not None:
+            cache.move_to_end((x, y))
+            self.hits += 1
+            return tile
+
+        self.misses += 1
+        generation = self._generation
+        lats, lons = self._grid(z, x, y)
+        influence = self.influence_km(z)
+        readings = self._readings(layer, lats, lons, influence)
+        if readings is None:
+            tile = self._empty
+        else:
+            tile = await asyncio.get_running_loop().run_in_executor(
+                None, self._draw, layer, lats, lons, influence, readings
+            )
+        # A region that changed while the tile was drawn may have made it stale
+        if generation == self._generation:
+            cache[(x, y)] = tile
+            while len(cache) > self.max_tiles_per_zoom:
+                cache.popitem(last=False)
+        return tile
+
+    def render(self, layer: str, z: int, x: int, y: int) -> bytes:
+        """
+        Render a tile without consulting the cache
+
+        Args:
+            layer: Layer name
+            z: Zoom level
+            x: Tile column
+            y: Tile row
+
+        Returns:
+            PNG image
+        """
+        lats, lons = self._grid(z, x, y)
+        influence = self.influence_km(z)
+        readings = self._readings(layer, lats, lons, influence)
+        if readings is None:
+            return self._empty
+        return self._draw(layer, lats, lons, influence, readings)
+
+    def influence_km(self, z: int) -> float:
+        """
+        Distance within which readings affect a point at a zoom level
+
+        Args:
+            z: Zoom level
+
+        Returns:
+            max_distance_km, or two grid cells if those are wider
+        """
+        cell_km = EQUATOR_KM / (2 ** z * self.resolution)
+        return max(self.max_distance_km, 2 * cell_km)
+
+    def on_region_changed(self, previous: Optional[Dict[str, Any]], current: Optional[Dict[str, Any]]) -> None:
+        """
+        Drop the cached tiles a changed region influences
+
+        Args:
+            previous: Region document before the change, if any
+            current: Region document after the change, if any
+        """
+        self._generation += 1
+        for region in (previous, current):
+            if region is None or not self._tiles:
+                continue
+            lat, lon = float(region["lat"]), float(region["lon"])
+            for (_, z), cache in self._tiles.items():
+                dlat = self.influence_km(z) / KM_PER_DEGREE
+                dlon = dlat / max(math.cos(math.radians(min(89.0, abs(lat) + dlat))), 1e-6)
+                if dlon >= 180 or lon - dlon < -180 or lon + dlon > 180:
+                    x_min, x_max = 0.0, 1.0
+                else:
+                    x_min, x_max = float(mercator_x(lon - dlon)), float(mercator_x(lon + dlon))
+                y_min, y_max = float(mercator_y(lat + dlat)), float(mercator_y(lat - dlat))
+
+                tiles = 2 ** z
+                x_range = (math.floor(x_min * tiles), math.floor(x_max * tiles))
+                y_range = (math.floor(y_min * tiles), math.floor(y_max * tiles))
+                touched = [
+                    key for key in cache
+                    if x_range[0] <= key[0] <= x_range[1] and y_range[0] <= key[1] <= y_range[1]
+                ]
+                for key in touched:
+                    del cache[key]
+                self.invalidated += len(touched)
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Summarise the tile cache
+
+        Returns:
+            Dictionary with cached tile counts per layer and zoom and hit counts
+        """
+        cached: Dict[str, Dict[int, int]] = {}
+        for (layer, z), cache in self._tiles.items():
+            cached.setdefault(layer, {})[z] = len(cache)
+        return {"cached": cached, "hits": self.hits, "misses": self.misses, "invalidated": self.invalidated}
+
+    def _readings(
+        self,
+        layer: str,
+        lats: np.ndarray,
+        lons: np.ndarray,
+        influence: float
+    ) -> Optional[Tuple[np.ndarray, np.ndarray, np.ndarray]]:
+        """
+        Collect the readings that can influence a tile
+
+        Returns:
+            (lats, lons, values) arrays, or None if there are none
+        """
+        center_lat, center_lon = float(lats.mean()), float(lons.mean())
+        half_diagonal = float(haversine_km(center_lat, center_lon, lats[0], lons[0]))
+        nearby = self.appwrite_service.region_index.within_radius(
+            center_lat, center_lon, half_diagonal + influence
+        )
+
+        path = TILE_LAYERS[layer]["path"]
+        points = []
+        for region_id, _ in nearby:
+            value = self.appwrite_service.regions.get(region_id)
+            for part in path:
+                value = value.get(part) if isinstance(value, dict) else None
+            if isinstance(value, (int, float)) and not isinstance(value, bool):
+                region = self.appwrite_service.regions[region_id]
+                points.append((float(region["lat"]), float(region["lon"]), float(value)))
+        if not points:
+            return None
+        readings = np.array(points)
+        return readings[:, 0], readings[:, 1], readings[:, 2]
+
+    def _grid(self, z: int, x: int, y: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Latitudes and longitudes of a tile's interpolation grid points"""
+        tiles = 2 ** z
+        offsets = (np.arange(self.resolution) + 0.5) / self.resolution
+        return mercator_lat((y + offsets) / tiles), mercator_lon((x + offsets) / tiles)
+
+    def _draw(
+        self,
+        layer: str,
+        lats: np.ndarray,
+        lons: np.ndarray,
+        influence: float,
+        readings: Tuple[np.ndarray, np.ndarray, np.ndarray]
+    ) -> bytes:
+        """Interpolate readings over a tile's grid and encode the PNG; touches no shared state"""
+        grid_lat, grid_lon = np.meshgrid(lats, lons, indexing="ij")
+        values, nearest = inverse_distance_weighting(
+            grid_lat.ravel(), grid_lon.ravel(), *readings, self.power, influence
+        )
+        values = _upsample(values.reshape(self.resolution, self.resolution), TILE_SIZE)
+        nearest = _upsample(nearest.reshape(self.resolution, self.resolution), TILE_SIZE)
+        return encode_png(self._colour(layer, values, nearest, influence))
+
+    def _colour(self, layer: str, values: np.ndarray, nearest: np.ndarray, influence: float) -> np.ndarray:
+        """Map interpolated values to RGBA, fading out with distance from readings"""
+        stops = TILE_LAYERS[layer]["stops"]
+        stop_values = np.array([stop[0] for stop in stops], dtype=float)
+        rgba = np.zeros(values.shape + (4,), dtype=np.uint8)
+        known = ~np.isnan(values)
+        for channel in range(3):
+            ramp = np.array([stop[1][channel] for stop in stops], dtype=float)
+            rgba[..., channel][known] = np.interp(values[known], stop_values, ramp).astype(np.uint8)
+        fade = np.clip(1.0 - nearest / influence, 0.0, 1.0)
+        rgba[..., 3] = np.where(known, self.opacity * np.sqrt(fade), 0).astype(np.uint8)
+        return rgba
+
+
+def _upsample(grid: np.ndarray, size: int) -> np.ndarray:
+    """Bilinearly resample a square grid of cell-centre samples to size x size"""
+    cells = grid.shape[0]
+    position = np.clip((np.arange(size) + 0.5) * cells / size - 0.5, 0, cells - 1)
+    low = np.floor(position).astype(int)
+    high = np.minimum(low + 1, cells - 1)
+    fraction = position - low
+    rows = grid[low] * (1 - fraction)[:, None] + grid[high] * fraction[:, None]
+    return rows[:, low] * (1 - fraction)[None, :] + rows[:, high] * fraction[None, :]
@@ -0,0 +1,100 @@
+import asyncio
+from typing import Any, Callable, Dict
+
+import httpx
+
+from utils.concurrency import ConcurrencyLimiter, GradientLimit
+
+# Starting and maximum concurrency per upstream. The limits adapt from here:
+# they grow while latency stays flat and back off on 429s, 503s, timeouts
+# and latency inflation.
+UPSTREAM_LIMITS = {
+    "tavily": {"initial": 8, "max_limit": 32},
+    "openweather": {"initial": 20, "max_limit": 100},
+    "appwrite": {"initial": 10, "max_limit": 50},
+}
+
+# Status codes that mean the upstream is shedding load
+THROTTLE_STATUS_CODES = (429, 503)
+
+_limiters: Dict[str, ConcurrencyLimiter] = {}
+
+
+def get_limiter(upstream: str) -> ConcurrencyLimiter:
+    """
+    Get the adaptive limiter for an upstream, creating it on first use
+
+    Args:
+        upstream: Upstream name
+
+    Returns:
+        ConcurrencyLimiter shared by every call to that upstream
+    """
+    if upstream not in _limiters:
+        settings = UPSTREAM_LIMITS.get(upstream, {"initial": 10, "max_limit": 50})
+        _limiters[upstream] = ConcurrencyLimiter(
+            upstream,
+            limit=GradientLimit(initial=settings["initial"], max_limit=settings["max_limit"])
+        )
+    return _limiters[upstream]
+
+
+async def request(upstream: str, method: str, url: str, timeout: float = 5.0, **kwargs) -> httpx.Response:
+    """
+    Make an HTTP request to an upstream under its adaptive concurrency limit
+
+    Args:
+        upstream: Upstream name
+        method: HTTP method
+        url: Request URL
+        timeout: Request timeout in seconds
+        **kwargs: Passed to httpx (params, json, ...)
+
+    Returns:
+        The httpx response
+    """
+    async with get_limiter(upstream).slot() as slot:
+        try:
+            async with httpx.AsyncClient(timeout=timeout) as client:
+                response = await client.request(method, url, **kwargs)
+        except httpx.TimeoutException:
+            slot.dropped = True
+            raise
+        if response.status_code in THROTTLE_STATUS_CODES:
+            slot.dropped = True
+        return response
+
+
+async def call_sync(upstream: str, func: Callable[..., Any], *args, **kwargs) -> Any:
+    """
+    Run a blocking SDK call in a worker thread under the upstream's limit
+
+    Args:
+        upstream: Upstream name
+        func: Blocking function making the outbound call
+        *args: Positional arguments for func
+        **kwargs: Keyword arguments for func
+
+    Returns:
+        Result of func
+    """
+    async with get_limiter(upstream).slot() as slot:
+        try:
+            result = await asyncio.to_thread(func, *args, **kwargs)
+        except Exception as e:
+            if getattr(e, "code", None) in THROTTLE_STATUS_CODES:
+                slot.dropped = True
+            raise
+        if getattr(result, "status_code", None) in THROTTLE_STATUS_CODES:
+            slot.dropped = True
+        return result
+
+
+def stats() -> Dict[str, Any]:
+    """
+    Current limit, in-flight calls and queue length per upstream
+
+    Returns:
+        Dictionary of limiter stats keyed by upstream
+    """
+    return {upstream: limiter.stats() for upstream, limiter in _limiters.items()}
@@ -1,20 +1,30 @@
-import httpx
+import asyncio
 from typing import Dict, Any, Optional
 import time
 
+from services import upstream
+from utils.aqi import compute_aqi
+from utils.geo import parse_coordinates
+from services.gazetteer import normalize_name
+
 class WeatherAPI:
     """
     Service for fetching weather and environmental data from weather APIs
     """
     
-    def __init__(self, api_key: str):
+    def __init__(self, api_key: str, gazetteer=None, unknown_locations=None):
         """
         Initialize Weather API service
         
         Args:
             api_key: Weather API key
+            gazetteer: Optional Gazetteer consulted before network geocoding
+            unknown_locations: Optional CountingBloomFilter of names geocoding
+                recently found nothing for
         """
         self.api_key = api_key
+        self.gazetteer = gazetteer
+        self.unknown_locations = unknown_locations
         self.base_url = "https://api.openweathermap.org/data/2.5"
     
     async def get_weather(self, location: str) -> Dict[str, Any]:
@@ -28,22 +38,20 @@ class WeatherAPI:
             Dictionary containing weather data
         """
         # First get coordinates from location string
-        coordinates = await self._get_coordinates(location)
+        coordinates = await self.get_coordinates(location)
         
         if not coordinates:
             return {
                 "error": "Could not determine coordinates for the location",
-                "timestamp": self._get_timestamp()
+                "timestamp": self.get_timestamp()
             }
         
-        # Get current weather data
-        weather_data = await self._get_current_weather(coordinates["lat"], coordinates["lon"])
-        
-        # Get air quality data
-        air_quality = await self._get_air_quality(coordinates["lat"], coordinates["lon"])
-        
-        # Get UV index
-        uv_index = await self._get_uv_index(coordinates["lat"], coordinates["lon"])
+        # Weather, air quality and UV index are fetched concurrently
+        weather_data, air_quality, uv_index = await asyncio.gather(
+            self.get_current_weather(coordinates["lat"], coordinates["lon"]),
+            self.get_air_pollution(coordinates["lat"], coordinates["lon"]),
+            self.get_uv_index(coordinates["lat"], coordinates["lon"])
+        )
         
         # Combine all data
         result = {
@@ -52,22 +60,72 @@ class WeatherAPI:
             "weather": weather_data,
             "air_quality": air_quality,
             "uv_index": uv_index.get("uv_index", 0),
-            "pollen_count": self._get_mock_pollen_data(),  # Mock data as OpenWeather doesn't provide pollen
-            "timestamp": self._get_timestamp()
+            "pollen_count": self.get_pollen_data(),  # Mock data as OpenWeather doesn't provide pollen
+            "timestamp": self.get_timestamp()
         }
         
         return result
     
-    async def _get_coordinates(self, location: str) -> Optional[Dict[str, float]]:
+    async def get_air_quality(self, location: str, standard: str = "us_epa") -> Dict[str, Any]:
+        """
+        Get air quality for a location with the AQI computed locally from pollutant components
+        
+        Only the geocoding and air pollution endpoints are called, so this is
+        much cheaper than a full environmental data lookup.
+        
+        Args:
+            location: Location string (city name, coordinates, etc.)
+            standard: AQI standard ("us_epa", "india_naqi" or "eu_caqi")
+            
+        Returns:
+            Dictionary containing the computed AQI and raw components
+        """
+        coordinates = await self.get_coordinates(location)
+        
+        if not coordinates:
+            return {
+                "error": "Could not determine coordinates for the location",
+                "timestamp": self.get_timestamp()
+            }
+        
+        air_quality = await self.get_air_pollution(coordinates["lat"], coordinates["lon"], standard)
+        
+        return {
+            "location": location,
+            "coordinates": coordinates,
+            "air_quality": air_quality,
+            "timestamp": self.get_timestamp()
+        }
+    
+    async def get_coordinates(self, location: str) -> Optional[Dict[str, float]]:
         """
         Get coordinates for a location string
         
+        Coordinates and places in the gazetteer are resolved locally; only
+        other place names are sent to the OpenWeather geocoding API, and not
+        those it recently returned nothing for.
+        
         Args:
             location: Location string
             
         Returns:
             Dictionary with lat and lon keys or None if not found
         """
+        coordinates = parse_coordinates(location)
+        if coordinates is not None:
+            return {"lat": coordinates[0], "lon": coordinates[1]}
+        
+        if self.gazetteer is not None:
+            # Exact and alias matches only; a fuzzy guess here would be cached
+            # as an alias ("Indiana" -> India), so near misses go to geocoding
+            place = self.gazetteer.lookup(location, fuzzy=False)
+            if place is not None:
+                return {"lat": place.lat, "lon": place.lon}
+        
+        name = normalize_name(location)
+        if self.unknown_locations is not None and name in self.unknown_locations:
+            return None
+        
         url = f"http://api.openweathermap.org/geo/1.0/direct"
         params = {
             "q": location,
@@ -75,20 +133,22 @@ class WeatherAPI:
             "appid": self.api_key
         }
         
-        async with httpx.AsyncClient() as client:
-            response = await client.get(url, params=params)
-            
-            if response.status_code == 200:
-                data = response.json()
-                if data and len(data) > 0:
-                    return {
-                        "lat": data[0]["lat"],
-                        "lon": data[0]["lon"]
-                    }
-            
-            return None
+        response = await upstream.request("openweather", "GET", url, params=params)
+        
+        if response.status_code == 200:
+            data = response.json()
+            if data and len(data) > 0:
+                return {
+                    "lat": data[0]["lat"],
+                    "lon": data[0]["lon"]
+                }
+            # Only a definite "no such place" is remembered, not errors or throttling
+            if self.unknown_locations is not None:
+                self.unknown_locations.add(name)
+        
+        return None
     
-    async def _get_current_weather(self, lat: float, lon: float) -> Dict[str, Any]:
+    async def get_current_weather(self, lat: float, lon: float) -> Dict[str, Any]:
         """
         Get current weather data for coordinates
         
@@ -107,24 +167,24 @@ class WeatherAPI:
             "appid": self.api_key
         }
         
-        async with httpx.AsyncClient() as client:
-            response = await client.get(url, params=params)
-            
-            if response.status_code == 200:
-                return response.json()
-            else:
-                return {
-                    "error": f"Weather API error: {response.status_code}",
-                    "description": "Could not fetch weather data"
-                }
+        response = await upstream.request("openweather", "GET", url, params=params)
+        
+        if response.status_code == 200:
+            return response.json()
+        else:
+            return {
+                "error": f"Weather API error: {response.status_code}",
+                "description": "Could not fetch weather data"
+            }
     
-    async def _get_air_quality(self, lat: float, lon: float) -> Dict[str, Any]:
+    async def get_air_pollution(self, lat: float, lon: float, standard: str = "us_epa") -> Dict[str, Any]:
         """
         Get air quality data for coordinates
         
         Args:
             lat: Latitude
             lon: Longitude
+            standard: AQI standard used for the locally computed index
             
         Returns:
             Dictionary containing air quality data
@@ -136,25 +196,26 @@ class WeatherAPI:
             "appid": self.api_key
         }
         
-        async with httpx.AsyncClient() as client:
-            response = await client.get(url, params=params)
-            
-            if response.status_code == 200:
-                data = response.json()
-                if "list" in data and len(data["list"]) > 0:
-                    return {
-                        "aqi": data["list"][0]["main"]["aqi"],
-                        "components": data["list"][0]["components"],
-                        "timestamp": data["list"][0].get("dt", self._get_timestamp())
-                    }
-            
-            return {
-                "error": "Could not fetch air quality data",
-                "aqi": 0,
-                "components": {}
-            }
+        response = await upstream.request("openweather", "GET", url, params=params)
+        
+        if response.status_code == 200:
+            data = response.json()
+            if "list" in data and len(data["list"]) > 0:
+                components = data["list"][0]["components"]
+                return {
+                    "aqi": data["list"][0]["main"]["aqi"],
+                    "components": components,
+                    "computed_aqi": compute_aqi(components, standard),
+                    "timestamp": data["list"][0].get("dt", self.get_timestamp())
+                }
+        
+        return {
+            "error": "Could not fetch air quality data",
+            "aqi": 0,
+            "components": {}
+        }
     
-    async def _get_uv_index(self, lat: float, lon: float) -> Dict[str, Any]:
+    async def get_uv_index(self, lat: float, lon: float) -> Dict[str, Any]:
         """
         Get UV index for coordinates
         
@@ -174,22 +235,21 @@ class WeatherAPI:
             "appid": self.api_key
         }
         
-        async with httpx.AsyncClient() as client:
-            response = await client.get(url, params=params)
-            
-            if response.status_code == 200:
-                data = response.json()
-                if "current" in data and "uvi" in data["current"]:
-                    return {
-                        "uv_index": data["current"]["uvi"]
-                    }
-            
-            # Fallback to mock data if API call fails
-            return {
-                "uv_index": 5.0  # Moderate UV index as fallback
-            }
+        response = await upstream.request("openweather", "GET", url, params=params)
+        
+        if response.status_code == 200:
+            data = response.json()
+            if "current" in data and "uvi" in data["current"]:
+                return {
+                    "uv_index": data["current"]["uvi"]
+                }
+        
+        # Fallback to mock data if API call fails
+        return {
+            "uv_index": 5.0  # Moderate UV index as fallback
+        }
     
-    def _get_mock_pollen_data(self) -> Dict[str, Any]:
+    def get_pollen_data(self) -> Dict[str, Any]:
         """
         Get mock pollen data (since OpenWeather doesn't provide this)
         
@@ -220,7 +280,7 @@ class WeatherAPI:
             }
         }
     
-    def _get_timestamp(self) -> int:
+    def get_timestamp(self) -> int:
         """
         Get current Unix timestamp
         
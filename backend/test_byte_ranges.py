@@ -0,0 +1,73 @@
+import sys
+import random
+from utils.byte_ranges import etag_matches, parse_byte_range, slice_parts
+
+def test_parse_byte_range():
+    """Check that every satisfiable range reassembles the body it was cut from"""
+    print("Testing Range header parsing...")
+    rng = random.Random(3)
+    body = bytes(rng.randrange(256) for _ in range(1000))
+    # The body is served as several buffers, as grids are (header + data)
+    parts = [memoryview(body)[:17], memoryview(body)[17:600], memoryview(body)[600:]]
+    size = len(body)
+
+    for _ in range(500):
+        start = rng.randrange(size)
+        end = rng.randrange(start, size + 200)
+        suffix = rng.randrange(1, size + 200)
+        for header, expected in [
+            (f"bytes={start}-{end}", body[start:end + 1]),
+            (f"bytes={start}-", body[start:]),
+            (f"bytes=-{suffix}", body[-suffix:]),
+        ]:
+            byte_range = parse_byte_range(header, size)
+            assert byte_range is not None, f"{header} was ignored"
+            sent = b"".join(bytes(part) for part in slice_parts(parts, *byte_range))
+            assert sent == expected, f"{header} selected {byte_range}, which does not match the requested bytes"
+
+    # Whole body for anything not a single well-formed range
+    for header in [None, "", "bytes=", "bytes=-", "items=0-10", "bytes=0-10,20-30", "bytes=a-b", "bytes=10-5"]:
+        assert parse_byte_range(header, size) is None, f"{header!r} should be ignored"
+
+    # Well formed but unsatisfiable
+    for header, body_size in [(f"bytes={size}-", size), ("bytes=-0", size), ("bytes=-5", 0), ("bytes=0-", 0)]:
+        try:
+            parse_byte_range(header, body_size)
+            raise AssertionError(f"{header} on a {body_size}-byte body should not be satisfiable")
+        except ValueError:
+            pass
+
+    print("Range header parsing passed")
+
+def test_etag_matches():
+    """Check If-None-Match comparison"""
+    print("\nTesting If-None-Match handling...")
+    etag = '"grid-aqi-1700000000"'
+    cases = [
+        (None, False),
+        ("", False),
+        ("*", True),
+        (etag, True),
+        (f"W/{etag}", True),
+        (f'"other", {etag}', True),
+        (f'"other",W/{etag}', True),
+        ('"other"', False),
+        ('"grid-aqi-1700000000-old"', False),
+        # Unquoted tags are not the same entity tag
+        ("grid-aqi-1700000000", False),
+    ]
+    for header, expected in cases:
+        assert etag_matches(header, etag) == expected, (
+            f"If-None-Match {header!r} against {etag} should give {expected}"
+        )
+    assert etag_matches(etag, f"W/{etag}"), "a weak current tag should match its strong form"
+
+    print("If-None-Match handling passed")
+
+if __name__ == "__main__":
+    try:
+        test_parse_byte_range()
+        test_etag_matches()
+    except AssertionError as e:
+        print(f"ERROR: {e}")
+        sys.exit(1)
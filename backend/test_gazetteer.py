@@ -0,0 +1,121 @@
+import os
+import sys
+import asyncio
+import tempfile
+from services.gazetteer import Gazetteer, Place, normalize_name, read_gazetteer, write_gazetteer
+from services.weather_api import WeatherAPI
+from utils.bloom import CountingBloomFilter
+
+PLACES = [
+    Place("India", "country", "", "IN", 20.5937, 78.9629, 1400000000, ["Bharat"]),
+    Place("Maharashtra", "state", "", "IN", 19.7515, 75.7139, 112000000),
+    Place("Mumbai", "city", "Maharashtra", "IN", 19.076, 72.8777, 12400000, ["Bombay"]),
+    Place("Pune", "city", "Maharashtra", "IN", 18.5204, 73.8567, 3100000, ["Poona"]),
+    Place("Aurangabad", "city", "Maharashtra", "IN", 19.8762, 75.3433, 1170000, ["Chhatrapati Sambhajinagar"]),
+    Place("Aurangabad", "city", "Bihar", "IN", 24.7521, 84.3742, 102000),
+    Place("São Paulo", "city", "São Paulo", "BR", -23.5505, -46.6333, 12300000),
+    Place("Delhi", "city", "Delhi", "IN", 28.6139, 77.209, 16800000, ["New Delhi"]),
+]
+
+def test_round_trip():
+    """Check that places survive a write and read of the binary format"""
+    print("Testing gazetteer file round trip...")
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "gazetteer.bin")
+        written = write_gazetteer(path, PLACES)
+        places = read_gazetteer(path)
+
+        assert written == len(PLACES) and len(places) == len(PLACES), (
+            f"wrote {written} and read {len(places)} places, expected {len(PLACES)}"
+        )
+        for original, place in zip(PLACES, places):
+            assert (
+                (place.name, place.kind, place.admin, place.country, place.population, place.aliases)
+                == (original.name, original.kind, original.admin, original.country, original.population, original.aliases)
+                and abs(place.lat - original.lat) <= 1e-4 and abs(place.lon - original.lon) <= 1e-4
+            ), f"{original.name} read back as {place.to_dict()} with aliases {place.aliases}"
+
+        with open(path, "rb") as f:
+            data = f.read()
+        truncated = os.path.join(directory, "truncated.bin")
+        with open(truncated, "wb") as f:
+            f.write(data[:len(data) - 10])
+        try:
+            read_gazetteer(truncated)
+            raise AssertionError("a truncated file was read without error")
+        except ValueError:
+            pass
+
+        assert len(Gazetteer.load(path)) == len(PLACES), "Gazetteer.load did not load every place"
+
+    print("Gazetteer file round trip passed")
+
+def test_lookup():
+    """Check exact, alias, qualified and fuzzy lookups"""
+    print("\nTesting gazetteer lookups...")
+    gazetteer = Gazetteer(PLACES)
+    cases = [
+        ("Mumbai", True, ("Mumbai", "Maharashtra")),
+        ("bombay", True, ("Mumbai", "Maharashtra")),
+        ("  PUNE ", True, ("Pune", "Maharashtra")),
+        ("Sao Paulo", True, ("São Paulo", "São Paulo")),
+        # The larger of two namesakes wins unless a qualifier picks the other
+        ("Aurangabad", True, ("Aurangabad", "Maharashtra")),
+        ("Aurangabad, Bihar", True, ("Aurangabad", "Bihar")),
+        ("Pune, Maharashtra, India 411001", True, ("Pune", "Maharashtra")),
+        ("Pune, Bihar", True, None),
+        ("Bharat", True, ("India", "")),
+        # Typos are only forgiven when fuzzy matching is asked for
+        ("Mumbay", True, ("Mumbai", "Maharashtra")),
+        ("Mumbay", False, None),
+        ("Delphi", False, None),
+        ("Puno", False, None),
+        ("Nowhere", True, None),
+        ("", True, None),
+    ]
+    for location, fuzzy, expected in cases:
+        place = gazetteer.lookup(location, fuzzy=fuzzy)
+        found = (place.name, place.admin) if place is not None else None
+        assert found == expected, f"lookup({location!r}, fuzzy={fuzzy}) returned {found}, expected {expected}"
+
+    for prefix, expected in [("Pu", "Pune"), ("bom", "Mumbai"), ("new d", "Delhi")]:
+        names = [place.name for place in gazetteer.complete(prefix)]
+        assert expected in names, f"complete({prefix!r}) returned {names}, expected {expected} among them"
+
+    assert normalize_name("  São   Paulo ") == normalize_name("sao paulo"), (
+        "normalize_name does not fold accents, case and spacing"
+    )
+
+    print("Gazetteer lookups passed")
+
+def test_geocoding_near_misses():
+    """Check that geocoding never takes a fuzzy gazetteer guess"""
+    print("\nTesting geocoding of near-miss names...")
+    gazetteer = Gazetteer.load()
+    misses = ["Indiana", "Delphi", "Puno", "Patra", "Bihor"]
+    # Names marked unknown are answered without a network call
+    unknown_locations = CountingBloomFilter(capacity=1000)
+    for name in misses:
+        unknown_locations.add(normalize_name(name))
+    weather_api = WeatherAPI(api_key="test", gazetteer=gazetteer, unknown_locations=unknown_locations)
+
+    for name in misses:
+        coordinates = asyncio.run(weather_api.get_coordinates(name))
+        assert coordinates is None, f"{name} geocoded to {coordinates} from a fuzzy gazetteer match"
+
+    coordinates = asyncio.run(weather_api.get_coordinates("Pune"))
+    place = gazetteer.lookup("Pune", fuzzy=False)
+    assert coordinates == {"lat": place.lat, "lon": place.lon}, (
+        f"Pune geocoded to {coordinates}, expected the gazetteer entry"
+    )
+
+    print("Near-miss names were not resolved from the gazetteer")
+
+if __name__ == "__main__":
+    try:
+        test_round_trip()
+        test_lookup()
+        test_geocoding_near_misses()
+    except AssertionError as e:
+        print(f"ERROR: {e}")
+        sys.exit(1)
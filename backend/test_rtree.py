@@ -0,0 +1,54 @@
+import sys
+import random
+from utils.rtree import STRTree
+
+def test_str_tree():
+    """Compare STRTree queries with a brute-force scan"""
+    print("Testing STRTree against brute force...")
+    rng = random.Random(7)
+
+    assert STRTree([]).query_point(0, 0) == [] and STRTree([]).query_box((0, 0, 1, 1)) == [], (
+        "an empty tree returned results"
+    )
+
+    for count, capacity in [(1, 2), (7, 8), (100, 4), (1000, 8), (2500, 16)]:
+        boxes = []
+        for _ in range(count):
+            x, y = rng.uniform(60, 100), rng.uniform(5, 40)
+            boxes.append((x, y, x + rng.expovariate(1.0), y + rng.expovariate(1.0)))
+        tree = STRTree(boxes, node_capacity=capacity)
+        assert len(tree) == count, f"tree holds {len(tree)} boxes, expected {count}"
+
+        for _ in range(300):
+            x, y = rng.uniform(58, 102), rng.uniform(3, 42)
+            expected = {i for i, box in enumerate(boxes) if box[0] <= x <= box[2] and box[1] <= y <= box[3]}
+            found = tree.query_point(x, y)
+            assert len(found) == len(set(found)) and set(found) == expected, (
+                f"query_point({x:.3f}, {y:.3f}) with {count} boxes does not match brute force"
+            )
+
+            query = (x, y, x + rng.uniform(0, 5), y + rng.uniform(0, 5))
+            expected = {
+                i for i, box in enumerate(boxes)
+                if box[0] <= query[2] and box[2] >= query[0] and box[1] <= query[3] and box[3] >= query[1]
+            }
+            found = tree.query_box(query)
+            assert len(found) == len(set(found)) and set(found) == expected, (
+                f"query_box({query}) with {count} boxes does not match brute force"
+            )
+
+        # Corners and edges count as contained
+        for i in rng.sample(range(count), min(count, 20)):
+            min_x, min_y, max_x, max_y = boxes[i]
+            assert i in tree.query_point(min_x, min_y) and i in tree.query_point(max_x, max_y), (
+                f"box {i} does not contain its own corners"
+            )
+
+    print("STRTree matched brute force")
+
+if __name__ == "__main__":
+    try:
+        test_str_tree()
+    except AssertionError as e:
+        print(f"ERROR: {e}")
+        sys.exit(1)
@@ -0,0 +1,67 @@
+import sys
+import time
+from services.source_planner import ENVIRONMENTAL_FIELDS, SourceCache, SourcePlanner
+
+def test_plans():
+    """Check plan choices with and without a deadline"""
+    print("Testing source plans...")
+    planner = SourcePlanner(SourceCache())
+
+    plan = planner.plan("gh:te7ud", ["weather"])
+    assert plan.fetch == ["geocode", "weather"], f"weather alone fetched {plan.fetch}"
+
+    plan = planner.plan("gh:te7ud")
+    assert set(plan.fields) == set(ENVIRONMENTAL_FIELDS) and "tavily" in plan.fetch, (
+        f"a full request fetched {plan.fetch}"
+    )
+
+    # Tavily cannot answer within one second; everything else still should
+    plan = planner.plan("gh:te7ud", deadline=1.0)
+    assert "tavily" not in plan.fetch and "air_pollution" in plan.fetch and plan.latency <= 1.0, (
+        f"a one-second deadline fetched {plan.fetch} in ~{plan.latency:.2f}s"
+    )
+    assert "water_quality" in plan.reasons.get("deadline", ""), (
+        f"the omitted water quality is not explained: {plan.reasons}"
+    )
+
+    planner.cache.put("geocode", "gh:te7ud", {"lat": 28.61, "lon": 77.21})
+    planner.cache.put("weather", "gh:te7ud", {"main": {"temp": 30}})
+    plan = planner.plan("gh:te7ud", ["weather"])
+    assert not plan.fetch and "weather" in plan.cached, (
+        f"a cached weather request fetched {plan.fetch} from cache {plan.cached}"
+    )
+    assert planner.is_cached("gh:te7ud", ["weather"]) and not planner.is_cached("gh:te7ud", ["weather", "uv_index"]), (
+        "is_cached disagrees with the cache contents"
+    )
+
+    print("Source plans passed")
+
+def test_cache_bounds():
+    """Check that the source cache stays within max_entries"""
+    print("\nTesting source cache bounds...")
+    cache = SourceCache(max_entries=3)
+    for key in ["a", "b", "c"]:
+        cache.put("weather", key, key)
+    cache.get("weather", "a", 60)
+    cache.put("weather", "d", "d")
+    assert cache.get("weather", "b", 60) is None and cache.get("weather", "a", 60) == "a", (
+        "the least recently used entry was not the one evicted"
+    )
+
+    cache.copy("a", "e")
+    assert len(cache) == 3 and cache.get("weather", "e", 60) == "a", f"copy left {len(cache)} entries"
+
+    expired = SourceCache(max_age=0.01)
+    expired.put("uv", "a", 5.0)
+    time.sleep(0.02)
+    assert expired.age("uv", "a") is None and not len(expired), "an entry older than max_age was kept"
+
+    print("Source cache bounds passed")
+
+if __name__ == "__main__":
+    try:
+        test_plans()
+        test_cache_bounds()
+    except AssertionError as e:
+        print(f"ERROR: {e}")
+        sys.exit(1)
@@ -0,0 +1,70 @@
+import sys
+import random
+import numpy as np
+from utils.geo import haversine_km
+from utils.spatial_index import SpatialIndex
+
+def brute_force_within(points, lat, lon, radius_km):
+    """Keys of the points within a radius, measured to every point"""
+    keys = list(points)
+    coordinates = np.array([points[key] for key in keys])
+    distances = haversine_km(lat, lon, coordinates[:, 0], coordinates[:, 1])
+    return {key for key, distance in zip(keys, distances) if distance <= radius_km}
+
+def test_spatial_index():
+    """Compare SpatialIndex queries with a brute-force scan"""
+    print("Testing SpatialIndex against brute force...")
+    rng = random.Random(42)
+
+    # Clusters around cities, plus points near the poles and the antimeridian
+    points = {}
+    for i in range(2000):
+        lat, lon = rng.choice([(19.08, 72.88), (28.61, 77.21), (51.51, -0.13), (-33.87, 151.21)])
+        points[f"city-{i}"] = (lat + rng.gauss(0, 0.5), lon + rng.gauss(0, 0.5))
+    for i in range(500):
+        points[f"world-{i}"] = (rng.uniform(-89.5, 89.5), rng.uniform(-180, 180))
+    for i in range(100):
+        points[f"dateline-{i}"] = (rng.uniform(-60, 60), rng.choice([-1, 1]) * rng.uniform(179, 180))
+
+    index = SpatialIndex(cell_deg=1.0, initial_capacity=16)
+    for key, (lat, lon) in points.items():
+        index.insert(key, lat, lon)
+
+    # Moving and removing points must leave no stale entries behind
+    for key in rng.sample(sorted(points), 200):
+        points[key] = (rng.uniform(-80, 80), rng.uniform(-180, 180))
+        index.insert(key, *points[key])
+    for key in rng.sample(sorted(points), 200):
+        assert index.remove(key), f"remove({key}) reported a missing key"
+        del points[key]
+    assert len(index) == len(points), f"index holds {len(index)} points, expected {len(points)}"
+
+    queries = [(19.08, 72.88), (28.61, 77.21), (0.0, 179.9), (0.0, -179.9), (89.0, 10.0), (-88.5, -120.0)]
+    queries += [(rng.uniform(-89, 89), rng.uniform(-180, 180)) for _ in range(200)]
+    for lat, lon in queries:
+        for radius_km in (1.0, 25.0, 300.0, 2500.0):
+            found = index.within_radius(lat, lon, radius_km)
+            expected = brute_force_within(points, lat, lon, radius_km)
+            assert {key for key, _ in found} == expected, (
+                f"within_radius({lat:.3f}, {lon:.3f}, {radius_km}) returned {len(found)} points, expected {len(expected)}"
+            )
+            distances = [distance for _, distance in found]
+            assert distances == sorted(distances), (
+                f"within_radius({lat:.3f}, {lon:.3f}, {radius_km}) is not sorted by distance"
+            )
+
+        nearest = index.nearest(lat, lon, k=5)
+        coordinates = np.array(list(points.values()))
+        all_distances = np.sort(haversine_km(lat, lon, coordinates[:, 0], coordinates[:, 1]))
+        assert np.allclose([distance for _, distance in nearest], all_distances[:5]), (
+            f"nearest({lat:.3f}, {lon:.3f}, k=5) does not match brute force"
+        )
+
+    print(f"SpatialIndex matched brute force for {len(queries)} queries over {len(points)} points")
+
+if __name__ == "__main__":
+    try:
+        test_spatial_index()
+    except AssertionError as e:
+        print(f"ERROR: {e}")
+        sys.exit(1)
@@ -0,0 +1,128 @@
+import time
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from fastapi import Depends, HTTPException, Request
+
+from utils.concurrency import ConcurrencyLimiter, GradientLimit, current_priority, PRIORITY_WEIGHTS
+
+
+class AdmissionController:
+    """
+    Per-endpoint admission control with adaptive limits and load shedding
+
+    Each endpoint gets its own limiter. Requests over the limit wait in a
+    short bounded queue; when that is full, or the wait is too long, the
+    request is rejected straight away with 503 and Retry-After rather than
+    adding to event-loop queueing. Requests a cheapness check approves
+    (greetings, cache hits) bypass the limiter entirely.
+    """
+
+    def __init__(
+        self,
+        initial_limit: int = 32,
+        max_limit: int = 256,
+        max_queue: int = 64,
+        queue_timeout: float = 2.0,
+        overrides: Optional[Dict[str, Dict[str, Any]]] = None
+    ):
+        """
+        Initialize the admission controller
+
+        Args:
+            initial_limit: Starting concurrency limit per endpoint
+            max_limit: Upper bound for the adaptive limit
+            max_queue: Maximum number of queued requests per endpoint
+            queue_timeout: Seconds a request may queue before it is shed
+            overrides: Per-endpoint settings overriding the defaults above
+        """
+        self.defaults = {
+            "initial_limit": initial_limit,
+            "max_limit": max_limit,
+            "max_queue": max_queue,
+            "queue_timeout": queue_timeout,
+        }
+        self.overrides = overrides or {}
+        self.limiters: Dict[str, ConcurrencyLimiter] = {}
+        self.bypassed: Dict[str, int] = {}
+
+    def limiter(self, endpoint: str) -> ConcurrencyLimiter:
+        """
+        Get the limiter for an endpoint, creating it on first use
+
+        Args:
+            endpoint: Endpoint name
+
+        Returns:
+            ConcurrencyLimiter for the endpoint
+        """
+        if endpoint not in self.limiters:
+            settings = {**self.defaults, **self.overrides.get(endpoint, {})}
+            self.limiters[endpoint] = ConcurrencyLimiter(
+                endpoint,
+                limit=GradientLimit(initial=settings["initial_limit"], max_limit=settings["max_limit"]),
+                max_queue=settings["max_queue"],
+                queue_timeout=settings["queue_timeout"]
+            )
+        return self.limiters[endpoint]
+
+    def admit(
+        self,
+        endpoint: str,
+        cheap: Optional[Callable[[Request], Awaitable[bool]]] = None,
+        priority: str = "normal"
+    ):
+        """
+        Build a FastAPI dependency that admits requests to an endpoint
+
+        Args:
+            endpoint: Endpoint name
+            cheap: Optional async check; requests it approves are always admitted
+            priority: Scheduling class for the request's upstream calls
+
+        Returns:
+            Dependency to use with Depends()
+        """
+        if priority not in PRIORITY_WEIGHTS:
+            raise ValueError(f"Unknown priority: {priority}")
+
+        async def dependency(request: Request):
+            # Upstream calls made while handling the request are scheduled in this class
+            current_priority.set(priority)
+            if cheap is not None and await cheap(request):
+                self.bypassed[endpoint] = self.bypassed.get(endpoint, 0) + 1
+                yield
+                return
+
+            limiter = self.limiter(endpoint)
+            if not await limiter.acquire():
+                raise HTTPException(
+                    status_code=503,
+                    detail=f"Server is overloaded; {endpoint} is shedding load",
+                    headers={"Retry-After": str(limiter.retry_after())}
+                )
+
+            in_flight = limiter.in_flight
+            started = time.perf_counter()
+            dropped = False
+            try:
+                yield
+            except HTTPException as e:
+                dropped = e.status_code in (429, 503)
+                raise
+            finally:
+                limiter.release(time.perf_counter() - started, in_flight, dropped)
+
+        return Depends(dependency)
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Summarise admission decisions per endpoint
+
+        Returns:
+            Dictionary of limiter stats keyed by endpoint
+        """
+        endpoints = list(self.limiters) + [name for name in self.bypassed if name not in self.limiters]
+        return {
+            endpoint: {**self.limiter(endpoint).stats(), "bypassed": self.bypassed.get(endpoint, 0)}
+            for endpoint in endpoints
+        }
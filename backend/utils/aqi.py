@@ -0,0 +1,327 @@
+"""
+Local air quality index computation from pollutant concentrations
+
+Implements breakpoint interpolation for the US EPA AQI, the India National
+AQI (CPCB) and the European CAQI. Inputs are OpenWeather air_pollution
+components (all in µg/m³); every standard is evaluated on NumPy arrays, so
+a whole batch of readings is converted in one call.
+
+OpenWeather reports instantaneous concentrations, so the results are
+"nowcast" style approximations of the averaging periods each standard
+prescribes.
+"""
+
+from typing import Dict, List, Any, Optional, Sequence, Union
+
+import numpy as np
+
+ArrayLike = Union[float, Sequence[float], np.ndarray]
+
+# Molecular weights for µg/m³ -> ppb conversion at 25 °C (molar volume 24.45 L)
+_MOLECULAR_WEIGHTS = {"o3": 48.00, "no2": 46.01, "so2": 64.07, "co": 28.01}
+
+DISPLAY_NAMES = {
+    "pm2_5": "PM2.5",
+    "pm10": "PM10",
+    "o3": "O3",
+    "no2": "NO2",
+    "so2": "SO2",
+    "co": "CO",
+    "nh3": "NH3",
+}
+
+# Each pollutant lists (concentration low, concentration high, index low,
+# index high) bands in the unit given by "unit"; "decimals" is the EPA-style
+# truncation applied before lookup (None for continuous breakpoints).
+STANDARDS: Dict[str, Dict[str, Any]] = {
+    "us_epa": {
+        "name": "US EPA AQI",
+        "cap": 500,
+        "categories": [
+            (50, "Good"),
+            (100, "Moderate"),
+            (150, "Unhealthy for Sensitive Groups"),
+            (200, "Unhealthy"),
+            (300, "Very Unhealthy"),
+            (None, "Hazardous"),
+        ],
+        "pollutants": {
+            "pm2_5": {"unit": "ug/m3", "decimals": 1, "bands": [
+                (0.0, 9.0, 0, 50), (9.1, 35.4, 51, 100), (35.5, 55.4, 101, 150),
+                (55.5, 125.4, 151, 200), (125.5, 225.4, 201, 300), (225.5, 325.4, 301, 500)]},
+            "pm10": {"unit": "ug/m3", "decimals": 0, "bands": [
+                (0, 54, 0, 50), (55, 154, 51, 100), (155, 254, 101, 150),
+                (255, 354, 151, 200), (355, 424, 201, 300), (425, 604, 301, 500)]},
+            "o3": {"unit": "ppb", "decimals": 0, "bands": [
+                (0, 54, 0, 50), (55, 70, 51, 100), (71, 85, 101, 150),
+                (86, 105, 151, 200), (106, 200, 201, 300), (201, 604, 301, 500)]},
+            "no2": {"unit": "ppb", "decimals": 0, "bands": [
+                (0, 53, 0, 50), (54, 100, 51, 100), (101, 360, 101, 150),
+                (361, 649, 151, 200), (650, 1249, 201, 300), (1250, 2049, 301, 500)]},
+            "so2": {"unit": "ppb", "decimals": 0, "bands": [
+                (0, 35, 0, 50), (36, 75, 51, 100), (76, 185, 101, 150),
+                (186, 304, 151, 200), (305, 604, 201, 300), (605, 1004, 301, 500)]},
+            "co": {"unit": "ppm", "decimals": 1, "bands": [
+                (0.0, 4.4, 0, 50), (4.5, 9.4, 51, 100), (9.5, 12.4, 101, 150),
+                (12.5, 15.4, 151, 200), (15.5, 30.4, 201, 300), (30.5, 50.4, 301, 500)]},
+        },
+    },
+    "india_naqi": {
+        "name": "India National AQI",
+        "cap": 500,
+        "categories": [
+            (50, "Good"),
+            (100, "Satisfactory"),
+            (200, "Moderate"),
+            (300, "Poor"),
+            (400, "Very Poor"),
+            (None, "Severe"),
+        ],
+        "pollutants": {
+            "pm2_5": {"unit": "ug/m3", "decimals": 0, "bands": [
+                (0, 30, 0, 50), (31, 60, 51, 100), (61, 90, 101, 200),
+                (91, 120, 201, 300), (121, 250, 301, 400), (251, 380, 401, 500)]},
+            "pm10": {"unit": "ug/m3", "decimals": 0, "bands": [
+                (0, 50, 0, 50), (51, 100, 51, 100), (101, 250, 101, 200),
+                (251, 350, 201, 300), (351, 430, 301, 400), (431, 510, 401, 500)]},
+            "o3": {"unit": "ug/m3", "decimals": 0, "bands": [
+                (0, 50, 0, 50), (51, 100, 51, 100), (101, 168, 101, 200),
+                (169, 208, 201, 300), (209, 748, 301, 400), (749, 1000, 401, 500)]},
+            "no2": {"unit": "ug/m3", "decimals": 0, "bands": [
+                (0, 40, 0, 50), (41, 80, 51, 100), (81, 180, 101, 200),
+                (181, 280, 201, 300), (281, 400, 301, 400), (401, 800, 401, 500)]},
+            "so2": {"unit": "ug/m3", "decimals": 0, "bands": [
+                (0, 40, 0, 50), (41, 80, 51, 100), (81, 380, 101, 200),
+                (381, 800, 201, 300), (801, 1600, 301, 400), (1601, 2100, 401, 500)]},
+            "co": {"unit": "mg/m3", "decimals": 1, "bands": [
+                (0.0, 1.0, 0, 50), (1.1, 2.0, 51, 100), (2.1, 10.0, 101, 200),
+                (10.1, 17.0, 201, 300), (17.1, 34.0, 301, 400), (34.1, 50.0, 401, 500)]},
+            "nh3": {"unit": "ug/m3", "decimals": 0, "bands": [
+                (0, 200, 0, 50), (201, 400, 51, 100), (401, 800, 101, 200),
+                (801, 1200, 201, 300), (1201, 1800, 301, 400), (1801, 2400, 401, 500)]},
+        },
+    },
+    "eu_caqi": {
+        "name": "European CAQI (hourly)",
+        # CAQI is open-ended above 100; the last band's slope is extrapolated
+        "cap": None,
+        "categories": [
+            (25, "Very Low"),
+            (50, "Low"),
+            (75, "Medium"),
+            (100, "High"),
+            (None, "Very High"),
+        ],
+        "pollutants": {
+            "no2": {"unit": "ug/m3", "decimals": None, "bands": [
+                (0, 50, 0, 25), (50, 100, 25, 50), (100, 200, 50, 75), (200, 400, 75, 100)]},
+            "pm10": {"unit": "ug/m3", "decimals": None, "bands": [
+                (0, 25, 0, 25), (25, 50, 25, 50), (50, 90, 50, 75), (90, 180, 75, 100)]},
+            "pm2_5": {"unit": "ug/m3", "decimals": None, "bands": [
+                (0, 15, 0, 25), (15, 30, 25, 50), (30, 55, 50, 75), (55, 110, 75, 100)]},
+            "o3": {"unit": "ug/m3", "decimals": None, "bands": [
+                (0, 60, 0, 25), (60, 120, 25, 50), (120, 180, 50, 75), (180, 240, 75, 100)]},
+            "co": {"unit": "ug/m3", "decimals": None, "bands": [
+                (0, 5000, 0, 25), (5000, 7500, 25, 50), (7500, 10000, 50, 75), (10000, 20000, 75, 100)]},
+            "so2": {"unit": "ug/m3", "decimals": None, "bands": [
+                (0, 50, 0, 25), (50, 100, 25, 50), (100, 350, 50, 75), (350, 500, 75, 100)]},
+        },
+    },
+}
+
+
+def _convert(pollutant: str, values: np.ndarray, unit: str) -> np.ndarray:
+    """Convert OpenWeather µg/m³ concentrations to the breakpoint unit"""
+    if unit == "ug/m3":
+        return values
+    if unit == "mg/m3":
+        return values / 1000.0
+    ppb = values * 24.45 / _MOLECULAR_WEIGHTS[pollutant]
+    if unit == "ppb":
+        return ppb
+    if unit == "ppm":
+        return ppb / 1000.0
+    raise ValueError(f"Unsupported unit: {unit}")
+
+
+class _CompiledPollutant:
+    """Breakpoint arrays for one pollutant under one standard"""
+
+    def __init__(self, pollutant: str, spec: Dict[str, Any], cap: Optional[float]):
+        self.pollutant = pollutant
+        self.unit = spec["unit"]
+        self.decimals = spec["decimals"]
+        self.cap = cap
+        bands = np.asarray(spec["bands"], dtype=np.float64)
+        self.c_lo, self.c_hi, self.i_lo, self.i_hi = bands.T
+
+    def sub_index(self, concentrations: np.ndarray) -> np.ndarray:
+        values = _convert(self.pollutant, concentrations, self.unit)
+        if self.decimals is not None:
+            scale = 10.0 ** self.decimals
+            values = np.floor(values * scale + 1e-9) / scale
+        values = np.maximum(values, 0.0)
+
+        band = np.searchsorted(self.c_hi, values, side="left")
+        above = band >= len(self.c_hi)
+        band = np.minimum(band, len(self.c_hi) - 1)
+
+        c_lo, c_hi = self.c_lo[band], self.c_hi[band]
+        i_lo, i_hi = self.i_lo[band], self.i_hi[band]
+        index = (i_hi - i_lo) / (c_hi - c_lo) * (values - c_lo) + i_lo
+
+        if self.cap is not None:
+            index = np.where(above, self.cap, index)
+        # Truncated values can fall in the gap between two bands (e.g. 9.05)
+        index = np.maximum(index, i_lo)
+        return np.where(np.isnan(concentrations), np.nan, np.rint(index))
+
+
+class AQICalculator:
+    """
+    Vectorised AQI calculator for one standard
+    """
+
+    def __init__(self, standard: str = "us_epa"):
+        """
+        Compile the breakpoint tables of a standard
+
+        Args:
+            standard: "us_epa", "india_naqi" or "eu_caqi"
+        """
+        if standard not in STANDARDS:
+            raise ValueError(f"Unknown AQI standard: {standard}")
+
+        spec = STANDARDS[standard]
+        self.standard = standard
+        self.name = spec["name"]
+        self.pollutants = [
+            _CompiledPollutant(pollutant, pollutant_spec, spec["cap"])
+            for pollutant, pollutant_spec in spec["pollutants"].items()
+        ]
+        self._category_edges = np.asarray(
+            [limit for limit, _ in spec["categories"] if limit is not None], dtype=np.float64
+        )
+        self._category_names = np.asarray([name for _, name in spec["categories"]], dtype=object)
+
+    def compute(self, components: Dict[str, ArrayLike]) -> Dict[str, np.ndarray]:
+        """
+        Compute the AQI for arrays of pollutant concentrations
+
+        Args:
+            components: Mapping of OpenWeather component name (pm2_5, pm10,
+                o3, no2, so2, co, nh3) to concentrations in µg/m³; missing
+                readings may be NaN or the key may be absent
+
+        Returns:
+            Dictionary with "aqi" (float array, NaN where nothing was
+            measured), "category" and "dominant_pollutant" (object arrays)
+            and "sub_indices" (pollutant -> float array)
+        """
+        arrays = {key: np.atleast_1d(np.asarray(value, dtype=np.float64)) for key, value in components.items()}
+        size = max((len(array) for array in arrays.values()), default=0)
+
+        names = [pollutant.pollutant for pollutant in self.pollutants]
+        sub_indices = np.full((len(names), size), np.nan)
+        for row, pollutant in enumerate(self.pollutants):
+            if pollutant.pollutant in arrays:
+                sub_indices[row] = pollutant.sub_index(np.broadcast_to(arrays[pollutant.pollutant], size))
+
+        measured = ~np.all(np.isnan(sub_indices), axis=0)
+        filled = np.where(np.isnan(sub_indices), -np.inf, sub_indices)
+        dominant_row = np.argmax(filled, axis=0) if size else np.zeros(0, dtype=np.intp)
+        aqi = np.where(measured, filled.max(axis=0, initial=-np.inf), np.nan)
+
+        display = np.asarray([DISPLAY_NAMES[name] for name in names], dtype=object)
+        dominant = np.where(measured, display[dominant_row] if len(names) else None, None)
+        category_index = np.searchsorted(self._category_edges, np.nan_to_num(aqi), side="left")
+        category = np.where(measured, self._category_names[category_index], None)
+
+        return {
+            "aqi": aqi,
+            "category": category,
+            "dominant_pollutant": dominant,
+            "sub_indices": dict(zip(names, sub_indices))
+        }
+
+    def compute_many(self, readings: Sequence[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Compute the AQI for a list of component dictionaries
+
+        Args:
+            readings: OpenWeather-style component dictionaries
+
+        Returns:
+            List of results as returned by from_components
+        """
+        keys = [pollutant.pollutant for pollutant in self.pollutants]
+        columns = {
+            key: [_as_float(reading.get(key)) for reading in readings]
+            for key in keys
+        }
+        result = self.compute(columns)
+        return [self._row(result, i) for i in range(len(readings))]
+
+    def from_components(self, components: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Compute the AQI for a single OpenWeather components dictionary
+
+        Args:
+            components: Component concentrations in µg/m³
+
+        Returns:
+            Dictionary with aqi, category, dominant_pollutant, standard and sub_indices
+        """
+        return self.compute_many([components])[0]
+
+    def _row(self, result: Dict[str, Any], i: int) -> Dict[str, Any]:
+        aqi = result["aqi"][i]
+        return {
+            "aqi": None if np.isnan(aqi) else int(aqi),
+            "category": result["category"][i],
+            "dominant_pollutant": result["dominant_pollutant"][i],
+            "standard": self.standard,
+            "sub_indices": {
+                DISPLAY_NAMES[name]: int(values[i])
+                for name, values in result["sub_indices"].items()
+                if not np.isnan(values[i])
+            }
+        }
+
+
+def _as_float(value: Any) -> float:
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return float(value)
+    return np.nan
+
+
+_calculators: Dict[str, AQICalculator] = {}
+
+
+def get_calculator(standard: str = "us_epa") -> AQICalculator:
+    """
+    Get a cached calculator for a standard
+
+    Args:
+        standard: "us_epa", "india_naqi" or "eu_caqi"
+
+    Returns:
+        AQICalculator instance
+    """
+    if standard not in _calculators:
+        _calculators[standard] = AQICalculator(standard)
+    return _calculators[standard]
+
+
+def compute_aqi(components: Dict[str, Any], standard: str = "us_epa") -> Dict[str, Any]:
+    """
+    Compute the AQI for a single OpenWeather components dictionary
+
+    Args:
+        components: Component concentrations in µg/m³
+        standard: "us_epa", "india_naqi" or "eu_caqi"
+
+    Returns:
+        Dictionary with aqi, category, dominant_pollutant, standard and sub_indices
+    """
+    return get_calculator(standard).from_components(components)
@@ -0,0 +1,113 @@
+import hashlib
+import math
+import threading
+import time
+from typing import Any, Dict, List
+
+import numpy as np
+
+
+class CountingBloomFilter:
+    """
+    Counting Bloom filter with periodic decay
+
+    Each item increments k counters. Membership means all k counters are
+    non-zero; false positives are possible, false negatives are not (until
+    the item decays). Every decay_interval seconds all counters are halved,
+    so an item added once is forgotten after at most one interval while one
+    added repeatedly survives for several.
+    """
+
+    def __init__(self, capacity: int = 100000, error_rate: float = 0.001, decay_interval: float = 3600.0):
+        """
+        Initialize the filter
+
+        Args:
+            capacity: Expected number of distinct items
+            error_rate: Target false positive rate at capacity
+            decay_interval: Seconds between counter halvings (0 disables decay)
+        """
+        if capacity <= 0 or not 0 < error_rate < 1:
+            raise ValueError("Capacity must be positive and error_rate between 0 and 1")
+        self.size = max(8, math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.decay_interval = decay_interval
+        self._counters = np.zeros(self.size, dtype=np.uint8)
+        self._last_decay = time.monotonic()
+        self._lock = threading.Lock()
+        self.added = 0
+        self.checks = 0
+        self.hits = 0
+
+    def add(self, item: str) -> None:
+        """
+        Add an item
+
+        Args:
+            item: Item to add
+        """
+        positions = self._positions(item)
+        with self._lock:
+            self._decay()
+            counters = self._counters[positions]
+            # Saturate instead of wrapping around
+            self._counters[positions] = np.minimum(counters.astype(np.uint16) + 1, 255)
+            self.added += 1
+
+    def discard(self, item: str) -> None:
+        """
+        Remove one occurrence of an item if it is present
+
+        Args:
+            item: Item to remove
+        """
+        positions = self._positions(item)
+        with self._lock:
+            counters = self._counters[positions]
+            if counters.all():
+                self._counters[positions] = counters - 1
+
+    def __contains__(self, item: str) -> bool:
+        positions = self._positions(item)
+        with self._lock:
+            self._decay()
+            self.checks += 1
+            found = bool(self._counters[positions].all())
+            self.hits += found
+        return found
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Summarise the filter
+
+        Returns:
+            Dictionary with sizing, fill ratio and check counts
+        """
+        with self._lock:
+            fill = float(np.count_nonzero(self._counters)) / self.size
+            return {
+                "size": self.size,
+                "hashes": self.hashes,
+                "fill_ratio": round(fill, 4),
+                "estimated_false_positive_rate": round(fill ** self.hashes, 6),
+                "added": self.added,
+                "checks": self.checks,
+                "hits": self.hits,
+            }
+
+    def _positions(self, item: str) -> List[int]:
+        # Double hashing: k positions from two 64-bit halves of one digest
+        digest = hashlib.blake2b(item.encode("utf-8"), digest_size=16).digest()
+        first = int.from_bytes(digest[:8], "little")
+        second = int.from_bytes(digest[8:], "little") | 1
+        return [(first + i * second) % self.size for i in range(self.hashes)]
+
+    def _decay(self) -> None:
+        """Halve every counter once per elapsed decay interval (lock held)"""
+        if not self.decay_interval:
+            return
+        intervals = int((time.monotonic() - self._last_decay) // self.decay_interval)
+        if intervals <= 0:
+            return
+        self._counters >>= min(intervals, 8)
+        self._last_decay += intervals * self.decay_interval
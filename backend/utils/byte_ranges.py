@@ -0,0 +1,119 @@
+from typing import Optional, Sequence, Tuple, Union
+
+from starlette.responses import Response
+from starlette.types import Receive, Scope, Send
+
+Buffer = Union[bytes, memoryview]
+
+
+def parse_byte_range(header: Optional[str], size: int) -> Optional[Tuple[int, int]]:
+    """
+    Parse a Range header for a single byte range
+
+    Args:
+        header: Range header value such as "bytes=0-1023", "bytes=1024-" or "bytes=-512"
+        size: Size of the full body
+
+    Returns:
+        (start, end) with end exclusive, or None if the whole body should be
+        sent (no header, a malformed one, or several ranges)
+
+    Raises:
+        ValueError: If the range is well formed but not satisfiable
+    """
+    if not header or not header.startswith("bytes=") or "," in header:
+        return None
+    first, _, last = header[len("bytes="):].strip().partition("-")
+    if not (first or last) or any(part and not part.isdigit() for part in (first, last)):
+        return None
+    if not first:
+        # Suffix range: the last N bytes
+        if int(last) == 0 or size == 0:
+            raise ValueError(f"Range {header} is not satisfiable")
+        return max(0, size - int(last)), size
+    start = int(first)
+    if last and int(last) < start:
+        # An invalid range is ignored rather than refused
+        return None
+    end = int(last) + 1 if last else size
+    if start >= size:
+        raise ValueError(f"Range {header} is not satisfiable")
+    return start, min(end, size)
+
+
+def etag_matches(header: Optional[str], etag: str) -> bool:
+    """
+    Check an If-None-Match header against an entity tag
+
+    Uses the weak comparison RFC 9110 prescribes for If-None-Match: a W/
+    prefix on either tag is ignored, and "*" matches any current entity.
+
+    Args:
+        header: If-None-Match header value such as '"abc", W/"def"' or "*"
+        etag: Current entity tag, quoted
+
+    Returns:
+        True if the client's copy is current and 304 Not Modified applies
+    """
+    if not header:
+        return False
+    tags = [tag.strip() for tag in header.split(",")]
+    if "*" in tags:
+        return True
+    opaque = etag[2:] if etag.startswith("W/") else etag
+    return any((tag[2:] if tag.startswith("W/") else tag) == opaque for tag in tags)
+
+
+class BufferResponse(Response):
+    """
+    Response whose body is a sequence of buffers, sent without joining them
+
+    Memoryviews (for example of a memory-mapped file) are sent in chunks
+    sliced from the view, so the body is never copied into one bytes object.
+    """
+
+    chunk_size = 1 << 20
+
+    def __init__(
+        self,
+        parts: Sequence[Buffer],
+        status_code: int = 200,
+        headers: Optional[dict] = None,
+        media_type: Optional[str] = None
+    ):
+        self.parts = parts
+        self.status_code = status_code
+        self.media_type = media_type
+        self.background = None
+        self.body = b""
+        self.init_headers(headers)
+        self.headers["content-length"] = str(sum(len(part) for part in parts))
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        await send({"type": "http.response.start", "status": self.status_code, "headers": self.raw_headers})
+        for part in self.parts:
+            for start in range(0, len(part), self.chunk_size):
+                await send({"type": "http.response.body", "body": part[start:start + self.chunk_size], "more_body": True})
+        await send({"type": "http.response.body", "body": b"", "more_body": False})
+
+
+def slice_parts(parts: Sequence[Buffer], start: int, end: int) -> Sequence[Buffer]:
+    """
+    Select a byte range from a sequence of buffers without copying
+
+    Args:
+        parts: Buffers making up the full body
+        start: First byte
+        end: End byte (exclusive)
+
+    Returns:
+        Slices of the buffers that cover the range
+    """
+    selected = []
+    offset = 0
+    for part in parts:
+        part_start, part_end = max(start - offset, 0), min(end - offset, len(part))
+        if part_start < part_end:
+            selected.append(part[part_start:part_end])
+        offset += len(part)
+    return selected
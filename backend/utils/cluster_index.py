@@ -0,0 +1,212 @@
+import math
+from typing import Any, Dict, Hashable, Iterator, List, Optional, Set, Tuple
+
+from utils.geo import mercator_lat, mercator_lon, mercator_x, mercator_y
+
+
+class _Cell:
+    __slots__ = ("count", "sum_x", "sum_y", "value_count", "value_sum", "value_max", "members")
+
+    def __init__(self):
+        self.count = 0
+        self.sum_x = 0.0
+        self.sum_y = 0.0
+        self.value_count = 0
+        self.value_sum = 0.0
+        self.value_max: Optional[float] = None
+        self.members: Optional[Set[Hashable]] = None
+
+
+class ClusterIndex:
+    """
+    Hierarchical point clustering for map display
+
+    Points are projected to Web Mercator and, for every zoom level, bucketed
+    into grid cells about radius_px screen pixels wide. Cells halve in size
+    with each zoom level, so every cell has at most four children and a
+    cluster at one zoom level is exactly the union of its children at the
+    next. Each cell keeps its member count, centroid and the mean and max of
+    the point values. Adding, moving or removing a point touches one cell per
+    zoom level, so the index stays current without rebuilds.
+    """
+
+    def __init__(self, radius_px: float = 60.0, tile_size: int = 256, max_zoom: int = 16):
+        """
+        Initialize an empty index
+
+        Args:
+            radius_px: Approximate cluster width in screen pixels
+            tile_size: Map tile size in pixels
+            max_zoom: Highest zoom level that is clustered; above it points are returned as-is
+        """
+        self.max_zoom = max_zoom
+        self.base_cell = radius_px / tile_size
+        self._cells: List[Dict[Tuple[int, int], _Cell]] = [{} for _ in range(max_zoom + 1)]
+        # key -> (mercator x, mercator y, value, lat, lon)
+        self._points: Dict[Hashable, Tuple[float, float, Optional[float], float, float]] = {}
+
+    def __len__(self) -> int:
+        return len(self._points)
+
+    def insert(self, key: Hashable, lat: float, lon: float, value: Optional[float] = None) -> None:
+        """
+        Add a point, or move it if the key is already indexed
+
+        Args:
+            key: Point identifier
+            lat: Latitude in degrees
+            lon: Longitude in degrees
+            value: Optional value aggregated into cluster mean and max
+        """
+        self.remove(key)
+        x, y = float(mercator_x(lon)), float(mercator_y(lat))
+        self._points[key] = (x, y, value, lat, lon)
+        for zoom in range(self.max_zoom + 1):
+            cell = self._cells[zoom].setdefault(self._cell(x, y, zoom), _Cell())
+            cell.count += 1
+            cell.sum_x += x
+            cell.sum_y += y
+            if value is not None:
+                cell.value_count += 1
+                cell.value_sum += value
+                cell.value_max = value if cell.value_max is None else max(cell.value_max, value)
+            if zoom == self.max_zoom:
+                if cell.members is None:
+                    cell.members = set()
+                cell.members.add(key)
+
+    def remove(self, key: Hashable) -> bool:
+        """
+        Remove a point
+
+        Args:
+            key: Point identifier
+
+        Returns:
+            True if the point was indexed
+        """
+        point = self._points.pop(key, None)
+        if point is None:
+            return False
+        x, y, value = point[:3]
+        # Bottom-up, so a parent's max can be recomputed from updated children
+        for zoom in range(self.max_zoom, -1, -1):
+            index = self._cell(x, y, zoom)
+            cell = self._cells[zoom][index]
+            cell.count -= 1
+            if cell.count == 0:
+                del self._cells[zoom][index]
+                continue
+            cell.sum_x -= x
+            cell.sum_y -= y
+            if zoom == self.max_zoom:
+                cell.members.discard(key)
+            if value is not None:
+                cell.value_count -= 1
+                cell.value_sum -= value
+                if value == cell.value_max:
+                    cell.value_max = self._recompute_max(zoom, index)
+        return True
+
+    def clusters(self, west: float, south: float, east: float, north: float, zoom: float) -> List[Dict[str, Any]]:
+        """
+        Get the clusters and single points whose centre lies in a bounding box
+
+        Args:
+            west: Western longitude (may exceed east when crossing the antimeridian)
+            south: Southern latitude
+            east: Eastern longitude
+            north: Northern latitude
+            zoom: Map zoom level
+
+        Returns:
+            List of dictionaries with id, cluster, count, lat, lon, mean_value and max_value
+        """
+        zoom = max(0, int(math.floor(zoom)))
+        y_min, y_max = float(mercator_y(north)), float(mercator_y(south))
+        if west <= east:
+            x_ranges = [(float(mercator_x(west)), float(mercator_x(east)))]
+        else:
+            x_ranges = [(float(mercator_x(west)), 1.0), (0.0, float(mercator_x(east)))]
+
+        results = []
+        level = min(zoom, self.max_zoom)
+        for x_min, x_max in x_ranges:
+            for index, cell in self._cells_in(level, x_min, x_max, y_min, y_max):
+                if zoom > self.max_zoom or cell.count == 1:
+                    for key in self._members(level, index):
+                        x, y, value, lat, lon = self._points[key]
+                        if x_min <= x <= x_max and y_min <= y <= y_max:
+                            results.append({
+                                "id": key,
+                                "cluster": False,
+                                "count": 1,
+                                "lat": lat,
+                                "lon": lon,
+                                "mean_value": value,
+                                "max_value": value
+                            })
+                    continue
+                cx, cy = cell.sum_x / cell.count, cell.sum_y / cell.count
+                if x_min <= cx <= x_max and y_min <= cy <= y_max:
+                    results.append({
+                        "id": f"{level}/{index[0]}/{index[1]}",
+                        "cluster": True,
+                        "count": cell.count,
+                        "lat": round(float(mercator_lat(cy)), 6),
+                        "lon": round(float(mercator_lon(cx)), 6),
+                        "mean_value": cell.value_sum / cell.value_count if cell.value_count else None,
+                        "max_value": cell.value_max
+                    })
+        return results
+
+    def _cell(self, x: float, y: float, zoom: int) -> Tuple[int, int]:
+        scale = 2 ** zoom / self.base_cell
+        return math.floor(x * scale), math.floor(y * scale)
+
+    def _cells_in(
+        self,
+        zoom: int,
+        x_min: float,
+        x_max: float,
+        y_min: float,
+        y_max: float
+    ) -> Iterator[Tuple[Tuple[int, int], _Cell]]:
+        cells = self._cells[zoom]
+        (ix_min, iy_min), (ix_max, iy_max) = self._cell(x_min, y_min, zoom), self._cell(x_max, y_max, zoom)
+        # Walking a very large box is slower than scanning the occupied cells
+        if (ix_max - ix_min + 1) * (iy_max - iy_min + 1) > len(cells):
+            for index, cell in cells.items():
+                if ix_min <= index[0] <= ix_max and iy_min <= index[1] <= iy_max:
+                    yield index, cell
+        else:
+            for ix in range(ix_min, ix_max + 1):
+                for iy in range(iy_min, iy_max + 1):
+                    cell = cells.get((ix, iy))
+                    if cell is not None:
+                        yield (ix, iy), cell
+
+    def _children(self, zoom: int, index: Tuple[int, int]) -> Iterator[Tuple[Tuple[int, int], _Cell]]:
+        cells = self._cells[zoom + 1]
+        for dx in (0, 1):
+            for dy in (0, 1):
+                child_index = (index[0] * 2 + dx, index[1] * 2 + dy)
+                child = cells.get(child_index)
+                if child is not None:
+                    yield child_index, child
+
+    def _members(self, zoom: int, index: Tuple[int, int]) -> Iterator[Hashable]:
+        """Keys of the points in a cell, found by descending to the finest level"""
+        if zoom == self.max_zoom:
+            yield from self._cells[zoom][index].members
+            return
+        for child_index, _ in self._children(zoom, index):
+            yield from self._members(zoom + 1, child_index)
+
+    def _recompute_max(self, zoom: int, index: Tuple[int, int]) -> Optional[float]:
+        if zoom == self.max_zoom:
+            values = [self._points[key][2] for key in self._cells[zoom][index].members]
+        else:
+            values = [child.value_max for _, child in self._children(zoom, index)]
+        values = [value for value in values if value is not None]
+        return max(values) if values else None
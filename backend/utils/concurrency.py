@@ -0,0 +1,373 @@
+import asyncio
+import math
+import time
+from collections import deque
+from contextlib import asynccontextmanager, contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, Optional, Tuple
+
+# Scheduling classes for outbound work and their weighted-fair-queueing weights
+PRIORITY_WEIGHTS = {"interactive": 8, "normal": 3, "background": 1}
+
+# Priority of the work running in the current task; tasks inherit it when spawned
+current_priority: ContextVar[str] = ContextVar("current_priority", default="normal")
+
+
+@contextmanager
+def priority(name: str):
+    """
+    Run a block of work under a scheduling class
+
+    Args:
+        name: "interactive", "normal" or "background"
+    """
+    if name not in PRIORITY_WEIGHTS:
+        raise ValueError(f"Unknown priority: {name}")
+    token = current_priority.set(name)
+    try:
+        yield
+    finally:
+        current_priority.reset(token)
+
+
+class GradientLimit:
+    """
+    Concurrency limit that adapts to observed latency
+
+    A short-term RTT average is compared with a slowly moving long-term
+    one. While they agree the limit grows by roughly sqrt(limit); when
+    latency inflates the limit shrinks in proportion, and a dropped or
+    throttled call halves it (AIMD backoff).
+    """
+
+    def __init__(
+        self,
+        initial: float = 20,
+        min_limit: float = 1,
+        max_limit: float = 200,
+        tolerance: float = 1.5,
+        smoothing: float = 0.2
+    ):
+        """
+        Initialize the limit
+
+        Args:
+            initial: Starting limit
+            min_limit: Lower bound for the limit
+            max_limit: Upper bound for the limit
+            tolerance: Latency inflation accepted before the limit shrinks
+            smoothing: Weight of each new estimate in the limit
+        """
+        self.limit = float(initial)
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.tolerance = tolerance
+        self.smoothing = smoothing
+        self.short_rtt: Optional[float] = None
+        self.long_rtt: Optional[float] = None
+
+    def update(self, rtt: float, in_flight: int, dropped: bool = False) -> float:
+        """
+        Feed one completed call into the limit
+
+        Args:
+            rtt: Observed latency in seconds
+            in_flight: Calls in flight when this one started
+            dropped: Whether the call was throttled or failed from overload
+
+        Returns:
+            The new limit
+        """
+        if dropped:
+            self.limit = max(self.min_limit, self.limit * 0.5)
+            return self.limit
+
+        self.short_rtt = rtt if self.short_rtt is None else 0.9 * self.short_rtt + 0.1 * rtt
+        self.long_rtt = rtt if self.long_rtt is None else 0.99 * self.long_rtt + 0.01 * rtt
+        if self.long_rtt / self.short_rtt > 2:
+            # Latency recovered well below the long-term average; let it catch up
+            self.long_rtt *= 0.95
+
+        # Don't grow the limit while the limit isn't what's holding callers back
+        if in_flight < self.limit / 2:
+            return self.limit
+
+        gradient = max(0.5, min(1.0, self.tolerance * self.long_rtt / self.short_rtt))
+        estimate = self.limit * gradient + math.sqrt(self.limit)
+        limit = self.limit * (1 - self.smoothing) + estimate * self.smoothing
+        self.limit = max(self.min_limit, min(self.max_limit, limit))
+        return self.limit
+
+
+class LimitExceeded(Exception):
+    """Raised when a limiter sheds a call instead of admitting it"""
+
+
+class LimiterSlot:
+    """
+    Handle for one admitted call; set dropped when the callee throttled it
+    """
+
+    def __init__(self):
+        self.dropped = False
+
+
+class WeightedFairQueue:
+    """
+    Waiters grouped by priority class and served by weighted fair queueing
+
+    Every waiter gets a virtual finish tag of 1/weight past its class's
+    previous tag, so interactive and normal waiters are interleaved in
+    proportion to their weights. Background waiters are only served when
+    no other class is waiting.
+    """
+
+    def __init__(self, weights: Optional[Dict[str, float]] = None):
+        self.weights = weights or PRIORITY_WEIGHTS
+        self._queues: Dict[str, deque] = {name: deque() for name in self.weights}
+        self._last_finish = {name: 0.0 for name in self.weights}
+        self._virtual_time = 0.0
+
+    def __len__(self) -> int:
+        return sum(len(queue) for queue in self._queues.values())
+
+    def lengths(self) -> Dict[str, int]:
+        return {name: len(queue) for name, queue in self._queues.items()}
+
+    def waiting_ahead_of(self, priority: str) -> bool:
+        """Check whether a new waiter of this class would be served after someone else"""
+        if priority == "background":
+            return len(self) > 0
+        return any(self._queues[name] for name in self._queues if name != "background")
+
+    def push(self, priority: str, item: Any) -> None:
+        tag = max(self._virtual_time, self._last_finish[priority]) + 1.0 / self.weights[priority]
+        self._last_finish[priority] = tag
+        self._queues[priority].append((tag, item))
+
+    def pop(self, allow_background: bool = True) -> Optional[Tuple[str, Any]]:
+        """
+        Remove the next waiter
+
+        Args:
+            allow_background: Whether background waiters may be served
+
+        Returns:
+            (priority, item) or None if nobody may be served
+        """
+        heads = [
+            (queue[0][0], name) for name, queue in self._queues.items()
+            if queue and name != "background"
+        ]
+        if heads:
+            _, name = min(heads)
+        elif allow_background and self._queues.get("background"):
+            name = "background"
+        else:
+            return None
+        tag, item = self._queues[name].popleft()
+        self._virtual_time = max(self._virtual_time, tag)
+        return name, item
+
+    def remove(self, item: Any) -> bool:
+        for queue in self._queues.values():
+            for entry in queue:
+                if entry[1] is item:
+                    queue.remove(entry)
+                    return True
+        return False
+
+
+class ConcurrencyLimiter:
+    """
+    Async concurrency limiter with an adaptive limit and a bounded queue
+
+    Callers beyond the limit wait in a weighted fair queue keyed by their
+    priority class (see current_priority). Background callers never take a
+    slot while others are waiting and may hold at most background_share of
+    the limit, so they cannot inflate interactive latency. When the queue
+    is full, or a caller waits longer than queue_timeout, acquire() returns
+    False so the caller can shed the work instead of piling up behind it.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        limit: Optional[GradientLimit] = None,
+        max_queue: Optional[int] = None,
+        queue_timeout: Optional[float] = None,
+        background_share: float = 0.5
+    ):
+        """
+        Initialize the limiter
+
+        Args:
+            name: Name used in stats
+            limit: Adaptive limit; defaults to GradientLimit()
+            max_queue: Maximum number of waiting callers, None for unbounded
+            queue_timeout: Maximum seconds a caller may wait, None for no limit
+            background_share: Fraction of the limit background work may use
+        """
+        self.name = name
+        self.limit = limit or GradientLimit()
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.background_share = background_share
+        self.in_flight = 0
+        self.background_in_flight = 0
+        self.admitted = 0
+        self.rejected = 0
+        self.dropped = 0
+        self._waiters = WeightedFairQueue()
+
+    @property
+    def queue_length(self) -> int:
+        return len(self._waiters)
+
+    async def acquire(self, priority: Optional[str] = None) -> bool:
+        """
+        Wait for a slot
+
+        Args:
+            priority: Scheduling class; defaults to current_priority
+
+        Returns:
+            True once admitted, False if the caller should be shed
+        """
+        priority = priority or current_priority.get()
+        if self._has_capacity(priority) and not self._waiters.waiting_ahead_of(priority):
+            self._reserve(priority)
+            self.admitted += 1
+            return True
+
+        if self.max_queue is not None and len(self._waiters) >= self.max_queue:
+            self.rejected += 1
+            return False
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.push(priority, waiter)
+        try:
+            await asyncio.wait_for(asyncio.shield(waiter), timeout=self.queue_timeout)
+        except asyncio.TimeoutError:
+            self._abandon(waiter, priority)
+            self.rejected += 1
+            return False
+        except asyncio.CancelledError:
+            self._abandon(waiter, priority)
+            raise
+        # The slot was reserved for us by _wake
+        self.admitted += 1
+        return True
+
+    def release(
+        self,
+        rtt: Optional[float],
+        in_flight: Optional[int] = None,
+        dropped: bool = False,
+        priority: Optional[str] = None
+    ) -> None:
+        """
+        Release a slot and feed the call's latency into the limit
+
+        Args:
+            rtt: Observed latency in seconds, or None to release without a sample
+            in_flight: Calls in flight when the call started; defaults to the current count
+            dropped: Whether the call was throttled or failed from overload
+            priority: Scheduling class the slot was acquired with; defaults to current_priority
+        """
+        self._unreserve(priority or current_priority.get())
+        if dropped:
+            self.dropped += 1
+        if rtt is not None:
+            self.limit.update(rtt, self.in_flight + 1 if in_flight is None else in_flight, dropped)
+        self._wake()
+
+    @asynccontextmanager
+    async def slot(self, priority: Optional[str] = None):
+        """
+        Hold a slot for the duration of a call and time it
+
+        Args:
+            priority: Scheduling class; defaults to current_priority
+
+        Yields:
+            LimiterSlot; mark it dropped on 429s and similar overload signals
+
+        Raises:
+            LimitExceeded: If the call is shed
+        """
+        priority = priority or current_priority.get()
+        if not await self.acquire(priority):
+            raise LimitExceeded(f"{self.name} is over its concurrency limit")
+        slot = LimiterSlot()
+        in_flight = self.in_flight
+        started = time.perf_counter()
+        sampled = True
+        try:
+            yield slot
+        except (asyncio.TimeoutError, TimeoutError):
+            slot.dropped = True
+            raise
+        except asyncio.CancelledError:
+            # A cancelled call says nothing about the callee's latency
+            sampled = False
+            raise
+        finally:
+            rtt = time.perf_counter() - started if sampled else None
+            self.release(rtt, in_flight, slot.dropped, priority)
+
+    def retry_after(self) -> int:
+        """
+        Estimate how many seconds a shed caller should wait before retrying
+        """
+        rtt = self.limit.long_rtt or 1.0
+        return max(1, math.ceil(rtt * (len(self._waiters) + 1) / max(1.0, self.limit.limit)))
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "limit": round(self.limit.limit, 2),
+            "in_flight": self.in_flight,
+            "background_in_flight": self.background_in_flight,
+            "queue_length": len(self._waiters),
+            "queued_by_priority": self._waiters.lengths(),
+            "admitted": self.admitted,
+            "rejected": self.rejected,
+            "dropped": self.dropped,
+            "rtt": None if self.limit.short_rtt is None else round(self.limit.short_rtt, 4)
+        }
+
+    def _has_capacity(self, priority: str) -> bool:
+        if self.in_flight >= int(self.limit.limit):
+            return False
+        return priority != "background" or self._background_allowed()
+
+    def _background_allowed(self) -> bool:
+        return self.background_in_flight < max(1, int(self.limit.limit * self.background_share))
+
+    def _reserve(self, priority: str) -> None:
+        self.in_flight += 1
+        if priority == "background":
+            self.background_in_flight += 1
+
+    def _unreserve(self, priority: str) -> None:
+        self.in_flight -= 1
+        if priority == "background":
+            self.background_in_flight -= 1
+
+    def _wake(self) -> None:
+        # Hand freed slots to waiters, reserving each slot before the waiter runs
+        while self.in_flight < int(self.limit.limit):
+            entry = self._waiters.pop(allow_background=self._background_allowed())
+            if entry is None:
+                return
+            priority, waiter = entry
+            if not waiter.done():
+                self._reserve(priority)
+                waiter.set_result(None)
+
+    def _abandon(self, waiter: asyncio.Future, priority: str) -> None:
+        if not self._waiters.remove(waiter) and waiter.done() and not waiter.cancelled():
+            # Woken just as it gave up; pass the reserved slot on
+            self._unreserve(priority)
+            self._wake()
+        waiter.cancel()
@@ -0,0 +1,300 @@
+import math
+from typing import Optional, Tuple
+
+import numpy as np
+
+# Mean Earth radius used for all great-circle distances
+EARTH_RADIUS_KM = 6371.0088
+
+
+def haversine_km(lat1, lon1, lat2, lon2):
+    """
+    Great-circle distance in kilometres
+
+    Accepts scalars or NumPy arrays (broadcast against each other).
+
+    Args:
+        lat1: Latitude of the first point(s) in degrees
+        lon1: Longitude of the first point(s) in degrees
+        lat2: Latitude of the second point(s) in degrees
+        lon2: Longitude of the second point(s) in degrees
+
+    Returns:
+        Distance(s) in kilometres
+    """
+    lat1, lon1, lat2, lon2 = (np.radians(value) for value in (lat1, lon1, lat2, lon2))
+    a = (
+        np.sin((lat2 - lat1) / 2) ** 2
+        + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    )
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+
+def parse_coordinates(location: str) -> Optional[Tuple[float, float]]:
+    """
+    Parse a "lat,lon" string
+
+    Args:
+        location: Location string
+
+    Returns:
+        (lat, lon) tuple, or None if the string is not a valid coordinate pair
+    """
+    parts = location.split(",")
+    if len(parts) != 2:
+        return None
+    try:
+        lat, lon = float(parts[0]), float(parts[1])
+    except ValueError:
+        return None
+    if not (-90 <= lat <= 90 and -180 <= lon <= 180) or math.isnan(lat) or math.isnan(lon):
+        return None
+    return lat, lon
+
+
+# Geohash alphabet (base 32 without a, i, l, o)
+GEOHASH_ALPHABET = "0123456789bcdefghjkmnpqrstuvwxyz"
+_GEOHASH_INDEX = {char: index for index, char in enumerate(GEOHASH_ALPHABET)}
+
+
+def geohash_encode(lat: float, lon: float, precision: int = 6) -> str:
+    """
+    Encode a point as a geohash
+
+    Args:
+        lat: Latitude in degrees
+        lon: Longitude in degrees
+        precision: Number of characters (each adds 5 bits)
+
+    Returns:
+        Geohash string
+    """
+    lat_range = [-90.0, 90.0]
+    lon_range = [-180.0, 180.0]
+    chars = []
+    bits = 0
+    value = 0
+    even = True
+    while len(chars) < precision:
+        # Bits alternate between longitude and latitude, longitude first
+        interval, coordinate = (lon_range, lon) if even else (lat_range, lat)
+        middle = (interval[0] + interval[1]) / 2
+        if coordinate >= middle:
+            value = value * 2 + 1
+            interval[0] = middle
+        else:
+            value = value * 2
+            interval[1] = middle
+        even = not even
+        bits += 1
+        if bits == 5:
+            chars.append(GEOHASH_ALPHABET[value])
+            bits = 0
+            value = 0
+    return "".join(chars)
+
+
+def geohash_bounds(geohash: str) -> Tuple[float, float, float, float]:
+    """
+    Get the cell a geohash covers
+
+    Args:
+        geohash: Geohash string
+
+    Returns:
+        (lat_min, lat_max, lon_min, lon_max) tuple
+
+    Raises:
+        ValueError: If the string contains characters outside the geohash alphabet
+    """
+    lat_range = [-90.0, 90.0]
+    lon_range = [-180.0, 180.0]
+    even = True
+    for char in geohash.lower():
+        if char not in _GEOHASH_INDEX:
+            raise ValueError(f"Invalid geohash character: {char!r}")
+        value = _GEOHASH_INDEX[char]
+        for shift in range(4, -1, -1):
+            interval = lon_range if even else lat_range
+            middle = (interval[0] + interval[1]) / 2
+            if (value >> shift) & 1:
+                interval[0] = middle
+            else:
+                interval[1] = middle
+            even = not even
+    return lat_range[0], lat_range[1], lon_range[0], lon_range[1]
+
+
+def geohash_decode(geohash: str) -> Tuple[float, float]:
+    """
+    Decode a geohash to the centre of its cell
+
+    Args:
+        geohash: Geohash string
+
+    Returns:
+        (lat, lon) tuple
+    """
+    lat_min, lat_max, lon_min, lon_max = geohash_bounds(geohash)
+    return (lat_min + lat_max) / 2, (lon_min + lon_max) / 2
+
+
+# Latitude limit of the Web Mercator projection
+MERCATOR_MAX_LAT = 85.05112878
+
+
+def mercator_x(lon):
+    """
+    Project longitude to the Web Mercator x coordinate in [0, 1]
+
+    Accepts scalars or NumPy arrays.
+
+    Args:
+        lon: Longitude in degrees
+
+    Returns:
+        x, increasing eastwards from the antimeridian
+    """
+    return (np.asarray(lon, dtype=float) + 180.0) / 360.0
+
+
+def mercator_y(lat):
+    """
+    Project latitude to the Web Mercator y coordinate in [0, 1]
+
+    Accepts scalars or NumPy arrays; latitudes beyond the projection limit
+    are clamped.
+
+    Args:
+        lat: Latitude in degrees
+
+    Returns:
+        y, increasing southwards from the top of the map
+    """
+    radians = np.radians(np.clip(lat, -MERCATOR_MAX_LAT, MERCATOR_MAX_LAT))
+    return 0.5 - np.log(np.tan(np.pi / 4 + radians / 2)) / (2 * np.pi)
+
+
+def mercator_lon(x):
+    """
+    Inverse of mercator_x
+
+    Args:
+        x: Web Mercator x in [0, 1]
+
+    Returns:
+        Longitude in degrees
+    """
+    return np.asarray(x, dtype=float) * 360.0 - 180.0
+
+
+def mercator_lat(y):
+    """
+    Inverse of mercator_y
+
+    Args:
+        y: Web Mercator y in [0, 1]
+
+    Returns:
+        Latitude in degrees
+    """
+    return np.degrees(np.arctan(np.sinh(np.pi * (1 - 2 * np.asarray(y, dtype=float)))))
+
+
+def inverse_distance_weighting(
+    lats: np.ndarray,
+    lons: np.ndarray,
+    reading_lats: np.ndarray,
+    reading_lons: np.ndarray,
+    reading_values: np.ndarray,
+    power: float = 2.0,
+    max_distance_km: float = float("inf")
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Interpolate readings to points by inverse-distance weighting
+
+    Args:
+        lats: Latitudes of the points to interpolate
+        lons: Longitudes of the points to interpolate
+        reading_lats: Latitudes of the readings
+        reading_lons: Longitudes of the readings
+        reading_values: Reading values
+        power: Distance exponent
+        max_distance_km: Readings further away than this are ignored
+
+    Returns:
+        (values, nearest) arrays: the interpolated values, NaN where no
+        reading is within max_distance_km, and the distance to the nearest
+        reading
+    """
+    values = np.full(lats.shape, np.nan)
+    nearest = np.full(lats.shape, np.inf)
+    if not len(reading_values):
+        return values, nearest
+    # Bound the size of the distance matrix
+    chunk = max(1, 4_000_000 // len(reading_values))
+    for start in range(0, len(lats), chunk):
+        end = start + chunk
+        distances = haversine_km(
+            lats[start:end, None], lons[start:end, None], reading_lats[None, :], reading_lons[None, :]
+        )
+        nearest[start:end] = distances.min(axis=1)
+        weights = np.where(
+            distances <= max_distance_km,
+            1.0 / np.maximum(distances, 0.01) ** power,
+            0.0
+        )
+        total = weights.sum(axis=1)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            values[start:end] = np.where(total > 0, weights @ reading_values / total, np.nan)
+    return values, nearest
+
+
+def point_in_polygon(lat: float, lon: float, ring: np.ndarray) -> bool:
+    """
+    Test whether a point lies inside a polygon by ray casting
+
+    Counts the polygon edges crossed by a ray running east from the point;
+    an odd count means the point is inside. All edges are tested in one
+    vectorised pass.
+
+    Args:
+        lat: Point latitude
+        lon: Point longitude
+        ring: Array of shape (n, 2) holding the (lon, lat) vertices, unclosed
+
+    Returns:
+        True if the point is inside the polygon
+    """
+    x1, y1 = ring[:, 0], ring[:, 1]
+    x2, y2 = np.roll(x1, -1), np.roll(y1, -1)
+    straddles = (y1 > lat) != (y2 > lat)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        crossing_x = x1 + (lat - y1) * (x2 - x1) / (y2 - y1)
+    return bool(np.count_nonzero(straddles & (lon < crossing_x)) % 2)
+
+
+def polygon_distance_km(lat: float, lon: float, ring: np.ndarray) -> float:
+    """
+    Approximate distance from a point to a polygon's boundary
+
+    Uses an equirectangular projection centred on the point, which is
+    accurate to well under a percent over the short distances this is used
+    for.
+
+    Args:
+        lat: Point latitude
+        lon: Point longitude
+        ring: Array of shape (n, 2) holding the (lon, lat) vertices, unclosed
+
+    Returns:
+        Distance in kilometres to the nearest edge
+    """
+    km_per_degree = math.pi * EARTH_RADIUS_KM / 180
+    x = (ring[:, 0] - lon) * math.cos(math.radians(lat)) * km_per_degree
+    y = (ring[:, 1] - lat) * km_per_degree
+    dx, dy = np.roll(x, -1) - x, np.roll(y, -1) - y
+    length = dx * dx + dy * dy
+    with np.errstate(invalid="ignore", divide="ignore"):
+        t = np.clip(np.where(length > 0, -(x * dx + y * dy) / length, 0.0), 0.0, 1.0)
+    return float(np.hypot(x + t * dx, y + t * dy).min())
@@ -0,0 +1,317 @@
+"""
+Pluggable HTML-to-text extraction backends used by the Parser utility
+"""
+
+import os
+import re
+from html.parser import HTMLParser
+from typing import Dict, Iterable, Iterator, List, Optional
+
+# Elements whose content is never part of the extracted text
+SKIP_TAGS = ("script", "style", "header", "footer", "nav")
+
+_PHRASE_SPLIT = re.compile(r" {2,}")
+
+
+def normalize_whitespace(text: str) -> str:
+    """
+    Collapse extracted text into one phrase per line
+
+    Lines are stripped, split on runs of two or more spaces and empty
+    phrases are dropped, matching the original Parser.clean_html output.
+
+    Args:
+        text: Raw text content
+
+    Returns:
+        Normalised text content
+    """
+    return "\n".join(_iter_phrases(text))
+
+
+def _iter_phrases(text: str) -> Iterator[str]:
+    for line in text.splitlines():
+        for phrase in _PHRASE_SPLIT.split(line):
+            phrase = phrase.strip()
+            if phrase:
+                yield phrase
+
+
+class HTMLTextBackend:
+    """
+    Base class for HTML text extraction backends
+    """
+
+    name = "base"
+
+    @classmethod
+    def is_available(cls) -> bool:
+        """
+        Check whether the backend's parser library is installed
+
+        Returns:
+            True if the backend can be used
+        """
+        return False
+
+    def extract_text(self, html_content: str) -> str:
+        """
+        Extract cleaned text from HTML content
+
+        Args:
+            html_content: Raw HTML content
+
+        Returns:
+            Cleaned text content
+        """
+        raise NotImplementedError
+
+
+class SelectolaxBackend(HTMLTextBackend):
+    """
+    Backend using selectolax's C (lexbor) parser
+    """
+
+    name = "selectolax"
+
+    @classmethod
+    def is_available(cls) -> bool:
+        try:
+            import selectolax.lexbor  # noqa: F401
+            return True
+        except ImportError:
+            return False
+
+    def __init__(self):
+        from selectolax.lexbor import LexborHTMLParser
+        self._parser_cls = LexborHTMLParser
+
+    def extract_text(self, html_content: str) -> str:
+        if not html_content:
+            return ""
+        tree = self._parser_cls(html_content)
+        tree.strip_tags(list(SKIP_TAGS))
+        if tree.root is None:
+            return ""
+        return normalize_whitespace(tree.root.text(deep=True, separator=""))
+
+
+class LxmlBackend(HTMLTextBackend):
+    """
+    Backend using lxml's C (libxml2) HTML parser
+    """
+
+    name = "lxml"
+
+    @classmethod
+    def is_available(cls) -> bool:
+        try:
+            import lxml.html  # noqa: F401
+            return True
+        except ImportError:
+            return False
+
+    def __init__(self):
+        import lxml.html
+        self._html = lxml.html
+
+    def extract_text(self, html_content: str) -> str:
+        if not html_content or not html_content.strip():
+            return ""
+        try:
+            root = self._html.document_fromstring(html_content)
+        except Exception:
+            # libxml2 rejects documents it considers empty (e.g. only comments)
+            return ""
+        for element in list(root.iter(*SKIP_TAGS)):
+            element.drop_tree()
+        return normalize_whitespace(root.text_content())
+
+
+class BeautifulSoupBackend(HTMLTextBackend):
+    """
+    Backend using BeautifulSoup with the pure-Python html.parser
+    """
+
+    name = "html.parser"
+
+    @classmethod
+    def is_available(cls) -> bool:
+        try:
+            import bs4  # noqa: F401
+            return True
+        except ImportError:
+            return False
+
+    def __init__(self):
+        from bs4 import BeautifulSoup
+        self._soup_cls = BeautifulSoup
+
+    def extract_text(self, html_content: str) -> str:
+        soup = self._soup_cls(html_content, "html.parser")
+        for element in soup(list(SKIP_TAGS)):
+            element.decompose()
+        return normalize_whitespace(soup.get_text())
+
+
+class StreamingBackend(HTMLTextBackend):
+    """
+    Backend using the incremental standard-library tokeniser
+
+    Always available; slower than the C parsers but runs in bounded memory.
+    """
+
+    name = "streaming"
+
+    @classmethod
+    def is_available(cls) -> bool:
+        return True
+
+    def extract_text(self, html_content: str) -> str:
+        return "\n".join(iter_clean_text([html_content]))
+
+
+# Backends in order of preference when none is requested explicitly
+BACKENDS = [SelectolaxBackend, LxmlBackend, BeautifulSoupBackend, StreamingBackend]
+
+_instances: Dict[str, HTMLTextBackend] = {}
+
+
+def available_backends() -> List[str]:
+    """
+    List the names of the installed backends in preference order
+
+    Returns:
+        List of backend names
+    """
+    return [backend.name for backend in BACKENDS if backend.is_available()]
+
+
+def get_backend(name: Optional[str] = None) -> HTMLTextBackend:
+    """
+    Get an HTML text extraction backend
+
+    Args:
+        name: Backend name; defaults to the HTML_TEXT_BACKEND environment
+            variable, then to the fastest installed backend
+
+    Returns:
+        Backend instance (cached per name)
+    """
+    name = name or os.getenv("HTML_TEXT_BACKEND")
+
+    if name is None:
+        for backend in BACKENDS:
+            if backend.is_available():
+                name = backend.name
+                break
+
+    if name not in _instances:
+        for backend in BACKENDS:
+            if backend.name == name:
+                if not backend.is_available():
+                    raise ValueError(f"HTML text backend '{name}' is not installed")
+                _instances[name] = backend()
+                break
+        else:
+            raise ValueError(f"Unknown HTML text backend: {name}")
+
+    return _instances[name]
+
+
+class StreamingTextExtractor(HTMLParser):
+    """
+    Incremental HTML tokeniser that emits cleaned text lines as they complete
+
+    Only the current unfinished line (capped at max_line_chars) and the
+    tokeniser's unparsed tail are held in memory, so arbitrarily large
+    pages can be processed chunk by chunk.
+    """
+
+    def __init__(self, max_line_chars: int = 64 * 1024):
+        """
+        Initialize the streaming extractor
+
+        Args:
+            max_line_chars: Pending text size at which a line is flushed
+                even if no newline has been seen
+        """
+        super().__init__(convert_charrefs=True)
+        self.max_line_chars = max_line_chars
+        self._skip_depth = 0
+        self._pending: List[str] = []
+        self._pending_len = 0
+        self._ready: List[str] = []
+
+    def handle_starttag(self, tag, attrs):
+        if tag in SKIP_TAGS:
+            self._skip_depth += 1
+
+    def handle_endtag(self, tag):
+        if tag in SKIP_TAGS and self._skip_depth:
+            self._skip_depth -= 1
+
+    def handle_data(self, data):
+        if self._skip_depth:
+            return
+
+        lines = data.split("\n")
+        for line in lines[:-1]:
+            self._pending.append(line)
+            self._flush()
+        self._pending.append(lines[-1])
+        self._pending_len += len(lines[-1])
+
+        if self._pending_len >= self.max_line_chars:
+            self._flush()
+
+    def feed_chunk(self, chunk: str) -> List[str]:
+        """
+        Feed a chunk of HTML and collect the lines it completed
+
+        Args:
+            chunk: Next piece of the HTML document
+
+        Returns:
+            Cleaned text lines completed by this chunk
+        """
+        self.feed(chunk)
+        return self._take()
+
+    def finish(self) -> List[str]:
+        """
+        Flush the tokeniser and return the remaining lines
+
+        Returns:
+            Cleaned text lines still buffered
+        """
+        self.close()
+        self._flush()
+        return self._take()
+
+    def _flush(self):
+        if self._pending:
+            self._ready.extend(_iter_phrases("".join(self._pending)))
+        self._pending = []
+        self._pending_len = 0
+
+    def _take(self) -> List[str]:
+        ready, self._ready = self._ready, []
+        return ready
+
+
+def iter_clean_text(chunks: Iterable[str], max_line_chars: int = 64 * 1024) -> Iterator[str]:
+    """
+    Stream cleaned text lines from an iterable of HTML chunks
+
+    Args:
+        chunks: Iterable of HTML text chunks (e.g. a response body iterator)
+        max_line_chars: Pending text size at which a line is flushed
+
+    Returns:
+        Iterator over cleaned text lines
+    """
+    extractor = StreamingTextExtractor(max_line_chars=max_line_chars)
+    for chunk in chunks:
+        yield from extractor.feed_chunk(chunk)
+    yield from extractor.finish()
@@ -0,0 +1,280 @@
+"""
+Scanners for JSON objects embedded in free text such as LLM responses
+"""
+
+import json
+import re
+from typing import Any, Dict, Iterator, List, Optional
+
+_decoder = json.JSONDecoder()
+
+# Outside a string only braces and quotes change the scanner state;
+# inside a string only the closing quote and escapes matter
+_STRUCTURAL = re.compile(r'[{}"]')
+_IN_STRING = re.compile(r'["\\]')
+# Scans that may be in either state at once see all of these
+_SCANNED = re.compile(r'[{}"\\]')
+_WHITESPACE = " \t\n\r"
+
+
+def _can_start_object(text: str, brace: int) -> Optional[bool]:
+    """
+    Cheap check that the character after a '{' can begin a JSON object
+
+    Args:
+        text: Text being scanned
+        brace: Index of the opening brace
+
+    Returns:
+        True or False, or None if the text ends before it can be decided
+    """
+    pos = brace + 1
+    length = len(text)
+    while pos < length and text[pos] in _WHITESPACE:
+        pos += 1
+    if pos == length:
+        return None
+    return text[pos] in '"}'
+
+
+def iter_json_objects(text: str) -> Iterator[Dict[str, Any]]:
+    """
+    Yield every top-level JSON object embedded in text, in order
+
+    Balanced brace spans are found in one linear pass (see _balanced_spans)
+    and only those are decoded, so unterminated or malformed text costs no
+    repeated decoding. A decoded object is skipped as a whole; a span that
+    fails to decode, or nests too deeply to decode, falls through to the
+    candidates inside it.
+
+    Args:
+        text: Text that may contain JSON objects
+
+    Returns:
+        Iterator over decoded JSON objects
+    """
+    spans = _balanced_spans(text)
+    pos = 0
+    for start in sorted(spans):
+        if start < pos or not _can_start_object(text, start):
+            continue
+        try:
+            obj, end = _decoder.raw_decode(text[start:spans[start]])
+        except (ValueError, RecursionError):
+            continue
+        yield obj
+        pos = start + end
+
+
+class _Track:
+    """Scanner state for braces that share a string/escape history"""
+
+    __slots__ = ("in_string", "escaped", "depth", "open")
+
+    def __init__(self, brace: int):
+        self.in_string = False
+        # Index of the character a backslash inside a string escapes
+        self.escaped = -1
+        self.depth = 1
+        # Depth level -> braces opened at that level and not yet closed
+        self.open: Dict[int, List[int]] = {1: [brace]}
+
+
+def _balanced_spans(text: str) -> Dict[int, int]:
+    """
+    Map each '{' that starts a balanced span to the end (exclusive) of that span
+
+    A scan started at a brace tracks only string, escape and depth state, so
+    every brace the scan meets outside a string closes exactly where a scan
+    started at that brace would: one scan serves all of them. A brace inside
+    a string starts a second scan, and scans that reach the same string and
+    escape state move in step from then on, so they are merged (the smaller
+    into the larger, re-levelled). At most three scans are ever live, which
+    keeps the pass linear in the length of the text.
+
+    Args:
+        text: Text being scanned
+
+    Returns:
+        Dictionary of opening brace index to span end
+    """
+    spans: Dict[int, int] = {}
+    tracks: List[_Track] = []
+    for match in _SCANNED.finditer(text):
+        char, index = match.group(), match.start()
+        opened = False
+        for track in tracks:
+            if track.escaped == index:
+                continue
+            if track.in_string:
+                if char == "\\":
+                    track.escaped = index + 1
+                elif char == '"':
+                    track.in_string = False
+            elif char == '"':
+                track.in_string = True
+            elif char == "{":
+                track.depth += 1
+                track.open.setdefault(track.depth, []).append(index)
+                opened = True
+            elif char == "}":
+                for brace in track.open.pop(track.depth, ()):
+                    spans[brace] = index + 1
+                track.depth -= 1
+        if char == "{" and not opened:
+            tracks.append(_Track(index))
+        tracks = _merge_tracks(tracks, index)
+    return spans
+
+
+def _merge_tracks(tracks: List[_Track], index: int) -> List[_Track]:
+    """Drop finished scans and merge those in the same state after index"""
+    merged: Dict[tuple, _Track] = {}
+    for track in tracks:
+        if not track.open:
+            continue
+        state = (track.in_string, track.escaped == index + 1)
+        other = merged.get(state)
+        if other is None:
+            merged[state] = track
+            continue
+        large, small = (other, track) if len(other.open) >= len(track.open) else (track, other)
+        shift = large.depth - small.depth
+        for level, braces in small.open.items():
+            large.open.setdefault(level + shift, []).extend(braces)
+        merged[state] = large
+    return list(merged.values())
+
+
+class IncrementalJSONExtractor:
+    """
+    Extract JSON objects from text that arrives in chunks (e.g. a streamed
+    LLM response) as soon as each object is complete
+    """
+
+    def __init__(self, max_buffer: int = 1024 * 1024):
+        """
+        Initialize the incremental extractor
+
+        Args:
+            max_buffer: Largest pending object (in characters) to wait for
+                before the candidate is abandoned
+        """
+        self.max_buffer = max_buffer
+        self._buffer = ""
+        self._start: Optional[int] = None
+        self._pos = 0
+        self._depth = 0
+        self._in_string = False
+
+    def feed(self, chunk: str) -> List[Dict[str, Any]]:
+        """
+        Feed the next chunk of text
+
+        Args:
+            chunk: Next piece of the text
+
+        Returns:
+            JSON objects completed by this chunk
+        """
+        self._buffer += chunk
+        found = []
+
+        while True:
+            if self._start is None and not self._next_candidate():
+                break
+
+            if not self._scan_to_close():
+                if len(self._buffer) - self._start > self.max_buffer:
+                    self._abandon_candidate()
+                    continue
+                break
+
+            try:
+                obj, end = _decoder.raw_decode(self._buffer, self._start)
+                found.append(obj)
+                self._pos = end
+            except (ValueError, RecursionError):
+                self._pos = self._start + 1
+            self._start = None
+
+        return found
+
+    def close(self) -> List[Dict[str, Any]]:
+        """
+        Signal the end of the text and return any objects still pending
+
+        A candidate that never closed may have been a stray brace, so the
+        text after it is rescanned for complete objects.
+
+        Returns:
+            Remaining JSON objects
+        """
+        found = []
+        if self._start is not None:
+            found = list(iter_json_objects(self._buffer[self._start + 1:]))
+        self._buffer = ""
+        self._start = None
+        self._pos = 0
+        return found
+
+    def _next_candidate(self) -> bool:
+        while True:
+            brace = self._buffer.find("{", self._pos)
+            if brace == -1:
+                # Nothing pending; drop the scanned text
+                self._buffer = ""
+                self._pos = 0
+                return False
+
+            plausible = _can_start_object(self._buffer, brace)
+            if plausible is None:
+                # Keep the brace until the next chunk decides it
+                self._buffer = self._buffer[brace:]
+                self._pos = 0
+                return False
+            if plausible:
+                self._buffer = self._buffer[brace:]
+                self._start = 0
+                self._pos = 1
+                self._depth = 1
+                self._in_string = False
+                return True
+            self._pos = brace + 1
+
+    def _scan_to_close(self) -> bool:
+        buffer = self._buffer
+        pos = self._pos
+
+        while True:
+            pattern = _IN_STRING if self._in_string else _STRUCTURAL
+            match = pattern.search(buffer, pos)
+            if match is None:
+                self._pos = len(buffer)
+                return False
+
+            char = match.group()
+            pos = match.end()
+
+            if self._in_string:
+                if char == "\\":
+                    if pos >= len(buffer):
+                        # Escape split across chunks; resume at the backslash
+                        self._pos = match.start()
+                        return False
+                    pos += 1
+                else:
+                    self._in_string = False
+            elif char == '"':
+                self._in_string = True
+            elif char == "{":
+                self._depth += 1
+            else:
+                self._depth -= 1
+                if self._depth == 0:
+                    self._pos = pos
+                    return True
+
+    def _abandon_candidate(self):
+        self._pos = self._start + 1
+        self._start = None
@@ -1,7 +1,11 @@
 import re
-from typing import Dict, Any, List, Optional
-from bs4 import BeautifulSoup
-import json
+from typing import Dict, Any, List, Optional, Iterable, Iterator
+
+from utils.html_text import get_backend, iter_clean_text
+from utils.json_extract import iter_json_objects, IncrementalJSONExtractor
+
+# Bump whenever extraction output changes so cached results are not reused
+PARSER_VERSION = "2"
 
 class Parser:
     """
@@ -9,32 +13,32 @@ class Parser:
     """
     
     @staticmethod
-    def clean_html(html_content: str) -> str:
+    def clean_html(html_content: str, backend: Optional[str] = None) -> str:
         """
         Clean HTML content by removing scripts, styles, and unnecessary tags
         
         Args:
             html_content: Raw HTML content
+            backend: Optional extraction backend name ("selectolax", "lxml",
+                "html.parser" or "streaming"); defaults to the fastest installed
             
         Returns:
             Cleaned text content
         """
-        # Parse HTML
-        soup = BeautifulSoup(html_content, 'html.parser')
-        
-        # Remove script and style elements
-        for script_or_style in soup(['script', 'style', 'header', 'footer', 'nav']):
-            script_or_style.decompose()
-        
-        # Get text content
-        text = soup.get_text()
-        
-        # Clean up whitespace
-        lines = (line.strip() for line in text.splitlines())
-        chunks = (phrase.strip() for line in lines for phrase in line.split("  "))
-        text = '\n'.join(chunk for chunk in chunks if chunk)
+        return get_backend(backend).extract_text(html_content)
+    
+    @staticmethod
+    def clean_html_stream(chunks: Iterable[str]) -> Iterator[str]:
+        """
+        Clean HTML content incrementally with bounded memory
         
-        return text
+        Args:
+            chunks: Iterable of raw HTML chunks
+            
+        Returns:
+            Iterator over cleaned text lines
+        """
+        return iter_clean_text(chunks)
     
     @staticmethod
     def extract_air_quality_data(html_content: str) -> Dict[str, Any]:
@@ -47,8 +51,6 @@ class Parser:
         Returns:
             Dictionary containing structured air quality data
         """
-        soup = BeautifulSoup(html_content, 'html.parser')
-        
         # Initialize result dictionary
         result = {
             "aqi": None,
@@ -123,8 +125,6 @@ class Parser:
         Returns:
             Dictionary containing structured water quality data
         """
-        soup = BeautifulSoup(html_content, 'html.parser')
-        
         # Initialize result dictionary
         result = {
             "status": "Unknown",
@@ -179,6 +179,66 @@ class Parser:
         
         return result
     
+    @staticmethod
+    def extract_pollution_fields(content: str) -> Dict[str, Any]:
+        """
+        Extract pollution fields from the text of a single search result
+        
+        Args:
+            content: Result content text
+            
+        Returns:
+            Dictionary with the aqi, pm25 and health_implications values found
+        """
+        content = content.lower()
+        fields = {}
+        
+        # Try to extract AQI value
+        if "aqi" in content or "air quality index" in content:
+            # Simple regex-like extraction for AQI values
+            words = content.split()
+            for i, word in enumerate(words):
+                if word in ["aqi", "index"] and i > 0:
+                    try:
+                        # Look for numbers before or after AQI mention
+                        for j in range(max(0, i-3), min(len(words), i+4)):
+                            if words[j].isdigit():
+                                aqi_value = int(words[j])
+                                if 0 <= aqi_value <= 500:  # Valid AQI range
+                                    fields["aqi"] = aqi_value
+                                    break
+                    except (ValueError, IndexError):
+                        continue
+        
+        # Try to extract PM2.5 values
+        if "pm2.5" in content or "pm 2.5" in content:
+            words = content.replace("pm2.5", " pm2.5 ").replace("pm 2.5", " pm2.5 ").split()
+            for i, word in enumerate(words):
+                if "pm2.5" in word:
+                    try:
+                        # Look for numbers near PM2.5 mention
+                        for j in range(max(0, i-2), min(len(words), i+3)):
+                            if words[j].replace(".", "").isdigit():
+                                pm25_value = float(words[j])
+                                if 0 <= pm25_value <= 500:  # Reasonable PM2.5 range
+                                    fields["pm25"] = pm25_value
+                                    break
+                    except (ValueError, IndexError):
+                        continue
+        
+        # Extract health implications
+        if any(word in content for word in ["unhealthy", "hazardous", "moderate", "good"]):
+            if "unhealthy" in content:
+                fields["health_implications"] = "Air quality is unhealthy for sensitive groups or all people."
+            elif "hazardous" in content:
+                fields["health_implications"] = "Air quality is hazardous. Everyone should avoid outdoor activities."
+            elif "moderate" in content:
+                fields["health_implications"] = "Air quality is moderate. Sensitive people should consider limiting outdoor activities."
+            elif "good" in content:
+                fields["health_implications"] = "Air quality is good. No health concerns."
+        
+        return fields
+    
     @staticmethod
     def extract_json_from_text(text: str) -> Optional[Dict[str, Any]]:
         """
@@ -188,23 +248,32 @@ class Parser:
             text: Text that may contain a JSON object
             
         Returns:
-            Extracted JSON object or None if not found
-        """
-        # Try to find JSON object in text
-        json_pattern = r'({[\s\S]*})'
-        json_match = re.search(json_pattern, text)
-        
-        if json_match:
-            json_str = json_match.group(1)
-            try:
-                return json.loads(json_str)
-            except json.JSONDecodeError:
-                # Try to clean up the JSON string
-                # Remove any non-JSON content
-                cleaned_json = re.sub(r'```json|```', '', json_str)
-                try:
-                    return json.loads(cleaned_json)
-                except json.JSONDecodeError:
-                    return None
-        
-        return None
+            First valid JSON object or None if not found
+        """
+        return next(iter_json_objects(text), None)
+    
+    @staticmethod
+    def extract_all_json_from_text(text: str) -> List[Dict[str, Any]]:
+        """
+        Extract all top-level JSON objects from text
+        
+        Args:
+            text: Text that may contain JSON objects
+            
+        Returns:
+            List of valid JSON objects in the order they appear
+        """
+        return list(iter_json_objects(text))
+    
+    @staticmethod
+    def incremental_json_extractor() -> IncrementalJSONExtractor:
+        """
+        Create an extractor for JSON objects in streamed text
+        
+        Feed it response chunks as they arrive; each call to feed() returns
+        the objects completed so far, and close() flushes the remainder.
+        
+        Returns:
+            IncrementalJSONExtractor instance
+        """
+        return IncrementalJSONExtractor()
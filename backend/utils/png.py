@@ -0,0 +1,34 @@
+import struct
+import zlib
+
+import numpy as np
+
+
+def encode_png(rgba: np.ndarray, compression: int = 6) -> bytes:
+    """
+    Encode an RGBA image as PNG
+
+    Args:
+        rgba: uint8 array of shape (height, width, 4)
+        compression: zlib compression level
+
+    Returns:
+        PNG file contents
+    """
+    if rgba.ndim != 3 or rgba.shape[2] != 4:
+        raise ValueError("Expected an array of shape (height, width, 4)")
+    height, width = rgba.shape[:2]
+    # Every scanline starts with filter type 0 (none)
+    rows = np.zeros((height, width * 4 + 1), dtype=np.uint8)
+    rows[:, 1:] = rgba.astype(np.uint8).reshape(height, width * 4)
+
+    def chunk(kind: bytes, data: bytes) -> bytes:
+        return struct.pack(">I", len(data)) + kind + data + struct.pack(">I", zlib.crc32(kind + data))
+
+    header = struct.pack(">IIBBBBB", width, height, 8, 6, 0, 0, 0)
+    return (
+        b"\x89PNG\r\n\x1a\n"
+        + chunk(b"IHDR", header)
+        + chunk(b"IDAT", zlib.compress(rows.tobytes(), compression))
+        + chunk(b"IEND", b"")
+    )
@@ -0,0 +1,111 @@
+import asyncio
+from typing import Any, Awaitable, Optional, Set
+
+from fastapi import Request
+
+
+class ClientDisconnected(Exception):
+    """Raised when the client went away while upstream work was running"""
+
+
+class RequestScope:
+    """
+    Task group tied to the lifetime of an HTTP request
+
+    Upstream work started through the scope is cancelled as soon as the
+    client disconnects, so abandoned requests stop spending Tavily and
+    OpenWeather quota. Results that completed before the disconnect have
+    already been written to the caches by the services that produced them.
+    """
+
+    def __init__(self, request: Optional[Request] = None, poll_interval: float = 0.25):
+        """
+        Initialize the request scope
+
+        Args:
+            request: Request to watch; None gives a scope that never disconnects
+            poll_interval: Seconds between disconnect checks
+        """
+        self.request = request
+        self.poll_interval = poll_interval
+        self.disconnected = False
+        self._tasks: Set[asyncio.Task] = set()
+        self._watcher: Optional[asyncio.Task] = None
+
+    async def __aenter__(self) -> "RequestScope":
+        if self.request is not None:
+            self._watcher = asyncio.create_task(self._watch())
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb) -> None:
+        if self._watcher is not None:
+            self._watcher.cancel()
+        self.cancel()
+
+    def spawn(self, awaitable: Awaitable[Any]) -> asyncio.Task:
+        """
+        Start work that is cancelled if the client disconnects
+
+        Args:
+            awaitable: Coroutine to run
+
+        Returns:
+            The task running it
+        """
+        task = asyncio.ensure_future(awaitable)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return task
+
+    async def run(self, awaitable: Awaitable[Any]) -> Any:
+        """
+        Run work inside the scope and wait for its result
+
+        Args:
+            awaitable: Coroutine to run
+
+        Returns:
+            Result of the coroutine
+
+        Raises:
+            ClientDisconnected: If the client disconnected before it finished
+        """
+        if self.disconnected:
+            if asyncio.iscoroutine(awaitable):
+                awaitable.close()
+            raise ClientDisconnected()
+
+        task = self.spawn(awaitable)
+        try:
+            return await task
+        except asyncio.CancelledError:
+            if self.disconnected and task.cancelled():
+                raise ClientDisconnected() from None
+            raise
+        finally:
+            # Our own cancellation (e.g. server shutdown) must not leave the work running
+            if not task.done():
+                task.cancel()
+
+    def cancel(self) -> None:
+        """Cancel all outstanding work in the scope"""
+        for task in list(self._tasks):
+            task.cancel()
+
+    async def _watch(self) -> None:
+        while True:
+            await asyncio.sleep(self.poll_interval)
+            if await self.request.is_disconnected():
+                self.disconnected = True
+                if self._tasks:
+                    print(f"Client disconnected from {self.request.url.path}; cancelling {len(self._tasks)} upstream task(s)")
+                self.cancel()
+                return
+
+
+async def request_scope(request: Request):
+    """
+    FastAPI dependency providing a RequestScope for the current request
+    """
+    async with RequestScope(request) as scope:
+        yield scope
@@ -0,0 +1,543 @@
+"""
+Table-driven risk engine used by the AdviceAgent
+
+Every metric is described declaratively in RISK_TABLE as an ordered list of
+bands. The table is compiled once into NumPy bucket edges, so one location
+or thousands of locations are scored with a single np.searchsorted call per
+metric, and all response fragments are pre-built at start-up.
+"""
+
+import hashlib
+import json
+import threading
+from typing import Dict, List, Any, Optional, Sequence, Tuple
+
+import numpy as np
+
+RISK_LEVELS = ["low", "medium", "high"]
+
+# Each band either applies "below" a value (strictly less than), "upto" a
+# value (less than or equal) or, for the final band, to everything else.
+# Pollutant concentrations are in the "unit" of their row, which is the unit
+# every producer (OpenWeather components, monitoring stations) reports.
+RISK_TABLE: List[Dict[str, Any]] = [
+    {
+        "metric": "aqi",
+        "inputs": [("air_quality", "aqi")],
+        "default": 0,
+        "risk_category": "Air Quality",
+        "affected_groups": ["Children", "Elderly", "People with respiratory conditions"],
+        "advice_category": "Air Quality",
+        "advice_title": "Air Quality Precautions",
+        "target_groups": ["All individuals", "Especially sensitive groups"],
+        "bands": [
+            {"upto": 100, "level": "low",
+             "risk": "Air quality is good with minimal health risks.",
+             "advice": "Air quality is good. Enjoy outdoor activities."},
+            {"upto": 150, "level": "medium",
+             "risk": "Moderate air pollution may affect sensitive groups.",
+             "advice": "Consider reducing prolonged outdoor activities for sensitive groups."},
+            {"level": "high",
+             "risk": "Poor air quality may cause health issues for sensitive groups and the general population.",
+             "advice": "Limit outdoor activities, especially for sensitive groups. Keep windows closed."},
+        ],
+    },
+    {
+        "metric": "uv_index",
+        "inputs": [("weather", "uv_index")],
+        "default": 5,
+        "risk_category": "UV Exposure",
+        "affected_groups": ["All outdoor workers", "Children", "Fair-skinned individuals"],
+        "advice_category": "UV Protection",
+        "advice_title": "Sun Safety",
+        "target_groups": ["All individuals"],
+        "bands": [
+            {"upto": 5, "level": "low",
+             "risk": "Low UV levels with minimal risk of skin damage.",
+             "advice": "Basic sun protection recommended for extended outdoor activities."},
+            {"upto": 7, "level": "medium",
+             "risk": "Moderate UV levels may cause skin damage with prolonged exposure.",
+             "advice": "Apply SPF 15+ sunscreen and wear a hat when outdoors for extended periods."},
+            {"level": "high",
+             "risk": "High UV levels may cause skin damage with brief exposure.",
+             "advice": "Use SPF 30+ sunscreen, wear protective clothing, and limit direct sun exposure between 10am-4pm."},
+        ],
+    },
+    {
+        "metric": "temperature",
+        "inputs": [("weather", "temperature"), ("weather", "weather", "main", "temp")],
+        "default": 20,
+        "risk_category": "Temperature",
+        "affected_groups": ["Elderly", "Children", "People with chronic conditions"],
+        "advice_category": "Temperature",
+        "advice_title": "Temperature Adaptation",
+        "target_groups": ["All individuals", "Especially vulnerable groups"],
+        "bands": [
+            {"below": 0, "level": "high",
+             "risk": "Extreme temperatures may pose health risks.",
+             "advice": "Dress in layers, limit exposure to cold, and watch for signs of hypothermia."},
+            {"below": 5, "level": "medium",
+             "risk": "Temperature conditions may be uncomfortable for sensitive groups.",
+             "advice": "Dress warmly and be cautious of icy conditions."},
+            {"upto": 30, "level": "low",
+             "risk": "Temperature conditions are comfortable for most people.",
+             "advice": "Temperature conditions are comfortable for most activities."},
+            {"upto": 35, "level": "medium",
+             "risk": "Temperature conditions may be uncomfortable for sensitive groups.",
+             "advice": "Stay hydrated and take regular breaks from heat."},
+            {"level": "high",
+             "risk": "Extreme temperatures may pose health risks.",
+             "advice": "Stay hydrated, seek shade, and use cooling measures. Check on vulnerable individuals."},
+        ],
+    },
+    {
+        "metric": "pm25",
+        "inputs": [("air_quality", "pm25")],
+        "default": None,
+        "risk_category": "PM2.5",
+        "unit": "µg/m³",
+        "affected_groups": ["Children", "Elderly", "People with heart or lung conditions"],
+        "advice_category": "PM2.5",
+        "advice_title": "Fine Particle Exposure",
+        "target_groups": ["All individuals", "Especially sensitive groups"],
+        "bands": [
+            {"upto": 35.4, "level": "low",
+             "risk": "Fine particle levels pose little risk for most people.",
+             "advice": "Fine particle levels are acceptable for outdoor activities."},
+            {"upto": 55.4, "level": "medium",
+             "risk": "Elevated fine particles may affect sensitive groups.",
+             "advice": "Sensitive groups should reduce heavy exertion outdoors."},
+            {"level": "high",
+             "risk": "High fine particle levels can aggravate heart and lung disease.",
+             "advice": "Avoid strenuous outdoor activity and consider a well-fitted N95 mask outdoors."},
+        ],
+    },
+    {
+        "metric": "ozone",
+        "inputs": [("air_quality", "ozone"), ("air_quality", "o3")],
+        "default": None,
+        "risk_category": "Ozone",
+        "unit": "µg/m³",
+        "affected_groups": ["People with asthma", "Children", "Outdoor workers"],
+        "advice_category": "Ozone",
+        "advice_title": "Ozone Precautions",
+        "target_groups": ["All individuals", "Especially people with asthma"],
+        # The US EPA 8-hour breakpoints of 70 and 85 ppb, converted at 25 °C
+        # (1 ppb = 48.00 / 24.45 µg/m³)
+        "bands": [
+            {"upto": 137, "level": "low",
+             "risk": "Ozone levels pose little risk for most people.",
+             "advice": "Ozone levels are acceptable for outdoor activities."},
+            {"upto": 167, "level": "medium",
+             "risk": "Elevated ozone may irritate airways in sensitive groups.",
+             "advice": "Schedule strenuous outdoor activity for the morning when ozone is lower."},
+            {"level": "high",
+             "risk": "High ozone can cause breathing difficulty and worsen asthma.",
+             "advice": "Limit outdoor exertion in the afternoon and keep rescue inhalers at hand."},
+        ],
+    },
+    {
+        "metric": "humidity",
+        "inputs": [("weather", "humidity"), ("weather", "weather", "main", "humidity")],
+        "default": None,
+        "risk_category": "Humidity",
+        "affected_groups": ["Elderly", "People with respiratory conditions"],
+        "advice_category": "Humidity",
+        "advice_title": "Humidity Comfort",
+        "target_groups": ["All individuals"],
+        "bands": [
+            {"below": 20, "level": "medium",
+             "risk": "Very dry air may irritate eyes, skin and airways.",
+             "advice": "Stay hydrated and consider using a humidifier indoors."},
+            {"upto": 80, "level": "low",
+             "risk": "Humidity levels are comfortable for most people.",
+             "advice": "Humidity levels are comfortable for most activities."},
+            {"level": "medium",
+             "risk": "High humidity increases heat stress and mould growth.",
+             "advice": "Take breaks in ventilated or air-conditioned spaces during exertion."},
+        ],
+    },
+    {
+        "metric": "pollen",
+        "inputs": [("pollen_count", "overall", "value")],
+        "default": None,
+        "risk_category": "Pollen",
+        "affected_groups": ["People with allergies", "People with asthma"],
+        "advice_category": "Pollen",
+        "advice_title": "Allergy Precautions",
+        "target_groups": ["People with allergies"],
+        "bands": [
+            {"upto": 4.8, "level": "low",
+             "risk": "Pollen levels are low with minimal allergy risk.",
+             "advice": "Pollen levels are low. No special precautions needed."},
+            {"upto": 7.2, "level": "medium",
+             "risk": "Moderate pollen may trigger symptoms in allergy sufferers.",
+             "advice": "Allergy sufferers should keep medication at hand and limit time outdoors."},
+            {"level": "high",
+             "risk": "High pollen levels are likely to trigger allergy and asthma symptoms.",
+             "advice": "Keep windows closed, shower after being outdoors, and take allergy medication as advised."},
+        ],
+    },
+]
+
+OVERALL_RISK_DESCRIPTION = (
+    "Overall environmental risk is {level} based on air quality, fine particles, ozone, UV exposure, "
+    "temperature, humidity and pollen conditions."
+)
+
+RISK_TREND = {
+    "direction": "stable",
+    "description": "Environmental conditions have remained relatively stable."
+}
+
+GENERAL_ADVICE = "Take appropriate precautions based on current environmental conditions."
+
+PREVENTIVE_MEASURES = [
+    "Monitor local air quality reports",
+    "Stay hydrated throughout the day",
+    "Use appropriate sun protection",
+    "Adjust outdoor activities based on environmental conditions"
+]
+
+
+class FrozenDict(dict):
+    """
+    Read-only dict used for memoised responses shared between requests
+
+    It subclasses dict so json.dumps and FastAPI serialise it unchanged.
+    """
+
+    def _readonly(self, *args, **kwargs):
+        raise TypeError("Memoised risk responses are read-only; copy before modifying")
+
+    __setitem__ = __delitem__ = _readonly
+    clear = pop = popitem = setdefault = update = _readonly
+
+    def copy(self) -> Dict[str, Any]:
+        return dict(self)
+
+
+def freeze(value: Any) -> Any:
+    """
+    Recursively convert dicts to FrozenDict and lists to tuples
+
+    Args:
+        value: JSON-like value
+
+    Returns:
+        Immutable equivalent of the value
+    """
+    if isinstance(value, dict):
+        return FrozenDict((key, freeze(item)) for key, item in value.items())
+    if isinstance(value, (list, tuple)):
+        return tuple(freeze(item) for item in value)
+    return value
+
+
+def table_fingerprint(table: List[Dict[str, Any]]) -> str:
+    """
+    Hash a threshold table so memoised responses can be tied to it
+
+    Args:
+        table: Threshold table
+
+    Returns:
+        Hex digest of the table contents
+    """
+    serialised = json.dumps(table, sort_keys=True, default=list)
+    return hashlib.blake2b(serialised.encode("utf-8"), digest_size=8).hexdigest()
+
+
+class _CompiledMetric:
+    """Bucket edges and pre-built response fragments for one metric"""
+
+    def __init__(self, spec: Dict[str, Any]):
+        self.metric = spec["metric"]
+        self.inputs = [tuple(path) for path in spec["inputs"]]
+        self.default = spec.get("default")
+
+        bands = spec["bands"]
+        if "below" in bands[-1] or "upto" in bands[-1]:
+            raise ValueError(f"Last band of '{self.metric}' must be open-ended")
+
+        # searchsorted(side="left") puts v in bucket i when edges[i-1] < v <= edges[i];
+        # a strict "below" bound is shifted down by one ulp to fit that convention
+        edges = []
+        for band in bands[:-1]:
+            if "below" in band:
+                edges.append(np.nextafter(float(band["below"]), -np.inf))
+            else:
+                edges.append(float(band["upto"]))
+        self.edges = np.asarray(edges, dtype=np.float64)
+        if np.any(np.diff(self.edges) <= 0):
+            raise ValueError(f"Bands of '{self.metric}' must be in increasing order")
+
+        self.levels = np.asarray([RISK_LEVELS.index(band["level"]) for band in bands], dtype=np.int8)
+
+        self.risks = [
+            {
+                "category": spec["risk_category"],
+                "level": band["level"],
+                "description": band["risk"],
+                "affected_groups": spec["affected_groups"]
+            }
+            for band in bands
+        ]
+        self.recommendations = [
+            {
+                "category": spec["advice_category"],
+                "title": spec["advice_title"],
+                "description": band["advice"],
+                "urgency": band["level"],
+                "target_groups": spec["target_groups"]
+            }
+            for band in bands
+        ]
+
+    def read(self, environmental_data: Dict[str, Any]) -> float:
+        for path in self.inputs:
+            value = environmental_data
+            for key in path:
+                if not isinstance(value, dict):
+                    value = None
+                    break
+                value = value.get(key)
+            if isinstance(value, (int, float)) and not isinstance(value, bool):
+                return float(value)
+        return np.nan if self.default is None else float(self.default)
+
+
+class RiskEngine:
+    """
+    Vectorised evaluator for the declarative risk threshold table
+
+    A response depends only on the tuple of band indexes, so assessments
+    and advice are memoised on that tuple as frozen objects together with
+    their pre-serialised JSON. The memo is bounded by the number of band
+    combinations and is cleared whenever the table changes.
+    """
+
+    def __init__(self, table: Optional[List[Dict[str, Any]]] = None):
+        """
+        Compile a threshold table
+
+        Args:
+            table: Threshold table; defaults to RISK_TABLE
+        """
+        self._lock = threading.Lock()
+        self.memo_hits = 0
+        self.memo_misses = 0
+        self.set_table(table if table is not None else RISK_TABLE)
+
+    def set_table(self, table: List[Dict[str, Any]]) -> bool:
+        """
+        Compile a new threshold table, invalidating memoised responses if it differs
+
+        Call again with the same (edited in place) table to pick up changes.
+
+        Args:
+            table: Threshold table
+
+        Returns:
+            True if the table changed and was recompiled
+        """
+        fingerprint = table_fingerprint(table)
+        if fingerprint == getattr(self, "table_version", None):
+            return False
+
+        metrics = [_CompiledMetric(spec) for spec in table]
+        with self._lock:
+            self.table = table
+            self.table_version = fingerprint
+            self.metrics = metrics
+            self.overall_risks = [
+                {"level": level, "description": OVERALL_RISK_DESCRIPTION.format(level=level)}
+                for level in RISK_LEVELS
+            ]
+            self._assessments: Dict[Tuple[int, ...], Tuple[FrozenDict, bytes]] = {}
+            self._advice: Dict[Tuple[int, ...], Tuple[FrozenDict, bytes]] = {}
+        return True
+
+    def memo_stats(self) -> Dict[str, Any]:
+        """
+        Get memoisation statistics
+
+        Returns:
+            Dictionary of hit/miss counters, entry counts and table version
+        """
+        return {
+            "hits": self.memo_hits,
+            "misses": self.memo_misses,
+            "assessment_entries": len(self._assessments),
+            "advice_entries": len(self._advice),
+            "table_version": self.table_version
+        }
+
+    def extract_inputs(self, environmental_data: Sequence[Dict[str, Any]]) -> np.ndarray:
+        """
+        Read every metric for a batch of locations
+
+        Args:
+            environmental_data: Environmental data dictionaries
+
+        Returns:
+            Array of shape (locations, metrics); missing optional metrics are NaN
+        """
+        values = np.empty((len(environmental_data), len(self.metrics)), dtype=np.float64)
+        for row, data in enumerate(environmental_data):
+            for col, metric in enumerate(self.metrics):
+                values[row, col] = metric.read(data)
+        return values
+
+    def evaluate(self, values: np.ndarray) -> np.ndarray:
+        """
+        Bucket every metric for a batch of locations
+
+        Args:
+            values: Array of shape (locations, metrics) as from extract_inputs
+
+        Returns:
+            Int array of the same shape with the band index per metric,
+            or -1 where the input is missing
+        """
+        buckets = np.empty(values.shape, dtype=np.int16)
+        for col, metric in enumerate(self.metrics):
+            column = values[:, col]
+            buckets[:, col] = np.searchsorted(metric.edges, column, side="left")
+            buckets[np.isnan(column), col] = -1
+        return buckets
+
+    def risk_levels(self, buckets: np.ndarray) -> np.ndarray:
+        """
+        Map band indexes to risk level codes (index into RISK_LEVELS)
+
+        Args:
+            buckets: Band indexes as returned by evaluate
+
+        Returns:
+            Int array of the same shape; -1 where the input is missing
+        """
+        levels = np.full(buckets.shape, -1, dtype=np.int8)
+        for col, metric in enumerate(self.metrics):
+            present = buckets[:, col] >= 0
+            levels[present, col] = metric.levels[buckets[present, col]]
+        return levels
+
+    def assess_many(self, environmental_data: Sequence[Dict[str, Any]]) -> List[FrozenDict]:
+        """
+        Generate risk assessments for many locations in one pass
+
+        Args:
+            environmental_data: Environmental data dictionaries
+
+        Returns:
+            List of read-only risk assessment dictionaries
+        """
+        return [entry[0] for entry in self._lookup(self._assessments, self._build_assessment, environmental_data)]
+
+    def assess_many_json(self, environmental_data: Sequence[Dict[str, Any]]) -> List[bytes]:
+        """
+        Generate pre-serialised risk assessments for many locations
+
+        Args:
+            environmental_data: Environmental data dictionaries
+
+        Returns:
+            List of JSON-encoded risk assessments
+        """
+        return [entry[1] for entry in self._lookup(self._assessments, self._build_assessment, environmental_data)]
+
+    def advise_many(self, environmental_data: Sequence[Dict[str, Any]]) -> List[FrozenDict]:
+        """
+        Generate advice for many locations in one pass
+
+        Args:
+            environmental_data: Environmental data dictionaries
+
+        Returns:
+            List of read-only advice dictionaries
+        """
+        return [entry[0] for entry in self._lookup(self._advice, self._build_advice, environmental_data)]
+
+    def advise_many_json(self, environmental_data: Sequence[Dict[str, Any]]) -> List[bytes]:
+        """
+        Generate pre-serialised advice for many locations
+
+        Args:
+            environmental_data: Environmental data dictionaries
+
+        Returns:
+            List of JSON-encoded advice
+        """
+        return [entry[1] for entry in self._lookup(self._advice, self._build_advice, environmental_data)]
+
+    def assess(self, environmental_data: Dict[str, Any]) -> FrozenDict:
+        """
+        Generate a risk assessment for one location
+
+        Args:
+            environmental_data: Environmental data dictionary
+
+        Returns:
+            Read-only risk assessment dictionary
+        """
+        return self.assess_many([environmental_data])[0]
+
+    def advise(self, environmental_data: Dict[str, Any]) -> FrozenDict:
+        """
+        Generate advice for one location
+
+        Args:
+            environmental_data: Environmental data dictionary
+
+        Returns:
+            Read-only advice dictionary
+        """
+        return self.advise_many([environmental_data])[0]
+
+    def _lookup(self, memo, build, environmental_data) -> List[Tuple[FrozenDict, bytes]]:
+        buckets = self.evaluate(self.extract_inputs(environmental_data))
+        entries = []
+        hits = 0
+
+        for key in map(tuple, buckets.tolist()):
+            entry = memo.get(key)
+            if entry is None:
+                response = freeze(build(key))
+                entry = (response, json.dumps(response).encode("utf-8"))
+                with self._lock:
+                    memo[key] = entry
+            else:
+                hits += 1
+            entries.append(entry)
+
+        with self._lock:
+            self.memo_hits += hits
+            self.memo_misses += len(entries) - hits
+        return entries
+
+    def _build_assessment(self, buckets: Tuple[int, ...]) -> Dict[str, Any]:
+        overall_level = max(
+            (int(metric.levels[bucket]) for metric, bucket in zip(self.metrics, buckets) if bucket >= 0),
+            default=0
+        )
+        return {
+            "overall_risk": self.overall_risks[overall_level],
+            "specific_risks": [
+                metric.risks[bucket]
+                for metric, bucket in zip(self.metrics, buckets)
+                if bucket >= 0
+            ],
+            "trend": RISK_TREND
+        }
+
+    def _build_advice(self, buckets: Tuple[int, ...]) -> Dict[str, Any]:
+        return {
+            "general_advice": GENERAL_ADVICE,
+            "specific_recommendations": [
+                metric.recommendations[bucket]
+                for metric, bucket in zip(self.metrics, buckets)
+                if bucket >= 0
+            ],
+            "preventive_measures": PREVENTIVE_MEASURES
+        }
@@ -0,0 +1,123 @@
+import math
+from typing import List, Sequence, Tuple
+
+import numpy as np
+
+Box = Tuple[float, float, float, float]
+
+
+class STRTree:
+    """
+    Static R-tree over bounding boxes, bulk-loaded with Sort-Tile-Recursive
+
+    Boxes are sorted into vertical slices by centre x, each slice is sorted by
+    centre y and cut into nodes of node_capacity entries, and the node boxes
+    are packed the same way level by level up to a single root. The packing
+    keeps sibling boxes close together and nodes full, so a point query only
+    descends into the few nodes whose box contains the point: O(log n) for
+    boxes that seldom overlap. The tree is immutable; rebuild it to change
+    the boxes.
+    """
+
+    def __init__(self, boxes: Sequence[Box], node_capacity: int = 8):
+        """
+        Build the tree
+
+        Args:
+            boxes: (min_x, min_y, max_x, max_y) per item; query results are indices into this sequence
+            node_capacity: Maximum number of children per node
+        """
+        if node_capacity < 2:
+            raise ValueError("node_capacity must be at least 2")
+        self.node_capacity = node_capacity
+        self._size = len(boxes)
+        # levels[0] holds the item boxes; each level above holds node boxes
+        # and, for every node, the range of its children in the level below
+        self._levels: List[np.ndarray] = []
+        self._children: List[np.ndarray] = []
+        if not self._size:
+            return
+
+        boxes = np.asarray(boxes, dtype=float).reshape(-1, 4)
+        order = self._pack_order(boxes)
+        self._items = order
+        level = boxes[order]
+        self._levels.append(level)
+        while len(level) > 1:
+            if len(self._levels) > 1:
+                # Node boxes are re-sorted so that parents stay tight
+                order = self._pack_order(level)
+                self._reorder_level(order)
+                level = self._levels[-1]
+            starts = np.arange(0, len(level), node_capacity)
+            ends = np.minimum(starts + node_capacity, len(level))
+            parents = np.array([
+                [level[start:end, 0].min(), level[start:end, 1].min(), level[start:end, 2].max(), level[start:end, 3].max()]
+                for start, end in zip(starts, ends)
+            ])
+            self._children.append(np.stack([starts, ends], axis=1))
+            self._levels.append(parents)
+            level = parents
+
+    def __len__(self) -> int:
+        return self._size
+
+    def query_point(self, x: float, y: float) -> List[int]:
+        """
+        Find the boxes that contain a point
+
+        Args:
+            x: Point x (longitude)
+            y: Point y (latitude)
+
+        Returns:
+            Indices of the containing boxes
+        """
+        return self.query_box((x, y, x, y))
+
+    def query_box(self, box: Box) -> List[int]:
+        """
+        Find the boxes that intersect a box
+
+        Args:
+            box: (min_x, min_y, max_x, max_y)
+
+        Returns:
+            Indices of the intersecting boxes
+        """
+        if not self._size:
+            return []
+        min_x, min_y, max_x, max_y = box
+        results = []
+        # (level, start, end) ranges still to test, from the root down
+        pending = [(len(self._levels) - 1, 0, len(self._levels[-1]))]
+        while pending:
+            depth, start, end = pending.pop()
+            level = self._levels[depth][start:end]
+            hits = np.nonzero(
+                (level[:, 0] <= max_x) & (level[:, 2] >= min_x) & (level[:, 1] <= max_y) & (level[:, 3] >= min_y)
+            )[0] + start
+            if depth == 0:
+                results.extend(int(self._items[hit]) for hit in hits)
+                continue
+            for hit in hits:
+                child_start, child_end = self._children[depth - 1][hit]
+                pending.append((depth - 1, int(child_start), int(child_end)))
+        return results
+
+    def _pack_order(self, boxes: np.ndarray) -> np.ndarray:
+        """Sort-Tile-Recursive order of a level's boxes"""
+        count = len(boxes)
+        centre_x = (boxes[:, 0] + boxes[:, 2]) / 2
+        centre_y = (boxes[:, 1] + boxes[:, 3]) / 2
+        slice_size = self.node_capacity * math.ceil(math.sqrt(math.ceil(count / self.node_capacity)))
+        by_x = np.argsort(centre_x, kind="stable")
+        return np.concatenate([
+            by_x[start:start + slice_size][np.argsort(centre_y[by_x[start:start + slice_size]], kind="stable")]
+            for start in range(0, count, slice_size)
+        ])
+
+    def _reorder_level(self, order: np.ndarray) -> None:
+        """Reorder the top level's nodes together with their child ranges"""
+        self._levels[-1] = self._levels[-1][order]
+        self._children[-1] = self._children[-1][order]
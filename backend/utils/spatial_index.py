@@ -0,0 +1,200 @@
+import math
+from typing import Dict, Hashable, List, Optional, Set, Tuple
+
+import numpy as np
+
+from utils.geo import EARTH_RADIUS_KM, haversine_km
+
+# Kilometres per degree of latitude
+KM_PER_DEGREE = math.pi * EARTH_RADIUS_KM / 180
+
+
+class SpatialIndex:
+    """
+    In-memory point index for k-nearest and within-radius queries
+
+    Points are bucketed into a grid of cell_deg x cell_deg cells. A radius
+    query gathers the cells overlapping the search box (wrapping at the
+    antimeridian and widening near the poles) and computes exact haversine
+    distances for those candidates in one vectorised pass. k-nearest widens
+    the radius until it holds k points, so results are exact. Points can be
+    added, moved and removed at any time.
+    """
+
+    def __init__(self, cell_deg: float = 1.0, initial_capacity: int = 256):
+        """
+        Initialize an empty index
+
+        Args:
+            cell_deg: Grid cell size in degrees
+            initial_capacity: Initial size of the coordinate arrays
+        """
+        self.cell_deg = cell_deg
+        self._lats = np.zeros(initial_capacity)
+        self._lons = np.zeros(initial_capacity)
+        self._keys: List[Optional[Hashable]] = [None] * initial_capacity
+        self._slots: Dict[Hashable, int] = {}
+        self._free: List[int] = []
+        self._size = 0
+        self._cells: Dict[Tuple[int, int], Set[int]] = {}
+
+    def __len__(self) -> int:
+        return len(self._slots)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._slots
+
+    def insert(self, key: Hashable, lat: float, lon: float) -> None:
+        """
+        Add a point, or move it if the key is already indexed
+
+        Args:
+            key: Point identifier
+            lat: Latitude in degrees
+            lon: Longitude in degrees
+        """
+        if key in self._slots:
+            self.remove(key)
+
+        if self._free:
+            slot = self._free.pop()
+        else:
+            if self._size == len(self._keys):
+                self._grow()
+            slot = self._size
+            self._size += 1
+
+        self._lats[slot] = lat
+        self._lons[slot] = lon
+        self._keys[slot] = key
+        self._slots[key] = slot
+        self._cells.setdefault(self._cell(lat, lon), set()).add(slot)
+
+    def remove(self, key: Hashable) -> bool:
+        """
+        Remove a point
+
+        Args:
+            key: Point identifier
+
+        Returns:
+            True if the point was indexed
+        """
+        slot = self._slots.pop(key, None)
+        if slot is None:
+            return False
+        cell = self._cell(self._lats[slot], self._lons[slot])
+        self._cells[cell].discard(slot)
+        if not self._cells[cell]:
+            del self._cells[cell]
+        self._keys[slot] = None
+        self._free.append(slot)
+        return True
+
+    def within_radius(self, lat: float, lon: float, radius_km: float) -> List[Tuple[Hashable, float]]:
+        """
+        Find all points within a radius
+
+        Args:
+            lat: Query latitude in degrees
+            lon: Query longitude in degrees
+            radius_km: Search radius in kilometres
+
+        Returns:
+            List of (key, distance_km) sorted by distance
+        """
+        keys, distances = self.query_radius(lat, lon, radius_km)
+        order = np.argsort(distances, kind="stable")
+        return [(keys[i], float(distances[i])) for i in order]
+
+    def query_radius(self, lat: float, lon: float, radius_km: float) -> Tuple[List[Hashable], np.ndarray]:
+        """
+        Find all points within a radius, unsorted, for vectorised callers
+
+        Args:
+            lat: Query latitude in degrees
+            lon: Query longitude in degrees
+            radius_km: Search radius in kilometres
+
+        Returns:
+            (keys, distances_km) with distances as an array in the same order
+        """
+        slots = self._candidates(lat, lon, radius_km)
+        if slots.size == 0:
+            return [], np.zeros(0)
+        distances = haversine_km(lat, lon, self._lats[slots], self._lons[slots])
+        inside = distances <= radius_km
+        slots, distances = slots[inside], distances[inside]
+        return [self._keys[slot] for slot in slots], distances
+
+    def nearest(
+        self,
+        lat: float,
+        lon: float,
+        k: int = 1,
+        max_radius_km: Optional[float] = None
+    ) -> List[Tuple[Hashable, float]]:
+        """
+        Find the k nearest points
+
+        Args:
+            lat: Query latitude in degrees
+            lon: Query longitude in degrees
+            k: Number of neighbours
+            max_radius_km: Optional cap on the search radius
+
+        Returns:
+            List of up to k (key, distance_km) sorted by distance
+        """
+        if k <= 0 or not self._slots:
+            return []
+        limit = max_radius_km if max_radius_km is not None else math.pi * EARTH_RADIUS_KM
+        radius = min(self.cell_deg * KM_PER_DEGREE, limit)
+        while True:
+            found = self.within_radius(lat, lon, radius)
+            if len(found) >= k or radius >= limit:
+                return found[:k]
+            radius = min(radius * 4, limit)
+
+    def _candidates(self, lat: float, lon: float, radius_km: float) -> np.ndarray:
+        dlat = radius_km / KM_PER_DEGREE
+        lat_min, lat_max = lat - dlat, lat + dlat
+        cos_lat = math.cos(math.radians(min(89.0, max(abs(lat_min), abs(lat_max)))))
+        dlon = 180.0 if lat_min <= -90 or lat_max >= 90 else min(180.0, dlat / max(cos_lat, 1e-6))
+
+        rows = range(math.floor(max(-90.0, lat_min) / self.cell_deg), math.floor(min(90.0, lat_max) / self.cell_deg) + 1)
+        if dlon >= 180.0:
+            offset = round(180 / self.cell_deg)
+            cols = set(range(-offset, offset))
+        else:
+            first = math.floor((lon - dlon) / self.cell_deg)
+            last = math.floor((lon + dlon) / self.cell_deg)
+            cols = {self._wrap_col(col) for col in range(first, last + 1)}
+
+        # Scanning every occupied cell is cheaper than walking a very large box
+        if len(rows) * len(cols) > len(self._cells):
+            slots = [
+                slot for (row, col), members in self._cells.items()
+                if row in rows and col in cols
+                for slot in members
+            ]
+        else:
+            slots = [
+                slot for row in rows for col in cols
+                for slot in self._cells.get((row, col), ())
+            ]
+        return np.fromiter(slots, dtype=np.intp, count=len(slots))
+
+    def _cell(self, lat: float, lon: float) -> Tuple[int, int]:
+        return math.floor(lat / self.cell_deg), self._wrap_col(math.floor(lon / self.cell_deg))
+
+    def _wrap_col(self, col: int) -> int:
+        columns = round(360 / self.cell_deg)
+        offset = round(180 / self.cell_deg)
+        return (col + offset) % columns - offset
+
+    def _grow(self) -> None:
+        capacity = len(self._keys) * 2
+        self._lats = np.resize(self._lats, capacity)
+        self._lons = np.resize(self._lons, capacity)
+        self._keys.extend([None] * (capacity - len(self._keys)))
@@ -0,0 +1,232 @@
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+
+class _Node:
+    __slots__ = ("label", "children", "values", "top")
+
+    def __init__(self, label: str = ""):
+        self.label = label
+        self.children: Dict[str, "_Node"] = {}
+        self.values: List[Any] = []
+        self.top: List[Any] = []
+
+
+class RadixTrie:
+    """
+    Compressed prefix tree mapping string keys to lists of values
+
+    Chains of single-child nodes are merged into one edge label, so the
+    tree has at most one internal node per branching point. Supports exact
+    lookup, prefix enumeration and fuzzy (edit distance) search.
+
+    With a score function every node also keeps the top_k highest-scoring
+    distinct values in its subtree, so ranked prefix completion is a walk
+    down the prefix and a list slice.
+    """
+
+    def __init__(self, score: Optional[Callable[[Any], float]] = None, top_k: int = 10):
+        """
+        Initialize an empty trie
+
+        Args:
+            score: Optional ranking function for values, used by top()
+            top_k: Number of ranked values kept per node
+        """
+        self._root = _Node()
+        self._size = 0
+        self.score = score
+        self.top_k = top_k
+
+    def __len__(self) -> int:
+        return self._size
+
+    def insert(self, key: str, value: Any) -> None:
+        """
+        Add a value under a key
+
+        Args:
+            key: String key
+            value: Value appended to the key's value list
+        """
+        node = self._root
+        path = [node]
+        rest = key
+        while rest:
+            child = node.children.get(rest[0])
+            if child is None:
+                leaf = _Node(rest)
+                node.children[rest[0]] = leaf
+                node = leaf
+                path.append(node)
+                break
+            common = _common_prefix_length(child.label, rest)
+            if common < len(child.label):
+                # Split the edge at the point where the keys diverge
+                middle = _Node(child.label[:common])
+                child.label = child.label[common:]
+                middle.children[child.label[0]] = child
+                node.children[rest[0]] = middle
+                child = middle
+            node = child
+            path.append(node)
+            rest = rest[common:]
+        if not node.values:
+            self._size += 1
+        node.values.append(value)
+        self._rerank(path)
+
+    def refresh(self, key: str) -> None:
+        """
+        Re-rank after the score of a value stored under a key has changed
+
+        Args:
+            key: Key whose value scores changed
+        """
+        if self.score is None:
+            return
+        node = self._root
+        path = [node]
+        rest = key
+        while rest:
+            child = node.children.get(rest[0])
+            if child is None or not rest.startswith(child.label):
+                return
+            node = child
+            path.append(node)
+            rest = rest[len(child.label):]
+        self._rerank(path)
+
+    def top(self, prefix: str, limit: int = 10) -> List[Any]:
+        """
+        Get the highest-scoring values whose keys start with a prefix
+
+        Args:
+            prefix: Key prefix
+            limit: Maximum number of values (at most top_k)
+
+        Returns:
+            Distinct values, best first
+        """
+        if self.score is None:
+            raise ValueError("top() needs a trie built with a score function")
+        node, _ = self._walk(prefix)
+        if node is None:
+            return []
+        return node.top[:min(limit, self.top_k)]
+
+    def get(self, key: str) -> List[Any]:
+        """
+        Get the values stored under a key
+
+        Args:
+            key: String key
+
+        Returns:
+            List of values (empty if the key is absent)
+        """
+        node, remainder = self._walk(key)
+        if node is None or remainder:
+            return []
+        return list(node.values)
+
+    def items(self, prefix: str = "") -> Iterator[Tuple[str, List[Any]]]:
+        """
+        Iterate over the keys starting with a prefix
+
+        Args:
+            prefix: Key prefix
+
+        Yields:
+            (key, values) tuples in lexicographic order
+        """
+        node, remainder = self._walk(prefix)
+        if node is None:
+            return
+        # The prefix may end part way along the node's edge
+        base = prefix + node.label[len(remainder):] if remainder else prefix
+        yield from self._iterate(node, base)
+
+    def fuzzy(self, query: str, max_distance: int) -> List[Tuple[str, List[Any], int]]:
+        """
+        Find keys within an edit distance of a query
+
+        Args:
+            query: Query string
+            max_distance: Maximum Levenshtein distance
+
+        Returns:
+            List of (key, values, distance) sorted by distance
+        """
+        matches: List[Tuple[str, List[Any], int]] = []
+        first_row = list(range(len(query) + 1))
+        stack = [(child, "", first_row) for child in self._root.children.values()]
+        while stack:
+            node, key, row = stack.pop()
+            for char in node.label:
+                key += char
+                previous = row
+                row = [previous[0] + 1]
+                for column in range(1, len(query) + 1):
+                    row.append(min(
+                        row[column - 1] + 1,
+                        previous[column] + 1,
+                        previous[column - 1] + (query[column - 1] != char)
+                    ))
+                if min(row) > max_distance:
+                    break
+            else:
+                if node.values and row[-1] <= max_distance:
+                    matches.append((key, list(node.values), row[-1]))
+                stack.extend((child, key, row) for child in node.children.values())
+        matches.sort(key=lambda match: (match[2], match[0]))
+        return matches
+
+    def _rerank(self, path: List[_Node]) -> None:
+        """Recompute the ranked lists from the deepest node on a path upwards"""
+        if self.score is None:
+            return
+        for node in reversed(path):
+            candidates = list(node.values)
+            for child in node.children.values():
+                candidates.extend(child.top)
+            ranked = sorted(dict.fromkeys(candidates), key=self.score, reverse=True)
+            node.top = ranked[:self.top_k]
+
+    def _walk(self, key: str) -> Tuple[Optional[_Node], str]:
+        """
+        Follow a key down the tree
+
+        Returns the deepest node reached and, if the key ends part way along
+        that node's edge, the part of the edge the key covers; (None, "") if
+        the key leaves the tree.
+        """
+        node = self._root
+        rest = key
+        while rest:
+            child = node.children.get(rest[0])
+            if child is None:
+                return None, ""
+            if rest.startswith(child.label):
+                node = child
+                rest = rest[len(child.label):]
+            elif child.label.startswith(rest):
+                return child, rest
+            else:
+                return None, ""
+        return node, ""
+
+    def _iterate(self, node: _Node, key: str) -> Iterator[Tuple[str, List[Any]]]:
+        if node.values:
+            yield key, list(node.values)
+        for char in sorted(node.children):
+            child = node.children[char]
+            yield from self._iterate(child, key + child.label)
+
+
+def _common_prefix_length(a: str, b: str) -> int:
+    length = 0
+    for char_a, char_b in zip(a, b):
+        if char_a != char_b:
+            break
+        length += 1
+    return length
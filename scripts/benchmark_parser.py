@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+Benchmark the HTML text extraction backends used by Parser.clean_html
+
+Usage:
+    python scripts/benchmark_parser.py [PAGES_DIR] [--repeat N]
+
+PAGES_DIR should contain stored .html pages (e.g. saved airnow.gov or
+iqair.com results). A synthetic page is used when no directory is given.
+"""
+
+import os
+import sys
+import time
+import argparse
+
+# Add backend directory to path to import modules
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "backend"))
+
+from utils.html_text import available_backends, get_backend, iter_clean_text
+
+
+def load_pages(pages_dir):
+    """Load stored HTML pages, or build a synthetic one"""
+    if not pages_dir:
+        row = "<tr><td>PM2.5:  35.2</td><td>AQI: 101</td><td>Moderate</td></tr>\n"
+        body = "<table>" + row * 2000 + "</table>"
+        chrome = "<header>Site</header><nav><a href='/'>Home</a></nav><script>var x = 1;</script>"
+        return {"synthetic.html": f"<html><head><style>p{{}}</style></head><body>{chrome}{body}<footer>(c)</footer></body></html>"}
+
+    pages = {}
+    for name in sorted(os.listdir(pages_dir)):
+        if name.endswith((".html", ".htm")):
+            with open(os.path.join(pages_dir, name), encoding="utf-8", errors="replace") as f:
+                pages[name] = f.read()
+    return pages
+
+
+def benchmark(pages, repeat):
+    """Time every installed backend over all pages"""
+    total_bytes = sum(len(html) for html in pages.values())
+    print(f"{len(pages)} page(s), {total_bytes / 1024:.1f} KiB, {repeat} repetition(s)\n")
+    print(f"{'backend':<14}{'total ms':>12}{'ms/page':>12}{'MiB/s':>10}")
+
+    for name in available_backends():
+        backend = get_backend(name)
+        start = time.perf_counter()
+        for _ in range(repeat):
+            for html in pages.values():
+                backend.extract_text(html)
+        elapsed = time.perf_counter() - start
+        per_page = elapsed * 1000 / (repeat * len(pages))
+        throughput = total_bytes * repeat / elapsed / (1024 * 1024)
+        print(f"{name:<14}{elapsed * 1000:>12.1f}{per_page:>12.2f}{throughput:>10.1f}")
+
+    # Streaming mode fed in 8 KiB chunks, as from a response body
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for html in pages.values():
+            chunks = (html[i:i + 8192] for i in range(0, len(html), 8192))
+            for _line in iter_clean_text(chunks):
+                pass
+    elapsed = time.perf_counter() - start
+    per_page = elapsed * 1000 / (repeat * len(pages))
+    throughput = total_bytes * repeat / elapsed / (1024 * 1024)
+    print(f"{'stream/8KiB':<14}{elapsed * 1000:>12.1f}{per_page:>12.2f}{throughput:>10.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark HTML text extraction backends")
+    parser.add_argument("pages_dir", nargs="?", help="Directory of stored .html pages")
+    parser.add_argument("--repeat", type=int, default=5, help="Repetitions per page")
+    args = parser.parse_args()
+
+    pages = load_pages(args.pages_dir)
+    if not pages:
+        print(f"No .html pages found in {args.pages_dir}")
+        return
+
+    benchmark(pages, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+"""
+Build the binary gazetteer used for offline geocoding
+
+Usage:
+    python scripts/build_gazetteer.py [SOURCE_TSV] [--output PATH]
+
+SOURCE_TSV has one place per line: name, kind, admin, country, lat, lon,
+population and |-separated aliases, tab-separated. Lines starting with #
+are ignored. Defaults to backend/data/gazetteer.tsv.
+"""
+
+import os
+import sys
+import argparse
+
+# Add backend directory to path to import modules
+BACKEND_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "backend")
+sys.path.append(BACKEND_DIR)
+
+from services.gazetteer import DEFAULT_GAZETTEER_PATH, PLACE_KINDS, Place, read_gazetteer, write_gazetteer
+
+
+def load_places(source_path):
+    """Parse the tab-separated source file"""
+    places = []
+    with open(source_path, encoding="utf-8") as f:
+        for line_number, line in enumerate(f, 1):
+            line = line.rstrip("\n")
+            if not line.strip() or line.startswith("#"):
+                continue
+            columns = line.split("\t")
+            if len(columns) < 7:
+                raise ValueError(f"{source_path}:{line_number}: expected at least 7 columns")
+            name, kind, admin, country, lat, lon, population = columns[:7]
+            if kind not in PLACE_KINDS:
+                raise ValueError(f"{source_path}:{line_number}: unknown kind {kind!r}")
+            aliases = [alias for alias in (columns[7] if len(columns) > 7 else "").split("|") if alias]
+            places.append(Place(name, kind, admin, country, float(lat), float(lon), int(population), aliases))
+    return places
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build the binary gazetteer")
+    parser.add_argument("source", nargs="?", default=os.path.join(BACKEND_DIR, "data", "gazetteer.tsv"),
+                        help="Tab-separated source file")
+    parser.add_argument("--output", default=DEFAULT_GAZETTEER_PATH, help="Output path")
+    args = parser.parse_args()
+
+    places = load_places(args.source)
+    count = write_gazetteer(args.output, places)
+    # Read it back so a broken file is caught here rather than at startup
+    read_gazetteer(args.output)
+    print(f"Wrote {count} places to {args.output} ({os.path.getsize(args.output)} bytes)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+Build the global grids served to the 3D globe
+
+Usage:
+    python scripts/build_grids.py LAYER SOURCE_CSV [--resolution DEG] [--output-dir DIR]
+    python scripts/build_grids.py aqi --from-regions [--resolution DEG] [--output-dir DIR]
+
+SOURCE_CSV has one reading per line: lat, lon, value (a header line is
+skipped). With --from-regions the AQI readings of the regions stored in
+Appwrite are used. Readings are interpolated to a global grid of
+RESOLUTION-degree cells by inverse-distance weighting; cells with no reading
+within --max-distance-km are left empty (NaN).
+"""
+
+import os
+import sys
+import csv
+import asyncio
+import argparse
+
+import numpy as np
+from dotenv import load_dotenv
+
+# Add backend directory to path to import modules
+BACKEND_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "backend")
+sys.path.append(BACKEND_DIR)
+
+from services.grid_service import DEFAULT_GRID_DIR, GRID_LAYERS, write_grid
+from utils.geo import inverse_distance_weighting
+
+
+def load_csv(source_path):
+    """Parse lat, lon, value rows"""
+    readings = []
+    with open(source_path, newline="", encoding="utf-8") as f:
+        for line_number, row in enumerate(csv.reader(f), 1):
+            if not row or row[0].startswith("#"):
+                continue
+            try:
+                readings.append([float(column) for column in row[:3]])
+            except ValueError:
+                if line_number == 1:
+                    continue
+                raise ValueError(f"{source_path}:{line_number}: expected lat, lon, value")
+    return readings
+
+
+def load_regions():
+    """AQI readings of the regions stored in Appwrite"""
+    from services.appwrite_service import AppwriteService
+
+    load_dotenv()
+    appwrite_service = AppwriteService(
+        endpoint=os.getenv("APPWRITE_ENDPOINT"),
+        project_id=os.getenv("APPWRITE_PROJECT_ID"),
+        api_key=os.getenv("APPWRITE_API_KEY")
+    )
+    asyncio.run(appwrite_service.load_region_index())
+    readings = []
+    for region in appwrite_service.regions.values():
+        aqi = (region.get("air_quality") or {}).get("aqi")
+        if isinstance(aqi, (int, float)) and not isinstance(aqi, bool):
+            readings.append([float(region["lat"]), float(region["lon"]), float(aqi)])
+    return readings
+
+
+def build_grid(readings, resolution, power, max_distance_km):
+    """Interpolate readings to a global grid, row 0 at the north pole"""
+    height, width = round(180 / resolution), round(360 / resolution)
+    lats = 90 - (np.arange(height) + 0.5) * 180 / height
+    lons = -180 + (np.arange(width) + 0.5) * 360 / width
+    grid_lat, grid_lon = np.meshgrid(lats, lons, indexing="ij")
+    readings = np.array(readings, dtype=float).reshape(-1, 3)
+    values, _ = inverse_distance_weighting(
+        grid_lat.ravel(), grid_lon.ravel(), readings[:, 0], readings[:, 1], readings[:, 2], power, max_distance_km
+    )
+    return values.reshape(height, width)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build a global grid for the 3D globe")
+    parser.add_argument("layer", choices=sorted(GRID_LAYERS), help="Grid layer")
+    parser.add_argument("source", nargs="?", help="CSV file of lat, lon, value readings")
+    parser.add_argument("--from-regions", action="store_true", help="Use the AQI of the stored regions")
+    parser.add_argument("--resolution", type=float, default=1.0, help="Cell size in degrees")
+    parser.add_argument("--power", type=float, default=2.0, help="IDW distance exponent")
+    parser.add_argument("--max-distance-km", type=float, default=500.0, help="Reading influence distance")
+    parser.add_argument("--output-dir", default=DEFAULT_GRID_DIR, help="Grid directory")
+    args = parser.parse_args()
+
+    if args.from_regions == bool(args.source):
+        parser.error("Give either SOURCE_CSV or --from-regions")
+    if not 0 < args.resolution <= 90 or (180 / args.resolution) % 1:
+        parser.error("Resolution must divide 180 degrees")
+
+    readings = load_regions() if args.from_regions else load_csv(args.source)
+    if not readings:
+        sys.exit("No readings to grid")
+
+    values = build_grid(readings, args.resolution, args.power, args.max_distance_km)
+    os.makedirs(args.output_dir, exist_ok=True)
+    path = os.path.join(args.output_dir, f"{args.layer}.npy")
+    write_grid(path, values)
+    covered = np.count_nonzero(~np.isnan(values)) / values.size
+    print(f"Wrote {values.shape[1]}x{values.shape[0]} {args.layer} grid from {len(readings)} readings "
+          f"to {path} ({covered:.0%} of cells covered)")
+
+
+if __name__ == "__main__":
+    main()
@@ -12,11 +12,11 @@ from datetime import datetime, timedelta
 import httpx
 from dotenv import load_dotenv
 
-# Add parent directory to path to import modules
-sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+# Add the backend directory to path to import modules
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "backend"))
 
 # Import services
-from backend.services.appwrite_service import AppwriteService
+from services.appwrite_service import AppwriteService
 
 # Load environment variables
 load_dotenv()